@@ -16,10 +16,34 @@ __version__ = "0.1.0"
 __author__ = "Sam Oakes"
 __email__ = "samoakes@example.com"
 
-# Core imports for public API
-from .core.agent import ManusAgent
-from .core.config import Config
-from .core.exceptions import ManusError, SecurityError, ToolError
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .core.agent import ManusAgent
+    from .core.config import Config
+    from .core.exceptions import ManusError, SecurityError, ToolError
+
+# Public API, imported on first access so that importing the package (e.g. for
+# the CLI) does not load the agent and all of its tools up front
+_LAZY_IMPORTS = {
+    "ManusAgent": ".core.agent",
+    "Config": ".core.config",
+    "ManusError": ".core.exceptions",
+    "SecurityError": ".core.exceptions",
+    "ToolError": ".core.exceptions",
+}
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     "ManusAgent",
@@ -5,42 +5,88 @@ Provides REST API endpoints for interacting with the agent,
 monitoring status, and managing tasks.
 """
 
-from typing import Any, Dict, List, Optional
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Union
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+import aiohttp
+import orjson
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, ConfigDict
+
+# Import fastapi-cache2 conditionally, read-only endpoints are uncached without it
+try:
+    from fastapi_cache import FastAPICache
+    from fastapi_cache.backends.inmemory import InMemoryBackend
+    from fastapi_cache.backends.redis import RedisBackend
+    from fastapi_cache.decorator import cache
+    FASTAPI_CACHE_AVAILABLE = True
+except ImportError:
+    FastAPICache = None
+    InMemoryBackend = None
+    RedisBackend = None
+    FASTAPI_CACHE_AVAILABLE = False
+
+    def cache(*args, **kwargs):
+        """No-op replacement for the fastapi-cache2 decorator."""
+        def decorator(func):
+            return func
+        return decorator
 
 from ..core.agent import ManusAgent
 from ..core.config import Config
+from ..core.exceptions import ResourceError
 from ..utils.logger import get_logger
+from .tasks import CeleryTaskQueue, LocalTaskQueue, create_task_queue
 
 
 # Request/Response models
 class TaskRequest(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
     prompt: str
     max_iterations: Optional[int] = None
 
 
-class TaskResponse(BaseModel):
-    success: bool
-    result: str
-    task_id: Optional[str]
-    execution_time: float
-    iterations: int
-    metrics: Dict[str, Any]
+class TaskSubmitResponse(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
+    task_id: str
+    status: str
+
+
+class TaskStatusResponse(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
+    task_id: str
+    status: str
+    submitted_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
 
 
 class ChatRequest(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
     message: str
 
 
 class ChatResponse(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
     response: str
     task_id: Optional[str]
 
 
 class StatusResponse(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
     session_id: str
     agent_name: str
     agent_version: str
@@ -54,48 +100,146 @@ class StatusResponse(BaseModel):
     available_tools: List[str]
 
 
-# Global agent instance
+# Global agent and task queue instances
 _agent: Optional[ManusAgent] = None
+_task_queue: Optional[Union[LocalTaskQueue, CeleryTaskQueue]] = None
+# Queue whose slots /chat runs in on the local agent
+_chat_queue: Optional[LocalTaskQueue] = None
 logger = get_logger(__name__)
 
+# Connection pool shared by all LLM requests made by this process
+HTTP_POOL_SIZE = 100
+HTTP_POOL_SIZE_PER_HOST = 50
+HTTP_CONNECT_TIMEOUT_SECONDS = 5
+HEALTH_CHECK_TIMEOUT_SECONDS = 1.0
 
-def create_app(config: Config) -> FastAPI:
-    """Create and configure the FastAPI application."""
-    app = FastAPI(
-        title="Manus Agent API",
-        description="REST API for the Manus autonomous AI agent",
-        version="0.1.0",
-        docs_url="/docs" if config.debug_mode else None,
-        redoc_url="/redoc" if config.debug_mode else None
-    )
+# Namespace and lifetime of cached read-only endpoint responses
+CACHE_NAMESPACE = "manus"
+CACHE_EXPIRE_SECONDS = 5
+
+# Polling interval bounds for task event streams
+STREAM_POLL_MIN_SECONDS = 0.05
+STREAM_POLL_MAX_SECONDS = 2.0
+
+
+def _init_endpoint_cache(config: Config) -> None:
+    """Initialize the endpoint response cache backend."""
+    if not FASTAPI_CACHE_AVAILABLE:
+        logger.info("fastapi-cache2 not installed, endpoint caching disabled")
+        return
+    
+    if config.server.state_backend == "redis":
+        import redis.asyncio as redis
+        backend = RedisBackend(redis.from_url(config.server.redis_url))
+    else:
+        backend = InMemoryBackend()
     
-    # Add CORS middleware
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=["*"] if config.debug_mode else ["http://localhost:3000"],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
+    FastAPICache.init(backend, prefix="manus-cache")
+
+
+async def _invalidate_endpoint_cache() -> None:
+    """Drop cached endpoint responses after state changes."""
+    if FASTAPI_CACHE_AVAILABLE:
+        await FastAPICache.clear(namespace=CACHE_NAMESPACE)
+
+
+def _create_http_session(config: Config) -> aiohttp.ClientSession:
+    """Create the keep-alive HTTP session shared by the process for its lifetime."""
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=HTTP_POOL_SIZE, limit_per_host=HTTP_POOL_SIZE_PER_HOST),
+        timeout=aiohttp.ClientTimeout(
+            total=config.llm.request_timeout,
+            connect=HTTP_CONNECT_TIMEOUT_SECONDS
+        ),
     )
+
+
+def create_app(config: Config) -> FastAPI:
+    """Create and configure the FastAPI application."""
     
-    @app.on_event("startup")
-    async def startup_event():
-        """Initialize the agent on startup."""
-        global _agent
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        """Initialize the agent on startup and clean up on shutdown."""
+        global _agent, _task_queue, _chat_queue
+        app.state.http_session = _create_http_session(config)
         try:
-            _agent = ManusAgent(config)
+            # uvicorn owns SIGINT/SIGTERM and runs the lifespan shutdown itself
+            _agent = ManusAgent(
+                config, http_session=app.state.http_session, install_signal_handlers=False
+            )
+            _task_queue = create_task_queue(
+                config.server, _agent, on_finished=_invalidate_endpoint_cache
+            )
+            # Chats share the local agent's state with in-process tasks, so
+            # they take the same slots; with celery only chats use this agent
+            if isinstance(_task_queue, LocalTaskQueue):
+                _chat_queue = _task_queue
+            else:
+                _chat_queue = LocalTaskQueue(_agent, max_pending=config.server.max_pending_tasks)
+            _init_endpoint_cache(config)
+            
+            # Tools are fixed for the lifetime of the app, serialize them once
+            registry = _agent.tool_registry
+            registry.freeze()
+            tool_names = registry.list_tools()
+            app.state.tools_json = orjson.dumps(tool_names)
+            app.state.tool_info_json = {
+                name: orjson.dumps(registry.get_tool_info(name), default=str)
+                for name in tool_names
+            }
             logger.info("Manus agent initialized for API server")
         except Exception as e:
             logger.error(f"Failed to initialize agent: {e}")
+            await app.state.http_session.close()
             raise
-    
-    @app.on_event("shutdown")
-    async def shutdown_event():
-        """Clean up resources on shutdown."""
-        global _agent
+        
+        yield
+        
+        if _task_queue:
+            await _task_queue.close()
+        if _chat_queue is not None and _chat_queue is not _task_queue:
+            await _chat_queue.close()
         if _agent:
             await _agent.shutdown()
             logger.info("Manus agent shut down")
+        await app.state.http_session.close()
+    
+    app = FastAPI(
+        title="Manus Agent API",
+        description="REST API for the Manus autonomous AI agent",
+        version="0.1.0",
+        docs_url="/docs" if config.debug_mode else None,
+        redoc_url="/redoc" if config.debug_mode else None,
+        openapi_url="/openapi.json" if config.debug_mode else None,
+        default_response_class=ORJSONResponse,
+        lifespan=lifespan
+    )
+    
+    # Add CORS middleware, skipped entirely when no origins are allowed
+    cors_origins = ["*"] if config.debug_mode else list(dict.fromkeys(config.server.cors_origins))
+    if cors_origins:
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=cors_origins,
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
+    
+    # Endpoint cache hit/miss counters, read from the fastapi-cache2 status header
+    cache_stats = {"hits": 0, "misses": 0}
+    
+    if FASTAPI_CACHE_AVAILABLE:
+        @app.middleware("http")
+        async def track_cache_status(request: Request, call_next):
+            """Count endpoint cache hits and misses."""
+            response = await call_next(request)
+            cache_status = response.headers.get("X-FastAPI-Cache")
+            if cache_status == "HIT":
+                cache_stats["hits"] += 1
+            elif cache_status == "MISS":
+                cache_stats["misses"] += 1
+            return response
     
     def get_agent() -> ManusAgent:
         """Get the global agent instance."""
@@ -103,6 +247,18 @@ def create_app(config: Config) -> FastAPI:
             raise HTTPException(status_code=500, detail="Agent not initialized")
         return _agent
     
+    def get_task_queue() -> Union[LocalTaskQueue, CeleryTaskQueue]:
+        """Get the global task queue instance."""
+        if _task_queue is None:
+            raise HTTPException(status_code=500, detail="Task queue not initialized")
+        return _task_queue
+    
+    def get_chat_queue() -> LocalTaskQueue:
+        """Get the queue that chats run through."""
+        if _chat_queue is None:
+            raise HTTPException(status_code=500, detail="Task queue not initialized")
+        return _chat_queue
+    
     @app.get("/", response_model=Dict[str, str])
     async def root():
         """Root endpoint with basic information."""
@@ -115,8 +271,11 @@ def create_app(config: Config) -> FastAPI:
     
     @app.get("/health", response_model=Dict[str, str])
     async def health_check():
-        """Health check endpoint."""
+        """Health check endpoint, failing when the LLM backend is unreachable."""
         agent = get_agent()
+        if not await agent.agent_loop.llm_provider.check_health(HEALTH_CHECK_TIMEOUT_SECONDS):
+            raise HTTPException(status_code=503, detail="LLM provider unreachable")
+        
         return {
             "status": "healthy",
             "session_id": agent.state.session_id,
@@ -124,50 +283,97 @@ def create_app(config: Config) -> FastAPI:
         }
     
     @app.get("/status", response_model=StatusResponse)
+    @cache(expire=CACHE_EXPIRE_SECONDS, namespace=CACHE_NAMESPACE)
     async def get_status():
         """Get current agent status and metrics."""
         agent = get_agent()
-        status = agent.get_status()
-        return StatusResponse(**status)
+        return agent.get_status()
     
-    @app.post("/task", response_model=TaskResponse)
-    async def execute_task(request: TaskRequest, background_tasks: BackgroundTasks):
-        """Execute a task with the agent."""
-        agent = get_agent()
+    @app.post("/task", response_model=TaskSubmitResponse, status_code=202)
+    async def execute_task(request: TaskRequest):
+        """Queue a task for background execution and return its ID."""
+        task_queue = get_task_queue()
         
         try:
-            result = await agent.execute_task(request.prompt)
-            return TaskResponse(**result)
+            task_id = await task_queue.submit(request.prompt)
+            return TaskSubmitResponse(task_id=task_id, status="queued")
+        except ResourceError as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
         except Exception as e:
-            logger.error(f"Task execution failed: {e}")
+            logger.error(f"Task submission failed: {e}")
             raise HTTPException(status_code=500, detail=str(e))
     
+    @app.get("/task/{task_id}", response_model=TaskStatusResponse)
+    async def get_task(task_id: str):
+        """Get the status and result of a submitted task."""
+        task_queue = get_task_queue()
+        record = await task_queue.get(task_id)
+        
+        if record is None:
+            raise HTTPException(status_code=404, detail=f"Task '{task_id}' not found")
+        
+        return TaskStatusResponse(**record)
+    
+    @app.get("/task/{task_id}/stream")
+    async def stream_task(task_id: str, last_event_id: Optional[str] = Header(None)):
+        """Stream task progress as server-sent events, resuming after Last-Event-ID."""
+        task_queue = get_task_queue()
+        
+        if await task_queue.get(task_id) is None:
+            raise HTTPException(status_code=404, detail=f"Task '{task_id}' not found")
+        
+        offset = int(last_event_id) + 1 if last_event_id and last_event_id.isdigit() else 0
+        
+        async def event_generator():
+            nonlocal offset
+            delay = STREAM_POLL_MIN_SECONDS
+            
+            while True:
+                record = await task_queue.get(task_id)
+                events = await task_queue.get_events(task_id, offset)
+                
+                for event in events:
+                    yield f"id: {offset}\ndata: {json.dumps(event, default=str)}\n\n"
+                    offset += 1
+                
+                if record is None or record["status"] not in ("queued", "running"):
+                    yield f"id: {offset}\nevent: result\ndata: {json.dumps(record, default=str)}\n\n"
+                    return
+                
+                # Poll quickly while events flow, back off while the task is quiet
+                delay = STREAM_POLL_MIN_SECONDS if events else min(delay * 2, STREAM_POLL_MAX_SECONDS)
+                await asyncio.sleep(delay)
+        
+        return StreamingResponse(event_generator(), media_type="text/event-stream")
+    
     @app.post("/chat", response_model=ChatResponse)
     async def chat(request: ChatRequest):
-        """Simple chat interface."""
-        agent = get_agent()
+        """Simple chat interface, waiting for a free task slot."""
+        chat_queue = get_chat_queue()
         
         try:
-            response = await agent.chat(request.message)
-            return ChatResponse(
-                response=response,
-                task_id=agent.state.current_task.task_id if agent.state.current_task else None
-            )
+            result = await chat_queue.run(request.message)
+            await _invalidate_endpoint_cache()
+            return ChatResponse(response=result["result"], task_id=result["task_id"])
+        except ResourceError as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
         except Exception as e:
             logger.error(f"Chat failed: {e}")
             raise HTTPException(status_code=500, detail=str(e))
     
     @app.get("/history", response_model=List[Dict[str, Any]])
-    async def get_history(limit: int = 50):
-        """Get conversation history."""
+    async def get_history(limit: int = 50, x_session_id: Optional[str] = Header(None)):
+        """Get conversation history, for the session in X-Session-ID if given."""
         agent = get_agent()
-        return agent.get_conversation_history(limit)
+        history = await agent.fetch_conversation_history(limit, session_id=x_session_id)
+        return ORJSONResponse(history)
     
     @app.delete("/history")
-    async def clear_history():
-        """Clear conversation history."""
+    async def clear_history(x_session_id: Optional[str] = Header(None)):
+        """Clear conversation history, for the session in X-Session-ID if given."""
         agent = get_agent()
-        agent.clear_conversation()
+        await agent.clear_conversation_history(session_id=x_session_id)
+        await _invalidate_endpoint_cache()
         return {"message": "Conversation history cleared"}
     
     @app.post("/reset")
@@ -175,42 +381,60 @@ def create_app(config: Config) -> FastAPI:
         """Reset the agent session."""
         agent = get_agent()
         await agent.reset_session()
+        await _invalidate_endpoint_cache()
         return {"message": "Session reset successfully"}
     
     @app.get("/tools", response_model=List[str])
-    async def list_tools():
+    async def list_tools(request: Request):
         """Get list of available tools."""
-        agent = get_agent()
-        return agent.tool_registry.list_tools()
+        return Response(request.app.state.tools_json, media_type="application/json")
     
     @app.get("/tools/{tool_name}", response_model=Dict[str, Any])
-    async def get_tool_info(tool_name: str):
+    async def get_tool_info(tool_name: str, request: Request):
         """Get information about a specific tool."""
-        agent = get_agent()
-        tool_info = agent.tool_registry.get_tool_info(tool_name)
+        tool_info = request.app.state.tool_info_json.get(tool_name)
         
         if tool_info is None:
             raise HTTPException(status_code=404, detail=f"Tool '{tool_name}' not found")
         
-        return tool_info
+        return Response(tool_info, media_type="application/json")
     
     @app.get("/metrics", response_model=Dict[str, Any])
+    @cache(expire=CACHE_EXPIRE_SECONDS, namespace=CACHE_NAMESPACE)
     async def get_metrics():
         """Get detailed metrics and performance data."""
         agent = get_agent()
         return {
             "summary": agent.metrics.get_summary(),
+            "task_queue": await get_task_queue().get_stats(),
             "tool_performance": agent.metrics.get_tool_performance(),
             "error_summary": agent.metrics.get_error_summary(),
-            "performance_trend": agent.metrics.get_performance_trend(60)  # Last hour
+            "performance_trend": agent.metrics.get_performance_trend(60),  # Last hour
+            "task_rollup": agent.metrics.get_task_rollup(60),
+            "response_cache": agent.response_cache.get_stats() if agent.response_cache else None,
+            "endpoint_cache": {
+                **cache_stats,
+                "hit_rate": cache_stats["hits"] / max(cache_stats["hits"] + cache_stats["misses"], 1),
+            },
         }
     
-    @app.get("/config", response_model=Dict[str, Any])
-    async def get_config():
-        """Get current configuration (sensitive data masked)."""
-        if not config.debug_mode:
-            raise HTTPException(status_code=403, detail="Config access disabled in production")
-        
-        return config.to_dict()
+    # Debug-only routes are not registered at all in production
+    if config.debug_mode:
+        @app.get("/config", response_model=Dict[str, Any])
+        async def get_config():
+            """Get current configuration (sensitive data masked)."""
+            return config.to_dict()
+    
+    return app
+
+
+def build_app() -> FastAPI:
+    """
+    Application factory used by uvicorn worker processes.
     
-    return app
\ No newline at end of file
+    Workers cannot receive a Config object from the CLI, so configuration is
+    loaded from MANUS_CONFIG_PATH when set and from the environment otherwise.
+    """
+    config_path = os.getenv("MANUS_CONFIG_PATH")
+    config = Config.from_file(config_path) if config_path else Config.from_env()
+    return create_app(config)
@@ -0,0 +1,379 @@
+"""
+Background task execution for the Manus API.
+
+Tasks submitted through the API are executed outside of the request coroutine,
+either in-process on the event loop or on a Celery worker with Redis as the
+broker and result store. Each task is tracked by a record holding its status,
+timestamps and final result.
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+from uuid import uuid4
+
+# Import celery conditionally, it is only required for the celery backend
+try:
+    from celery import Celery
+    CELERY_AVAILABLE = True
+except ImportError:
+    Celery = None
+    CELERY_AVAILABLE = False
+
+from ..core.agent import ManusAgent
+from ..core.config import Config, ServerConfig
+from ..core.exceptions import ConfigurationError, ResourceError
+from ..utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+def _record_key(task_id: str) -> str:
+    """Redis key holding the record for a task."""
+    return f"task:{task_id}"
+
+
+def _events_key(task_id: str) -> str:
+    """Redis key holding the progress events of a task."""
+    return f"task:{task_id}:events"
+
+
+async def _forward_events(event_queue: asyncio.Queue, sink: Callable[[Dict[str, Any]], Awaitable[None]]) -> None:
+    """Move events from the agent's queue to a sink until a None sentinel arrives."""
+    while True:
+        event = await event_queue.get()
+        if event is None:
+            return
+        await sink(event)
+
+
+class LocalTaskQueue:
+    """
+    Runs agent tasks as background asyncio tasks inside the API process.
+    
+    At most max_concurrent tasks execute at once and at most max_pending wait
+    for a slot; further submissions are rejected rather than queued without
+    bound. All tasks run on the same agent and AgentState, which only tracks
+    one current task, so tasks run one at a time unless max_concurrent is
+    raised. Prompts executed in the caller's task with run() share the same
+    slots and limits.
+    """
+    
+    def __init__(
+        self,
+        agent: ManusAgent,
+        max_concurrent: int = 1,
+        max_pending: int = 32,
+        max_records: int = 1000,
+        on_finished: Optional[Callable[[], Awaitable[None]]] = None
+    ):
+        self.agent = agent
+        self.max_concurrent = max_concurrent
+        self.max_pending = max_pending
+        self.max_records = max_records
+        self.on_finished = on_finished
+        self.records: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.events: Dict[str, List[Dict[str, Any]]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._active = 0
+        # Prompts executing or waiting for a slot in run()
+        self._inline = 0
+    
+    def _check_capacity(self) -> None:
+        """Reject a new prompt once max_concurrent + max_pending are in flight."""
+        limit = self.max_concurrent + self.max_pending
+        in_flight = len(self._tasks) + self._inline
+        if in_flight >= limit:
+            raise ResourceError(
+                "Task queue is full",
+                resource_type="tasks",
+                current_usage=in_flight,
+                limit=limit
+            )
+    
+    async def submit(self, prompt: str) -> str:
+        """Queue a prompt for execution and return its task ID."""
+        self._check_capacity()
+        
+        task_id = str(uuid4())
+        self.records[task_id] = {
+            "task_id": task_id,
+            "status": "queued",
+            "submitted_at": time.time(),
+        }
+        self.events[task_id] = []
+        self._tasks[task_id] = asyncio.create_task(self._run(task_id, prompt))
+        
+        # Evicted only once the new task counts as unfinished
+        self._evict_finished_records()
+        return task_id
+    
+    async def run(self, prompt: str) -> Dict[str, Any]:
+        """Execute a prompt once a slot is free and return the agent's result."""
+        self._check_capacity()
+        
+        self._inline += 1
+        try:
+            async with self._semaphore:
+                self._active += 1
+                try:
+                    return await self.agent.execute_task(prompt)
+                finally:
+                    self._active -= 1
+        finally:
+            self._inline -= 1
+    
+    async def _run(self, task_id: str, prompt: str) -> None:
+        """Wait for a free slot, then execute the task."""
+        try:
+            async with self._semaphore:
+                self._active += 1
+                try:
+                    await self._execute(task_id, prompt)
+                finally:
+                    self._active -= 1
+        finally:
+            self._tasks.pop(task_id, None)
+    
+    async def _execute(self, task_id: str, prompt: str) -> None:
+        """Execute a task and record its outcome."""
+        record = self.records[task_id]
+        record["status"] = "running"
+        record["started_at"] = time.time()
+        
+        events = self.events[task_id]
+        
+        async def append_event(event: Dict[str, Any]) -> None:
+            events.append(event)
+        
+        event_queue: asyncio.Queue = asyncio.Queue()
+        forwarder = asyncio.create_task(_forward_events(event_queue, append_event))
+        
+        try:
+            result = await self.agent.execute_task(prompt, event_queue=event_queue)
+            outcome = {"status": "completed" if result["success"] else "failed", "result": result}
+        except Exception as e:
+            logger.error(f"Background task {task_id} failed: {e}")
+            outcome = {"status": "failed", "error": str(e)}
+        finally:
+            event_queue.put_nowait(None)
+            await forwarder
+        
+        # Only mark the task finished once all of its events are visible
+        record.update(outcome, finished_at=time.time())
+        
+        if self.on_finished is not None:
+            await self.on_finished()
+    
+    def _evict_finished_records(self) -> None:
+        """Drop the oldest finished records once the limit is exceeded."""
+        for task_id in list(self.records):
+            if len(self.records) <= self.max_records:
+                break
+            if task_id not in self._tasks:
+                del self.records[task_id]
+                self.events.pop(task_id, None)
+    
+    async def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Get the record for a task, or None if unknown."""
+        return self.records.get(task_id)
+    
+    async def get_events(self, task_id: str, offset: int = 0) -> List[Dict[str, Any]]:
+        """Get the progress events of a task starting at offset."""
+        return self.events.get(task_id, [])[offset:]
+    
+    async def get_stats(self) -> Dict[str, Any]:
+        """Get concurrency and retention statistics."""
+        return {
+            "backend": "local",
+            "active_tasks": self._active,
+            "queue_depth": len(self._tasks) + self._inline - self._active,
+            "max_concurrent_tasks": self.max_concurrent,
+            "max_pending_tasks": self.max_pending,
+            "retained_records": len(self.records),
+        }
+    
+    async def close(self) -> None:
+        """Cancel tasks that are still running."""
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+
+
+class CeleryTaskQueue:
+    """Dispatches agent tasks to Celery workers and reads records from Redis."""
+    
+    def __init__(self, redis_url: str, max_pending: int = 32):
+        if not CELERY_AVAILABLE:
+            raise ConfigurationError(
+                "Celery is required for the celery task backend",
+                config_key="server.task_backend"
+            )
+        
+        import redis.asyncio as redis
+        self.redis = redis.from_url(redis_url, decode_responses=True)
+        self.max_pending = max_pending
+    
+    async def _queue_depth(self) -> int:
+        """Number of tasks waiting on the broker for a worker."""
+        return await self.redis.llen(celery_app.conf.task_default_queue)
+    
+    async def submit(self, prompt: str) -> str:
+        """Queue a prompt on the broker and return its task ID."""
+        queue_depth = await self._queue_depth()
+        if queue_depth >= self.max_pending:
+            raise ResourceError(
+                "Task queue is full",
+                resource_type="tasks",
+                current_usage=queue_depth,
+                limit=self.max_pending
+            )
+        
+        task_id = str(uuid4())
+        await self.redis.hset(_record_key(task_id), mapping={
+            "task_id": task_id,
+            "status": "queued",
+            "submitted_at": time.time(),
+        })
+        run_agent_task.delay(task_id, prompt)
+        return task_id
+    
+    async def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Get the record for a task, or None if unknown."""
+        record = await self.redis.hgetall(_record_key(task_id))
+        if not record:
+            return None
+        
+        if "result" in record:
+            record["result"] = json.loads(record["result"])
+        return record
+    
+    async def get_events(self, task_id: str, offset: int = 0) -> List[Dict[str, Any]]:
+        """Get the progress events of a task starting at offset."""
+        events = await self.redis.lrange(_events_key(task_id), offset, -1)
+        return [json.loads(event) for event in events]
+    
+    async def get_stats(self) -> Dict[str, Any]:
+        """Get broker queue statistics."""
+        return {
+            "backend": "celery",
+            "queue_depth": await self._queue_depth(),
+            "max_pending_tasks": self.max_pending,
+        }
+    
+    async def close(self) -> None:
+        """Close the Redis connection."""
+        await self.redis.aclose()
+
+
+def create_task_queue(
+    config: ServerConfig,
+    agent: ManusAgent,
+    on_finished: Optional[Callable[[], Awaitable[None]]] = None
+) -> Union[LocalTaskQueue, CeleryTaskQueue]:
+    """
+    Factory function to create the task queue selected in config.
+    
+    on_finished is awaited after each in-process task; celery workers run
+    in other processes and do not call it.
+    """
+    if config.task_backend == "celery":
+        return CeleryTaskQueue(config.redis_url, max_pending=config.max_pending_tasks)
+    return LocalTaskQueue(
+        agent,
+        max_concurrent=config.max_concurrent_tasks,
+        max_pending=config.max_pending_tasks,
+        max_records=config.task_history_retention,
+        on_finished=on_finished
+    )
+
+
+class _TaskNotStartedError(Exception):
+    """The task could not be marked as running, so none of it has executed yet."""
+
+
+async def _run_agent_task(task_id: str, prompt: str) -> None:
+    """Execute a task on a worker and write its outcome to Redis."""
+    import redis.asyncio as redis
+    from redis.exceptions import RedisError
+    
+    # Workers build their configuration from their own environment so that
+    # secrets never travel through the broker
+    config = Config.from_env()
+    client = redis.from_url(config.server.redis_url, decode_responses=True)
+    key = _record_key(task_id)
+    
+    async def push_event(event: Dict[str, Any]) -> None:
+        await client.rpush(_events_key(task_id), json.dumps(event, default=str))
+    
+    try:
+        try:
+            await client.hset(key, mapping={"status": "running", "started_at": time.time()})
+            await client.delete(_events_key(task_id))
+        except RedisError as e:
+            raise _TaskNotStartedError(f"Could not start task {task_id}: {e}") from e
+        
+        event_queue: asyncio.Queue = asyncio.Queue()
+        forwarder = asyncio.create_task(_forward_events(event_queue, push_event))
+        
+        try:
+            # Workers run tasks side by side, each on its own state file so
+            # that their journal appends and snapshots never mix. Conversation
+            # history shared between tasks lives in the redis state backend.
+            with tempfile.TemporaryDirectory(prefix="manus-task-") as state_dir:
+                async with ManusAgent(
+                    config,
+                    state_file=os.path.join(state_dir, "agent_state.json"),
+                    install_signal_handlers=False
+                ) as agent:
+                    result = await agent.execute_task(prompt, event_queue=event_queue)
+        finally:
+            event_queue.put_nowait(None)
+            await forwarder
+        
+        await client.hset(key, mapping={
+            "status": "completed" if result["success"] else "failed",
+            "result": json.dumps(result, default=str),
+            "finished_at": time.time(),
+        })
+    except _TaskNotStartedError:
+        raise
+    except Exception as e:
+        await client.hset(key, mapping={
+            "status": "failed",
+            "error": str(e),
+            "finished_at": time.time(),
+        })
+        raise
+    finally:
+        await client.aclose()
+
+
+if CELERY_AVAILABLE:
+    celery_app = Celery("manus_tasks")
+    # Read the broker URL when Celery first needs it rather than at import,
+    # so importing the API does not depend on the environment being valid
+    celery_app.add_defaults(lambda: {"broker_url": Config.from_env().server.redis_url})
+    
+    @celery_app.task(bind=True, max_retries=3)
+    def run_agent_task(self, task_id: str, prompt: str) -> None:
+        """
+        Celery entry point running a single agent task.
+        
+        Only tasks that could not reach Redis to start are retried. Once the
+        agent has run, tools may already have written files or executed
+        commands, so a failure is recorded instead of repeating them.
+        """
+        try:
+            asyncio.run(_run_agent_task(task_id, prompt))
+        except _TaskNotStartedError as e:
+            raise self.retry(exc=e)
+else:
+    celery_app = None
+    run_agent_task = None
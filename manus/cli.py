@@ -8,41 +8,80 @@ including task execution, status monitoring, and configuration management.
 
 import argparse
 import asyncio
+import importlib.util
 import json
 import os
 import sys
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
-import uvicorn
 from rich.console import Console
 from rich.panel import Panel
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.prompt import Confirm, Prompt
 from rich.table import Table
 
-from .api.server import create_app
-from .core.agent import ManusAgent
 from .core.config import Config
 from .core.exceptions import ConfigurationError, ManusError
 from .utils.logger import get_logger
 
+# The agent, the API server and uvicorn are imported where they are used so
+# that --help and argument errors do not pay for loading them
+if TYPE_CHECKING:
+    from .core.agent import ManusAgent
 
-console = Console()
+
+# Markup is still rendered, only the automatic regex highlighting of every
+# printed string is disabled
+console = Console(highlight=False)
 logger = get_logger(__name__)
 
+_BANNER_TEMPLATE = (
+    "🤖 Manus Agent Interactive Mode\n"
+    "Session: {session}...\n"
+    "Type 'help' for commands, 'exit' to quit"
+)
+
+_HELP_TEXT = """
+[bold]Available Commands:[/bold]
+
+[blue]Task Execution:[/blue]
+  - Just type your task and press Enter
+  - Example: "Create a Python script to calculate fibonacci numbers"
+
+[blue]Agent Commands:[/blue]
+  - [bold]status[/bold]     Show agent status and metrics
+  - [bold]history[/bold]    Show conversation history
+  - [bold]clear[/bold]      Clear conversation history
+  - [bold]reset[/bold]      Reset the entire session
+  - [bold]help[/bold]       Show this help message
+  - [bold]exit[/bold]       Exit the agent
+
+[blue]Tips:[/blue]
+  - Be specific about what you want to accomplish
+  - The agent can work with files, browse the web, and execute code
+  - All operations are sandboxed for security
+"""
+
+# The help panel never changes, so it is built once and reprinted
+_HELP_PANEL = Panel(_HELP_TEXT, title="Help", border_style="cyan")
+
+_STATUS_COLUMNS = (("Metric", "cyan"), ("Value", "green"))
+_HISTORY_COLUMNS = (("Time", "cyan"), ("Role", "blue"), ("Content", "white"), ("Tools", "green"))
+_HISTORY_LIMIT = 10
+_HISTORY_CONTENT_WIDTH = 80
+
 
 class ManusCliError(Exception):
     """CLI-specific error."""
     pass
 
 
-async def run_agent_interactive(agent: ManusAgent) -> None:
+async def run_agent_interactive(agent: "ManusAgent") -> None:
     """Run the agent in interactive mode."""
-    console.print(Panel.fit(
-        f"🤖 Manus Agent Interactive Mode\n"
-        f"Session: {agent.state.session_id[:8]}...\n"
-        f"Type 'help' for commands, 'exit' to quit",
+    # Terminal I/O runs in worker threads so the event loop keeps serving the agent
+    await asyncio.to_thread(console.print, Panel.fit(
+        _BANNER_TEMPLATE.format(session=agent.state.session_id[:8]),
         title="Manus Agent",
         border_style="blue"
     ))
@@ -50,6 +89,13 @@ async def run_agent_interactive(agent: ManusAgent) -> None:
     max_attempts = 1000  # Prevent infinite loops
     attempt_count = 0
     
+    # Reuse one progress display across tasks instead of rebuilding it per task
+    progress = Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        console=console,
+    )
+    
     while attempt_count < max_attempts and not agent._shutdown_requested:
         try:
             attempt_count += 1
@@ -61,7 +107,7 @@ async def run_agent_interactive(agent: ManusAgent) -> None:
                     timeout=300.0  # 5 minute timeout
                 )
             except asyncio.TimeoutError:
-                console.print("[yellow]Input timeout - type 'exit' to quit[/yellow]")
+                await asyncio.to_thread(console.print, "[yellow]Input timeout - type 'exit' to quit[/yellow]")
                 continue
             
             if not user_input.strip():
@@ -71,30 +117,26 @@ async def run_agent_interactive(agent: ManusAgent) -> None:
             if user_input.lower() in ['exit', 'quit', 'q']:
                 break
             elif user_input.lower() == 'help':
-                show_help()
+                await asyncio.to_thread(show_help)
                 continue
             elif user_input.lower() == 'status':
-                show_status(agent)
+                await asyncio.to_thread(show_status, agent)
                 continue
             elif user_input.lower() == 'history':
-                show_history(agent)
+                await asyncio.to_thread(show_history, agent)
                 continue
             elif user_input.lower() == 'clear':
                 agent.clear_conversation()
-                console.print("[green]Conversation cleared[/green]")
+                await asyncio.to_thread(console.print, "[green]Conversation cleared[/green]")
                 continue
             elif user_input.lower() == 'reset':
-                if Confirm.ask("Are you sure you want to reset the session?"):
+                if await asyncio.to_thread(Confirm.ask, "Are you sure you want to reset the session?"):
                     await agent.reset_session()
-                    console.print("[green]Session reset[/green]")
+                    await asyncio.to_thread(console.print, "[green]Session reset[/green]")
                 continue
             
             # Execute task
-            with Progress(
-                SpinnerColumn(),
-                TextColumn("[progress.description]{task.description}"),
-                console=console,
-            ) as progress:
+            with progress:
                 task = progress.add_task("Executing task...", total=None)
                 
                 try:
@@ -102,26 +144,18 @@ async def run_agent_interactive(agent: ManusAgent) -> None:
                     progress.remove_task(task)
                     
                     # Display result
-                    if result["success"]:
-                        console.print(Panel(
-                            result["result"],
-                            title="✅ Task Completed",
-                            border_style="green"
-                        ))
-                    else:
-                        console.print(Panel(
-                            result["result"],
-                            title="❌ Task Failed",
-                            border_style="red"
-                        ))
+                    await asyncio.to_thread(console.print, _result_panel(result))
                     
                     # Show execution info
-                    console.print(f"[dim]Time: {result['execution_time']:.2f}s | "
-                                f"Iterations: {result['iterations']}[/dim]")
+                    await asyncio.to_thread(
+                        console.print,
+                        f"[dim]Time: {result['execution_time']:.2f}s | "
+                        f"Iterations: {result['iterations']}[/dim]"
+                    )
                     
                 except Exception as e:
                     progress.remove_task(task)
-                    console.print(f"[red]Error: {e}[/red]")
+                    await asyncio.to_thread(console.print, f"[red]Error: {e}[/red]")
         
         except KeyboardInterrupt:
             console.print("\n[yellow]Use 'exit' to quit properly[/yellow]")
@@ -138,38 +172,31 @@ async def run_agent_interactive(agent: ManusAgent) -> None:
     console.print("[yellow]Goodbye![/yellow]")
 
 
-def show_help() -> None:
-    """Show help information."""
-    help_text = """
-[bold]Available Commands:[/bold]
+def _new_table(title: str, columns) -> Table:
+    """Create a table with the given (header, style) columns."""
+    table = Table(title=title)
+    for header, style in columns:
+        table.add_column(header, style=style)
+    return table
 
-[blue]Task Execution:[/blue]
-  - Just type your task and press Enter
-  - Example: "Create a Python script to calculate fibonacci numbers"
 
-[blue]Agent Commands:[/blue]
-  - [bold]status[/bold]     Show agent status and metrics
-  - [bold]history[/bold]    Show conversation history
-  - [bold]clear[/bold]      Clear conversation history
-  - [bold]reset[/bold]      Reset the entire session
-  - [bold]help[/bold]       Show this help message
-  - [bold]exit[/bold]       Exit the agent
+def _result_panel(result: Dict[str, Any]) -> Panel:
+    """Panel showing the outcome of a task."""
+    if result["success"]:
+        return Panel(result["result"], title="✅ Task Completed", border_style="green")
+    return Panel(result["result"], title="❌ Task Failed", border_style="red")
 
-[blue]Tips:[/blue]
-  - Be specific about what you want to accomplish
-  - The agent can work with files, browse the web, and execute code
-  - All operations are sandboxed for security
-"""
-    console.print(Panel(help_text, title="Help", border_style="cyan"))
 
+def show_help() -> None:
+    """Show help information."""
+    console.print(_HELP_PANEL)
 
-def show_status(agent: ManusAgent) -> None:
+
+def show_status(agent: "ManusAgent") -> None:
     """Show agent status."""
     status = agent.get_status()
     
-    table = Table(title="Agent Status")
-    table.add_column("Metric", style="cyan")
-    table.add_column("Value", style="green")
+    table = _new_table("Agent Status", _STATUS_COLUMNS)
     
     table.add_row("Session ID", status["session_id"][:16] + "...")
     table.add_row("Agent Version", status["agent_version"])
@@ -188,38 +215,36 @@ def show_status(agent: ManusAgent) -> None:
         console.print(f"Iteration: {status['current_task']['iteration']}")
 
 
-def show_history(agent: ManusAgent) -> None:
+def show_history(agent: "ManusAgent") -> None:
     """Show conversation history."""
-    history = agent.get_conversation_history(limit=10)
+    history = agent.get_conversation_history(limit=_HISTORY_LIMIT)
     
     if not history:
         console.print("[dim]No conversation history[/dim]")
         return
     
-    table = Table(title="Recent Conversation History")
-    table.add_column("Time", style="cyan")
-    table.add_column("Role", style="blue") 
-    table.add_column("Content", style="white")
-    table.add_column("Tools", style="green")
+    table = _new_table("Recent Conversation History", _HISTORY_COLUMNS)
     
-    for msg in history[-10:]:  # Show last 10 messages
-        content = msg["content"][:80] + "..." if len(msg["content"]) > 80 else msg["content"]
-        time_str = msg["timestamp"][:19].replace("T", " ")
+    # The agent already returns only the requested number of messages
+    for msg in history:
+        content = msg["content"]
+        if len(content) > _HISTORY_CONTENT_WIDTH:
+            content = content[:_HISTORY_CONTENT_WIDTH] + "..."
         
         table.add_row(
-            time_str,
+            msg["timestamp"][:19].replace("T", " "),
             msg["role"],
             content,
-            str(msg["tool_calls"]) if msg["tool_calls"] > 0 else "-"
+            str(msg["tool_calls"]) if msg["tool_calls"] else "-"
         )
     
     console.print(table)
 
 
-async def run_single_task(agent: ManusAgent, task: str) -> int:
+async def run_single_task(agent: "ManusAgent", task: str) -> int:
     """Run a single task and exit."""
     try:
-        console.print(f"[blue]Executing task:[/blue] {task}")
+        await asyncio.to_thread(console.print, f"[blue]Executing task:[/blue] {task}")
         
         with Progress(
             SpinnerColumn(),
@@ -231,42 +256,65 @@ async def run_single_task(agent: ManusAgent, task: str) -> int:
             result = await agent.execute_task(task)
             progress.remove_task(progress_task)
         
-        if result["success"]:
-            console.print(Panel(
-                result["result"],
-                title="✅ Task Completed",
-                border_style="green"
-            ))
-            return 0
-        else:
-            console.print(Panel(
-                result["result"],
-                title="❌ Task Failed", 
-                border_style="red"
-            ))
-            return 1
+        await asyncio.to_thread(console.print, _result_panel(result))
+        return 0 if result["success"] else 1
             
     except Exception as e:
-        console.print(f"[red]Error: {e}[/red]")
+        await asyncio.to_thread(console.print, f"[red]Error: {e}[/red]")
         return 1
 
 
-async def run_web_server(host: str, port: int, config: Config) -> None:
+def _resolve_worker_count(config: Config) -> int:
+    """Number of uvicorn workers to run."""
+    if config.server.workers > 0:
+        return config.server.workers
+    
+    # Several workers only share tasks and history through Redis
+    if config.server.task_backend == "celery" and config.server.state_backend == "redis":
+        return max(2, (os.cpu_count() or 1) // 2)
+    return 1
+
+
+def run_web_server(host: str, port: int, config: Config, config_path: Optional[str] = None) -> None:
     """Run the web API server."""
-    console.print(f"[blue]Starting Manus web server on {host}:{port}[/blue]")
+    import uvicorn
     
-    app = create_app(config)
+    workers = _resolve_worker_count(config)
+    console.print(f"[blue]Starting Manus web server on {host}:{port} ({workers} worker(s))[/blue]")
     
-    config_dict = uvicorn.Config(
+    # Prefer the faster event loop and HTTP parser when they are installed
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    
+    if workers > 1:
+        if config.server.task_backend == "local" or config.server.state_backend == "memory":
+            console.print(
+                "[yellow]Warning: workers do not share in-process tasks or history, "
+                "use the celery task backend and redis state backend[/yellow]"
+            )
+        
+        # Worker processes rebuild the app from the environment
+        if config_path:
+            os.environ["MANUS_CONFIG_PATH"] = config_path
+        if config.debug_mode:
+            os.environ["DEBUG_MODE"] = "true"
+            os.environ["LOGGING__LEVEL"] = "DEBUG"
+        app = "manus.api.server:build_app"
+    else:
+        from .api.server import create_app
+        app = create_app(config)
+    
+    uvicorn.run(
         app,
         host=host,
         port=port,
+        factory=workers > 1,
+        workers=workers,
+        loop=loop,
+        http=http,
         log_level="info" if config.debug_mode else "warning",
         access_log=config.debug_mode,
     )
-    
-    server = uvicorn.Server(config_dict)
-    await server.serve()
 
 
 def main() -> int:
@@ -337,6 +385,11 @@ Examples:
         default=8000,
         help="Web server port (default: 8000)"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Web server worker processes (default: sized from CPU count when using Redis)"
+    )
     
     args = parser.parse_args()
     
@@ -351,10 +404,17 @@ Examples:
             config.debug_mode = True
             config.logging.level = "DEBUG"
         
+        if args.workers is not None:
+            config.server.workers = args.workers
+        
         # Validate configuration
         config.validate_runtime()
         
-        # Run the appropriate mode
+        # Run the appropriate mode, uvicorn manages its own event loop
+        if args.web:
+            run_web_server(args.host, args.port, config, args.config)
+            return 0
+        
         return asyncio.run(_run_main(args, config))
         
     except ConfigurationError as e:
@@ -375,9 +435,7 @@ Examples:
 
 async def _run_main(args: argparse.Namespace, config: Config) -> int:
     """Main async function."""
-    if args.web:
-        await run_web_server(args.host, args.port, config)
-        return 0
+    from .core.agent import ManusAgent
     
     # Create agent
     async with ManusAgent(config, args.state_file) as agent:
@@ -1,10 +1,37 @@
 """Core components for the Manus agent system."""
 
-from .agent import ManusAgent
-from .config import Config
-from .exceptions import ManusError, SecurityError, ToolError
-from .loop import AgentLoop
-from .state import AgentState
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .agent import ManusAgent
+    from .config import Config
+    from .exceptions import ManusError, SecurityError, ToolError
+    from .loop import AgentLoop
+    from .state import AgentState
+
+# Imported on first access so that loading a single submodule such as
+# config does not pull in the agent, the loop and every tool
+_LAZY_IMPORTS = {
+    "ManusAgent": ".agent",
+    "Config": ".config",
+    "ManusError": ".exceptions",
+    "SecurityError": ".exceptions",
+    "ToolError": ".exceptions",
+    "AgentLoop": ".loop",
+    "AgentState": ".state",
+}
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     "ManusAgent",
@@ -7,8 +7,11 @@ AI agent capable of complex task execution.
 """
 
 import asyncio
+import contextlib
 import os
 import signal
+import threading
+import time
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
@@ -17,9 +20,16 @@ from ..tools.registry import ToolRegistry
 from ..utils.logger import get_logger, setup_logging
 from ..utils.metrics import MetricsCollector
 from .config import Config
-from .exceptions import ConfigurationError, ManusError
+from .exceptions import ConfigurationError, LLMError, ManusError, TimeoutError, ToolError
+from .llm_cache import ResponseCache
 from .loop import AgentLoop
-from .state import AgentState
+from .state import AgentState, Message
+from .state_journal import StateJournal
+from .state_store import create_state_store
+
+
+# Task failures that are expected in normal operation and logged without a traceback
+_EXPECTED_TASK_ERRORS = (LLMError, ToolError, TimeoutError, asyncio.TimeoutError)
 
 
 class ManusAgent:
@@ -30,13 +40,23 @@ class ManusAgent:
     handling initialization, task execution, state persistence, and graceful shutdown.
     """
     
-    def __init__(self, config: Optional[Config] = None, state_file: Optional[str] = None):
+    def __init__(
+        self,
+        config: Optional[Config] = None,
+        state_file: Optional[str] = None,
+        http_session: Optional[Any] = None,
+        install_signal_handlers: bool = True
+    ):
         """
         Initialize the Manus agent.
         
         Args:
             config: Configuration object, defaults to loading from environment
             state_file: Path to state file for persistence
+            http_session: Shared aiohttp session for HTTP-based LLM providers,
+                owned and closed by the caller
+            install_signal_handlers: Request a graceful shutdown on SIGINT/SIGTERM,
+                disable when the host (e.g. uvicorn) handles signals itself
         """
         # Load configuration
         self.config = config or Config.from_env()
@@ -48,21 +68,41 @@ class ManusAgent:
         
         # Initialize state management
         self.state_file = Path(state_file) if state_file else Path("data/agent_state.json")
+        self.state_journal = StateJournal(
+            self.state_file, snapshot_every=self.config.agent.state_snapshot_every
+        )
         self.state = self._load_or_create_state()
+        self._session_prefix = self.state.session_id[:8]
+        self._apply_retention()
+        self.state_store = create_state_store(self.config.server)
+        self.response_cache = self._create_response_cache()
         
         # Initialize core components
         self.security_validator = SecurityValidator(self.config.security)
         self.tool_registry = ToolRegistry(self.security_validator)
-        self.agent_loop = AgentLoop(self.config, self.tool_registry, self.security_validator)
+        self.agent_loop = AgentLoop(
+            self.config,
+            self.tool_registry,
+            self.security_validator,
+            http_session=http_session,
+            response_cache=self.response_cache
+        )
         self.metrics = MetricsCollector()
         
         # Runtime state
-        self._running = False
+        self._save_lock = asyncio.Lock()
+        self._state_dirty = asyncio.Event()
+        self._flush_task: Optional[asyncio.Task] = None
+        # Tasks in flight, the API may run several at once
+        self._active_tasks = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
         self._shutdown_requested = False
         
         # Set up signal handlers for graceful shutdown
-        signal.signal(signal.SIGINT, self._signal_handler)
-        signal.signal(signal.SIGTERM, self._signal_handler)
+        self._signal_loop: Optional[asyncio.AbstractEventLoop] = None
+        if install_signal_handlers:
+            self._install_signal_handlers()
         
         self.logger.info(f"Manus agent initialized - Session: {self.state.session_id}")
     
@@ -70,7 +110,7 @@ class ManusAgent:
         """Load existing state or create new one."""
         if self.state_file.exists():
             try:
-                state = AgentState.load_from_file(self.state_file)
+                state = self.state_journal.load()
                 self.logger.info(f"Loaded existing state from {self.state_file}")
                 return state
             except Exception as e:
@@ -88,17 +128,65 @@ class ManusAgent:
         
         return state
     
+    def _apply_retention(self) -> None:
+        """Apply the configured history limits to the current state."""
+        self.state.set_retention(
+            max_messages=self.config.agent.max_messages,
+            max_task_history=self.config.agent.max_task_history
+        )
+    
+    def _create_response_cache(self) -> Optional[ResponseCache]:
+        """Create the LLM response cache, sharing Redis with the state store if present."""
+        if not self.config.llm.enable_prompt_caching:
+            return None
+        
+        return ResponseCache(
+            ttl_seconds=self.config.llm.prompt_cache_ttl,
+            redis=self.state_store.redis if self.state_store is not None else None
+        )
+    
+    def _install_signal_handlers(self) -> None:
+        """
+        Route SIGINT and SIGTERM to _signal_handler.
+        
+        Signals can only be handled on the main thread, so agents created
+        elsewhere (thread pools, test runners) skip this. With a running event
+        loop the handlers go through the loop instead of the signal module.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return
+        
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            if loop is not None:
+                try:
+                    loop.add_signal_handler(signum, self._signal_handler, signum, None)
+                    self._signal_loop = loop
+                    continue
+                except NotImplementedError:
+                    pass  # Not supported by the loop, e.g. on Windows
+            signal.signal(signum, self._signal_handler)
+    
     def _signal_handler(self, signum: int, frame) -> None:
         """Handle shutdown signals gracefully."""
         self.logger.info(f"Received signal {signum}, initiating graceful shutdown")
         self._shutdown_requested = True
     
-    async def execute_task(self, task_prompt: str) -> Dict[str, Any]:
+    async def execute_task(
+        self,
+        task_prompt: str,
+        event_queue: Optional[asyncio.Queue] = None
+    ) -> Dict[str, Any]:
         """
         Execute a task using the autonomous agent.
         
         Args:
             task_prompt: Description of the task to execute
+            event_queue: Optional queue receiving progress events while the task runs
             
         Returns:
             Dictionary containing execution results and metadata
@@ -106,8 +194,11 @@ class ManusAgent:
         if self._shutdown_requested:
             raise ManusError("Cannot execute task: shutdown in progress")
         
-        self._running = True
-        start_time = asyncio.get_event_loop().time()
+        self._active_tasks += 1
+        self._idle.clear()
+        start_time = time.perf_counter()
+        
+        last_message_id = self.state.messages[-1].id if self.state.messages else None
         
         try:
             self.logger.info(f"Starting task execution: {task_prompt[:100]}...")
@@ -119,25 +210,28 @@ class ManusAgent:
             success, result = await self.agent_loop.execute_task(
                 task_prompt, 
                 self.state,
-                max_iterations=self.config.agent.max_iterations
+                max_iterations=self.config.agent.max_iterations,
+                event_queue=event_queue
             )
             
             # Calculate execution time
-            execution_time = asyncio.get_event_loop().time() - start_time
+            execution_time = time.perf_counter() - start_time
             
             # Record metrics
             self.metrics.record_task_completion(success, execution_time)
             
             # Save state
-            await self._save_state()
+            await self._request_save()
+            await self._store_messages(self.state.messages_after(last_message_id))
             
             # Prepare response
+            current_task = self.state.current_task
             response = {
                 "success": success,
                 "result": result,
                 "execution_time": execution_time,
-                "task_id": self.state.current_task.task_id if self.state.current_task else None,
-                "iterations": self.state.current_task.iteration_count if self.state.current_task else 0,
+                "task_id": current_task.task_id if current_task else None,
+                "iterations": current_task.iteration_count if current_task else 0,
                 "metrics": self.metrics.get_summary()
             }
             
@@ -148,11 +242,16 @@ class ManusAgent:
             return response
             
         except Exception as e:
-            execution_time = asyncio.get_event_loop().time() - start_time
+            execution_time = time.perf_counter() - start_time
             self.metrics.record_task_completion(False, execution_time)
             
             error_msg = f"Task execution failed: {e}"
-            self.logger.error(error_msg, exc_info=True)
+            if isinstance(e, _EXPECTED_TASK_ERRORS):
+                # Routine failures such as rate limits and timeouts repeat the
+                # same traceback, formatting it every time is wasted work
+                self.logger.warning(error_msg)
+            else:
+                self.logger.error(error_msg, exc_info=True)
             
             return {
                 "success": False,
@@ -162,7 +261,9 @@ class ManusAgent:
                 "metrics": self.metrics.get_summary()
             }
         finally:
-            self._running = False
+            self._active_tasks -= 1
+            if self._active_tasks == 0:
+                self._idle.set()
     
     async def chat(self, message: str) -> str:
         """
@@ -179,43 +280,58 @@ class ManusAgent:
     
     def get_status(self) -> Dict[str, Any]:
         """Get current agent status and metrics."""
+        state = self.state
+        current_task = state.current_task
         return {
-            "session_id": self.state.session_id,
-            "agent_name": self.state.agent_name,
-            "agent_version": self.state.agent_version,
-            "running": self._running,
+            "session_id": state.session_id,
+            "agent_name": state.agent_name,
+            "agent_version": state.agent_version,
+            "running": self._active_tasks > 0,
             "current_task": {
-                "id": self.state.current_task.task_id if self.state.current_task else None,
-                "status": self.state.current_task.status if self.state.current_task else None,
-                "iteration": self.state.current_task.iteration_count if self.state.current_task else 0,
+                "id": current_task.task_id if current_task else None,
+                "status": current_task.status if current_task else None,
+                "iteration": current_task.iteration_count if current_task else 0,
             },
-            "total_tasks": len(self.state.task_history),
-            "total_iterations": self.state.total_iterations,
-            "total_tool_calls": self.state.total_tool_calls,
-            "total_errors": self.state.total_errors,
+            "total_tasks": state.task_count,
+            "total_iterations": state.total_iterations,
+            "total_tool_calls": state.total_tool_calls,
+            "total_errors": state.total_errors,
             "metrics": self.metrics.get_summary(),
-            "available_tools": list(self.tool_registry.list_tools()),
+            "available_tools": self.tool_registry.tool_names(),
         }
     
     def get_conversation_history(self, limit: int = 50) -> List[Dict[str, Any]]:
         """Get conversation history."""
         messages = self.state.messages[-limit:] if limit else self.state.messages
-        return [
-            {
-                "id": msg.id,
-                "role": msg.role,
-                "content": msg.content,
-                "timestamp": msg.timestamp.isoformat(),
-                "tool_calls": len(msg.tool_calls),
-            }
-            for msg in messages
-        ]
+        return [msg.to_history_entry() for msg in messages]
+    
+    async def fetch_conversation_history(
+        self,
+        limit: int = 50,
+        session_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get conversation history for a session from the state backend."""
+        if self.state_store is None:
+            if session_id and session_id != self.state.session_id:
+                return []
+            return self.get_conversation_history(limit)
+        
+        return await self.state_store.get_history(session_id or self.state.session_id, limit)
     
     def clear_conversation(self) -> None:
         """Clear conversation history but preserve task history."""
         self.state.messages.clear()
         self.logger.info("Conversation history cleared")
     
+    async def clear_conversation_history(self, session_id: Optional[str] = None) -> None:
+        """Clear conversation history for a session in the state backend."""
+        session_id = session_id or self.state.session_id
+        if session_id == self.state.session_id:
+            self.clear_conversation()
+        
+        if self.state_store is not None:
+            await self.state_store.clear_history(session_id)
+    
     async def reset_session(self) -> None:
         """Reset the entire session, creating a new state."""
         self.logger.info("Resetting session")
@@ -226,17 +342,18 @@ class ManusAgent:
             self.state.save_to_file(archive_path)
             self.logger.info(f"Archived previous session to {archive_path}")
         
-        # Create new state
-        self.state = AgentState(
+        # Start the new session in the existing state and metrics objects
+        self.state.reinit(
             agent_name=self.config.agent.name,
             agent_version=self.config.agent.version,
             working_directory=str(Path("data").absolute())
         )
+        self._session_prefix = self.state.session_id[:8]
+        self.metrics.reset_metrics()
+        if self.response_cache is not None:
+            self.response_cache.clear()
         
-        # Reset metrics
-        self.metrics = MetricsCollector()
-        
-        await self._save_state()
+        await self._request_save()
         self.logger.info(f"New session started: {self.state.session_id}")
     
     async def add_tool(self, tool_name: str, tool_function, tool_schema: Dict[str, Any]) -> None:
@@ -251,10 +368,54 @@ class ManusAgent:
             self.logger.info(f"Removed tool: {tool_name}")
         return success
     
-    async def _save_state(self) -> None:
-        """Save current state to file."""
+    async def _store_messages(self, messages: List[Message]) -> None:
+        """Write new conversation messages to the shared state backend."""
+        if self.state_store is None:
+            return
+        
+        try:
+            await self.state_store.append_messages(self.state.session_id, messages)
+        except Exception as e:
+            self.logger.error(f"Failed to store conversation messages: {e}")
+    
+    async def _request_save(self) -> None:
+        """
+        Save state, coalescing writes within the configured flush interval.
+        
+        With a positive interval the state is only marked dirty and a
+        background task writes it once the interval has passed, so bursts
+        of small tasks cost a single write.
+        """
+        if self.config.agent.state_flush_interval <= 0:
+            await self._save_state()
+            return
+        
+        self._state_dirty.set()
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+    
+    async def _flush_loop(self) -> None:
+        """Write dirty state at most once per flush interval."""
+        while True:
+            await self._state_dirty.wait()
+            await asyncio.sleep(self.config.agent.state_flush_interval)
+            self._state_dirty.clear()
+            # Shielded so that cancelling the loop never interrupts a write
+            await asyncio.shield(self._save_state())
+    
+    async def _save_state(self, snapshot: bool = False) -> None:
+        """
+        Save current state without blocking the event loop.
+        
+        Changes are appended to the state journal, with a full snapshot
+        written periodically or when snapshot is True.
+        """
         try:
-            self.state.save_to_file(self.state_file)
+            async with self._save_lock:
+                # Serialize on the loop for a consistent snapshot, write in a thread
+                is_snapshot, payload, position = self.state_journal.prepare(self.state, snapshot=snapshot)
+                await asyncio.to_thread(self.state_journal.write, is_snapshot, payload)
+                self.state_journal.commit(is_snapshot, position)
             self.logger.debug(f"State saved to {self.state_file}")
         except Exception as e:
             self.logger.error(f"Failed to save state: {e}")
@@ -265,26 +426,34 @@ class ManusAgent:
         
         self._shutdown_requested = True
         
-        # Wait for current task to complete if running
-        if self._running:
-            self.logger.info("Waiting for current task to complete...")
-            timeout = 30  # 30 second timeout
-            while self._running and timeout > 0:
-                await asyncio.sleep(1)
-                timeout -= 1
-            
-            if self._running:
+        # Wait for running tasks to complete
+        if self._active_tasks:
+            self.logger.info(f"Waiting for {self._active_tasks} running task(s) to complete...")
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout=30)  # 30 second timeout
+            except asyncio.TimeoutError:
                 self.logger.warning("Force shutdown: task did not complete in time")
         
-        # Save final state
-        await self._save_state()
+        # Stop the background flusher and write the final state
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._flush_task
+            self._flush_task = None
+        
+        await self._save_state(snapshot=True)
         
         # Close resources
-        if hasattr(self.tool_registry, 'cleanup'):
-            await self.tool_registry.cleanup()
+        await self.tool_registry.cleanup()
+        await self.agent_loop.cleanup()
+        
+        if self.state_store is not None:
+            await self.state_store.close()
         
-        if hasattr(self.agent_loop, 'cleanup'):
-            await self.agent_loop.cleanup()
+        if self._signal_loop is not None:
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                self._signal_loop.remove_signal_handler(signum)
+            self._signal_loop = None
         
         self.logger.info("Manus agent shutdown complete")
     
@@ -299,7 +468,7 @@ class ManusAgent:
     def __repr__(self) -> str:
         """String representation of the agent."""
         return (
-            f"ManusAgent(session={self.state.session_id[:8]}, "
-            f"running={self._running}, "
-            f"tasks={len(self.state.task_history)})"
+            f"ManusAgent(session={self._session_prefix}, "
+            f"running={self._active_tasks > 0}, "
+            f"tasks={self.state.task_count})"
         )
\ No newline at end of file
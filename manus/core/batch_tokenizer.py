@@ -0,0 +1,51 @@
+"""
+Dynamic batching for tokenizer calls.
+
+Hugging Face fast tokenizers encode a list of texts in one call far more
+cheaply than the same texts one at a time. Concurrent requests to a local
+model each need their prompt tokenized, so instead of encoding them one by
+one the requests are queued and encoded together in small batches.
+"""
+
+from typing import Any, List
+
+from .batching import AsyncMicroBatcher
+
+
+class AsyncDynamicBatchTokenizer(AsyncMicroBatcher):
+    """
+    Coalesces concurrent encode calls into batched tokenizer calls.
+    
+    Texts queued within batch_wait_timeout_s of each other, up to
+    max_batch_size of them, are encoded with a single tokenizer call in a
+    worker thread.
+    """
+    
+    def __init__(
+        self,
+        tokenizer: Any,
+        max_batch_size: int = 32,
+        batch_wait_timeout_s: float = 0.002,
+        add_special_tokens: bool = True
+    ):
+        super().__init__(
+            self._encode_batch,
+            max_batch_size=max_batch_size,
+            batch_wait_timeout_s=batch_wait_timeout_s
+        )
+        self.tokenizer = tokenizer
+        self.add_special_tokens = add_special_tokens
+    
+    async def encode(self, text: str) -> List[int]:
+        """Get the input IDs for text, batched with concurrent calls."""
+        return await self.submit(text)
+    
+    def _encode_batch(self, texts: List[str]) -> List[List[int]]:
+        """Encode texts with one tokenizer call."""
+        encoded = self.tokenizer(
+            texts,
+            padding=False,
+            return_tensors=None,
+            add_special_tokens=self.add_special_tokens
+        )
+        return encoded["input_ids"]
@@ -0,0 +1,118 @@
+"""
+Dynamic batching of concurrent calls into blocking batch functions.
+
+Tokenizers and models process a list of inputs in one call far more cheaply
+than the same inputs one at a time. Concurrent requests are therefore queued
+and passed to the batch function together in small batches.
+"""
+
+import asyncio
+import concurrent.futures
+from typing import Any, Callable, List, Optional, Tuple
+
+
+class AsyncMicroBatcher:
+    """
+    Coalesces concurrent submit calls into calls of a batch function.
+    
+    A background task takes the first queued item, then collects more for up
+    to batch_wait_timeout_s or until max_batch_size items are gathered, and
+    passes them to process_batch in one call on the given executor, the
+    default thread pool if None. process_batch receives a list of items and
+    returns their results in the same order.
+    """
+    
+    def __init__(
+        self,
+        process_batch: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 32,
+        batch_wait_timeout_s: float = 0.002,
+        executor: Optional[concurrent.futures.Executor] = None
+    ):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.batch_wait_timeout_s = batch_wait_timeout_s
+        self.executor = executor
+        
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+    
+    async def submit(self, item: Any) -> Any:
+        """Get the result for item, batched with concurrent calls."""
+        if self._worker is None or self._worker.done():
+            # Created on first use so they belong to the running event loop
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+    
+    async def _run(self) -> None:
+        """Process queued items in batches until cancelled."""
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                await self._fill_batch(batch)
+                await self._process_batch(batch)
+            except asyncio.CancelledError:
+                for _, future in batch:
+                    future.cancel()
+                raise
+    
+    async def _process_batch(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        """Process a batch with one call and resolve its futures."""
+        pending = [(item, future) for item, future in batch if not future.done()]
+        if not pending:
+            return
+        
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor,
+                self.process_batch,
+                [item for item, _ in pending]
+            )
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), result in zip(pending, results):
+            if not future.done():
+                future.set_result(result)
+    
+    async def _fill_batch(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        """Add items to batch until it is full or the wait timeout passes."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_wait_timeout_s
+        
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                return
+    
+    async def close(self) -> None:
+        """Stop the background task and fail items still waiting."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                if not future.done():
+                    future.cancel()
+            self._queue = None
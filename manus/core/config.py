@@ -6,12 +6,13 @@ and environment variable support. It follows the 12-factor app principles
 for configuration management.
 """
 
+import functools
 import os
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set, Union
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple, Union
 
-from pydantic import BaseModel, Field, validator
-from pydantic_settings import BaseSettings
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 from .exceptions import ConfigurationError
 
@@ -40,8 +41,9 @@ class SecurityConfig(BaseModel):
         description="Master encryption key for sensitive data"
     )
     
-    @validator("master_key")
-    def validate_master_key(cls, v):
+    @field_validator("master_key")
+    @classmethod
+    def validate_master_key(cls, v: Optional[str]) -> Optional[str]:
         if v and len(v) < 32:
             raise ValueError("Master key must be at least 32 characters long")
         return v
@@ -52,7 +54,7 @@ class LLMConfig(BaseModel):
     
     # Model selection
     provider: str = Field(default="mock", description="LLM provider: 'huggingface', 'ollama', 'anthropic', or 'mock'")
-    model: str = Field(default="mock-model", description="Model name to use")
+    model: str = Field(default="mock-model", description="Model name to use, or a .gguf file path for llama.cpp")
     
     # API settings (for external providers)
     api_key: Optional[str] = Field(default=None, description="API key if using external provider")
@@ -66,22 +68,132 @@ class LLMConfig(BaseModel):
     max_retries: int = Field(default=3, description="Maximum retry attempts")
     
     # Local model settings
-    device: str = Field(default="cpu", description="Device for local models: 'mps' (Apple Silicon), 'cuda', 'cpu'")
-    torch_dtype: str = Field(default="float32", description="Torch data type for optimization")
+    device: str = Field(default="cpu", description="Device for local models: 'mps' (Apple Silicon), 'cuda', 'cpu' or 'auto'")
+    torch_dtype: str = Field(default="float32", description="Torch data type for optimization, float16 on MPS unless set")
     load_in_8bit: bool = Field(default=False, description="Use 8-bit quantization")
     load_in_4bit: bool = Field(default=False, description="Use 4-bit quantization (saves memory)")
+    quantization: Optional[str] = Field(
+        default=None,
+        description=(
+            "Format of a pre-quantized checkpoint on CUDA: 'gptq' or 'awq'. Its "
+            "kernels decode faster than quantizing with load_in_4bit/load_in_8bit"
+        )
+    )
     trust_remote_code: bool = Field(default=False, description="Trust remote code for model loading")
+    mlx_quant: Optional[str] = Field(
+        default=None,
+        description="Quantization of MLX checkpoints: 'int4' or 'int8', defaults to load_in_4bit/load_in_8bit"
+    )
+    max_memory: Optional[Dict[str, str]] = Field(
+        default=None,
+        description=(
+            "Memory limit per device for models larger than VRAM on CUDA, e.g. "
+            "{\"0\": \"6GB\", \"cpu\": \"48GB\"}; layers that do not fit are offloaded"
+        )
+    )
+    offload_folder: str = Field(default=".offload", description="Directory for layers offloaded to disk")
+    assistant_model: Optional[str] = Field(
+        default=None,
+        description="Small draft model sharing the tokenizer of model, enables speculative decoding"
+    )
     
     # Performance settings
-    enable_prompt_caching: bool = Field(default=True, description="Enable prompt caching")
-    batch_size: int = Field(default=1, description="Batch size for inference")
+    enable_prompt_caching: bool = Field(default=True, description="Cache LLM responses by message history, prompt and tool set")
+    prompt_cache_ttl: int = Field(default=300, description="Time to live for cached LLM responses in seconds")
+    batch_size: int = Field(default=8, description="Maximum concurrent prompts generated in one batch")
+    batch_wait_ms: float = Field(
+        default=5.0,
+        description="Milliseconds to wait for more prompts before generating a batch"
+    )
+    tokenizer_batch_size: int = Field(default=32, description="Maximum prompts tokenized in one batch")
+    tokenizer_batch_wait_ms: float = Field(
+        default=2.0,
+        description="Milliseconds to wait for more prompts before tokenizing a batch"
+    )
     enable_attention_slicing: bool = Field(default=True, description="Enable attention slicing for memory optimization")
+    enable_plan_caching: bool = Field(
+        default=True,
+        description="Reuse the action planned for a repeated request in the built-in reasoning provider"
+    )
+    compile_model: bool = Field(
+        default=False,
+        description="Compile the model forward pass with torch.compile on CUDA"
+    )
+    compile_mode: str = Field(
+        default="reduce-overhead",
+        description="torch.compile mode: 'default', 'reduce-overhead' (CUDA graphs) or 'max-autotune'"
+    )
+    
+    # Device actually used for local models, set by resolve_device
+    _resolved_device: Optional[str] = PrivateAttr(default=None)
+    
+    @field_validator("mlx_quant")
+    @classmethod
+    def validate_mlx_quant(cls, v: Optional[str]) -> Optional[str]:
+        if v is not None and v not in {"int4", "int8"}:
+            raise ValueError("MLX quantization must be 'int4' or 'int8'")
+        return v
+    
+    @field_validator("quantization")
+    @classmethod
+    def validate_quantization(cls, v: Optional[str]) -> Optional[str]:
+        if v is not None and v not in {"gptq", "awq"}:
+            raise ValueError("Quantization must be 'gptq' or 'awq'")
+        return v
+    
+    @field_validator("compile_mode")
+    @classmethod
+    def validate_compile_mode(cls, v: str) -> str:
+        if v not in {"default", "reduce-overhead", "max-autotune"}:
+            raise ValueError("Compile mode must be 'default', 'reduce-overhead' or 'max-autotune'")
+        return v
+    
+    @field_validator("torch_dtype")
+    @classmethod
+    def validate_torch_dtype(cls, v: str) -> str:
+        if v not in {"float16", "bfloat16", "float32"}:
+            raise ValueError("Torch dtype must be 'float16', 'bfloat16' or 'float32'")
+        return v
     
-    @validator("temperature")
-    def validate_temperature(cls, v):
+    @field_validator("temperature")
+    @classmethod
+    def validate_temperature(cls, v: float) -> float:
         if not 0.0 <= v <= 1.0:
             raise ValueError("Temperature must be between 0.0 and 1.0")
         return v
+    
+    def resolve_device(self) -> str:
+        """
+        Get the device to run local models on, falling back to CPU.
+        
+        Probing the hardware imports torch, so this is only called by the
+        Hugging Face provider when it loads its model. The result is cached.
+        """
+        if self._resolved_device is not None:
+            return self._resolved_device
+        
+        try:
+            mps_available, cuda_available = _torch_device_support()
+        except ImportError as e:
+            raise ConfigurationError(
+                f"Required dependencies for Hugging Face provider not found: {e}",
+                config_key="llm.provider"
+            )
+        
+        device = self.device
+        if device == "auto":
+            device = "mps" if mps_available else "cuda" if cuda_available else "cpu"
+        elif device == "mps" and not mps_available:
+            print("MPS not available, falling back to CPU")
+            device = "cpu"
+        elif device == "cuda" and not cuda_available:
+            print("CUDA not available, falling back to CPU")
+            device = "cpu"
+        elif device not in ("mps", "cuda"):
+            device = "cpu"
+        
+        self._resolved_device = device
+        return device
 
 
 class AgentConfig(BaseModel):
@@ -97,6 +209,22 @@ class AgentConfig(BaseModel):
         default=5, 
         description="Maximum tool calls per iteration"
     )
+    state_flush_interval: float = Field(
+        default=1.0,
+        description="Seconds to coalesce state writes for, 0 to write after every change"
+    )
+    max_messages: int = Field(
+        default=1000,
+        description="Conversation messages kept in agent state, 0 for no limit"
+    )
+    max_task_history: int = Field(
+        default=500,
+        description="Finished tasks kept in agent state, 0 for no limit"
+    )
+    state_snapshot_every: int = Field(
+        default=50,
+        description="Journaled state writes between full snapshots, 0 to always write snapshots"
+    )
 
 
 class BrowserConfig(BaseModel):
@@ -112,8 +240,9 @@ class BrowserConfig(BaseModel):
     enable_javascript: bool = Field(default=True, description="Enable JavaScript")
     enable_images: bool = Field(default=False, description="Load images")
     
-    @validator("window_size")
-    def validate_window_size(cls, v):
+    @field_validator("window_size")
+    @classmethod
+    def validate_window_size(cls, v: str) -> str:
         try:
             width, height = v.split("x")
             int(width), int(height)
@@ -131,6 +260,59 @@ class ContainerConfig(BaseModel):
     enable_security_opts: bool = Field(default=True, description="Enable security options")
 
 
+class ServerConfig(BaseModel):
+    """Web API server configuration."""
+    
+    task_backend: str = Field(
+        default="local",
+        description="Task execution backend: 'local' (in-process) or 'celery'"
+    )
+    state_backend: str = Field(
+        default="memory",
+        description="Conversation state backend: 'memory' (in-process) or 'redis'"
+    )
+    redis_url: str = Field(
+        default="redis://localhost:6379/0",
+        description="Redis URL used as Celery broker, task result store and state backend"
+    )
+    workers: int = Field(
+        default=0,
+        description="Uvicorn worker processes, 0 to size automatically from the CPU count"
+    )
+    max_concurrent_tasks: int = Field(
+        default=1,
+        description=(
+            "Tasks, /chat requests included, the local backend executes at the same "
+            "time. They share one agent state that tracks a single current task, so "
+            "values above 1 let tasks overwrite each other's task record and "
+            "interleave their messages"
+        )
+    )
+    max_pending_tasks: int = Field(
+        default=32,
+        description="Tasks allowed to wait for a free slot before submissions are rejected"
+    )
+    task_history_retention: int = Field(default=1000, description="Finished task records kept")
+    cors_origins: List[str] = Field(
+        default_factory=lambda: ["http://localhost:3000"],
+        description="Origins allowed by CORS outside debug mode, empty to disable CORS"
+    )
+    
+    @field_validator("task_backend")
+    @classmethod
+    def validate_task_backend(cls, v: str) -> str:
+        if v not in {"local", "celery"}:
+            raise ValueError("Task backend must be 'local' or 'celery'")
+        return v
+    
+    @field_validator("state_backend")
+    @classmethod
+    def validate_state_backend(cls, v: str) -> str:
+        if v not in {"memory", "redis"}:
+            raise ValueError("State backend must be 'memory' or 'redis'")
+        return v
+
+
 class LoggingConfig(BaseModel):
     """Logging configuration settings."""
     
@@ -144,14 +326,25 @@ class LoggingConfig(BaseModel):
         description="Enable detailed debug logging"
     )
     
-    @validator("level")
-    def validate_log_level(cls, v):
+    @field_validator("level")
+    @classmethod
+    def validate_log_level(cls, v: str) -> str:
         valid_levels = {"DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"}
         if v.upper() not in valid_levels:
             raise ValueError(f"Log level must be one of: {valid_levels}")
         return v.upper()
 
 
+@functools.lru_cache(maxsize=None)
+def _torch_device_support() -> Tuple[bool, bool]:
+    """Import torch once per process and report (MPS available, CUDA available)."""
+    import torch
+    import transformers
+    print(f"PyTorch version: {torch.__version__}")
+    print(f"Transformers version: {transformers.__version__}")
+    return torch.backends.mps.is_available(), torch.cuda.is_available()
+
+
 class Config(BaseSettings):
     """Main configuration class that aggregates all settings."""
     
@@ -161,24 +354,33 @@ class Config(BaseSettings):
     agent: AgentConfig = Field(default_factory=AgentConfig)
     browser: BrowserConfig = Field(default_factory=BrowserConfig)
     container: ContainerConfig = Field(default_factory=ContainerConfig)
+    server: ServerConfig = Field(default_factory=ServerConfig)
     logging: LoggingConfig = Field(default_factory=LoggingConfig)
     
     # Development settings
     debug_mode: bool = Field(default=False, description="Enable debug mode")
     
-    model_config = {
-        "env_file": ".env",
-        "env_file_encoding": "utf-8",
-        "env_nested_delimiter": "__",
-        "case_sensitive": False,
-        "extra": "ignore",  # Allow extra environment variables
-    }
+    # Settings covered by the last successful validate_runtime call
+    _validated_key: Optional[Tuple[Any, ...]] = PrivateAttr(default=None)
+    
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        env_nested_delimiter="__",
+        case_sensitive=False,
+        extra="ignore",  # Allow extra environment variables
+    )
     
     @classmethod
     def from_env(cls) -> "Config":
-        """Create configuration from environment variables."""
+        """
+        Create configuration from environment variables.
+        
+        Parsing is cached per environment, each call returns an independent
+        copy so callers may modify it.
+        """
         try:
-            return cls()
+            return _load_env_config(cls, frozenset(os.environ.items())).model_copy(deep=True)
         except Exception as e:
             raise ConfigurationError(
                 f"Failed to load configuration: {e}",
@@ -206,8 +408,26 @@ class Config(BaseSettings):
                 details={"file_path": str(config_path), "error": str(e)}
             )
     
+    def _runtime_key(self) -> Tuple[Any, ...]:
+        """Settings that validate_runtime depends on."""
+        return (
+            self.llm.provider,
+            bool(self.llm.api_key),
+            self.security.enable_security_scanning,
+            bool(self.security.master_key),
+            self.container.memory_limit,
+        )
+    
     def validate_runtime(self) -> None:
-        """Perform runtime validation of configuration."""
+        """
+        Perform runtime validation of configuration.
+        
+        Validation is skipped when the relevant settings are unchanged since
+        the last successful call, including on copies from from_env.
+        """
+        if self._validated_key == self._runtime_key():
+            return
+        
         # Validate API key only for external providers
         if self.llm.provider in ["anthropic", "openai"] and not self.llm.api_key:
             raise ConfigurationError(
@@ -215,28 +435,6 @@ class Config(BaseSettings):
                 config_key="llm.api_key"
             )
         
-        # Validate local model requirements
-        if self.llm.provider == "huggingface":
-            try:
-                import torch
-                import transformers
-                print(f"PyTorch version: {torch.__version__}")
-                print(f"Transformers version: {transformers.__version__}")
-                
-                # Check device availability
-                if self.llm.device == "mps" and not torch.backends.mps.is_available():
-                    print("MPS not available, falling back to CPU")
-                    self.llm.device = "cpu"
-                elif self.llm.device == "cuda" and not torch.cuda.is_available():
-                    print("CUDA not available, falling back to CPU")
-                    self.llm.device = "cpu"
-                    
-            except ImportError as e:
-                raise ConfigurationError(
-                    f"Required dependencies for Hugging Face provider not found: {e}",
-                    config_key="llm.provider"
-                )
-        
         # Validate security settings
         if self.security.enable_security_scanning and not self.security.master_key:
             print("Warning: Security scanning enabled but no master key provided")
@@ -251,10 +449,12 @@ class Config(BaseSettings):
                 config_key="container.memory_limit",
                 expected_type="string with suffix (g, m, k)"
             )
+        
+        self._validated_key = self._runtime_key()
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert configuration to dictionary (excluding sensitive data)."""
-        data = self.dict()
+        data = self.model_dump()
         
         # Mask sensitive information
         if "api_key" in data.get("llm", {}):
@@ -262,4 +462,10 @@ class Config(BaseSettings):
         if "master_key" in data.get("security", {}):
             data["security"]["master_key"] = "***masked***"
         
-        return data
\ No newline at end of file
+        return data
+
+
+@functools.lru_cache(maxsize=8)
+def _load_env_config(config_cls: type, environ: FrozenSet[Tuple[str, str]]) -> Config:
+    """Build a Config from the environment, cached per environment snapshot."""
+    return config_cls()
@@ -13,6 +13,11 @@ from typing import Any, Dict, Optional
 class ManusError(Exception):
     """Base exception class for all Manus-related errors."""
     
+    __slots__ = ("message", "details", "cause", "_traceback_str")
+    
+    # Subclasses set their own code, an instance only overrides it when given one
+    error_code: str = "ManusError"
+    
     def __init__(
         self,
         message: str,
@@ -22,10 +27,18 @@ class ManusError(Exception):
     ):
         super().__init__(message)
         self.message = message
-        self.error_code = error_code or self.__class__.__name__
+        if error_code is not None:
+            self.error_code = error_code
         self.details = details or {}
         self.cause = cause
-        self.traceback_str = traceback.format_exc() if cause else None
+        self._traceback_str: Optional[str] = None
+    
+    @property
+    def traceback_str(self) -> Optional[str]:
+        """Formatted traceback of the cause, built on first access."""
+        if self._traceback_str is None and self.cause is not None:
+            self._traceback_str = "".join(traceback.format_exception(self.cause))
+        return self._traceback_str
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert exception to dictionary for logging/serialization."""
@@ -41,6 +54,8 @@ class ManusError(Exception):
 class SecurityError(ManusError):
     """Raised when security validation fails."""
     
+    error_code = "SECURITY_VIOLATION"
+    
     def __init__(
         self,
         message: str,
@@ -53,12 +68,14 @@ class SecurityError(ManusError):
             "attempted_action": attempted_action,
         }
         details.update(kwargs.get("details", {}))
-        super().__init__(message, error_code="SECURITY_VIOLATION", details=details)
+        super().__init__(message, details=details)
 
 
 class ToolError(ManusError):
     """Raised when tool execution fails."""
     
+    error_code = "TOOL_EXECUTION_FAILED"
+    
     def __init__(
         self,
         message: str,
@@ -73,12 +90,14 @@ class ToolError(ManusError):
             "exit_code": exit_code,
         }
         details.update(kwargs.get("details", {}))
-        super().__init__(message, error_code="TOOL_EXECUTION_FAILED", details=details)
+        super().__init__(message, details=details)
 
 
 class LLMError(ManusError):
     """Raised when LLM API calls fail."""
     
+    error_code = "LLM_API_ERROR"
+    
     def __init__(
         self,
         message: str,
@@ -93,12 +112,14 @@ class LLMError(ManusError):
             "retry_count": retry_count,
         }
         details.update(kwargs.get("details", {}))
-        super().__init__(message, error_code="LLM_API_ERROR", details=details)
+        super().__init__(message, details=details)
 
 
 class ConfigurationError(ManusError):
     """Raised when configuration is invalid or missing."""
     
+    error_code = "CONFIGURATION_ERROR"
+    
     def __init__(
         self,
         message: str,
@@ -111,12 +132,14 @@ class ConfigurationError(ManusError):
             "expected_type": expected_type,
         }
         details.update(kwargs.get("details", {}))
-        super().__init__(message, error_code="CONFIGURATION_ERROR", details=details)
+        super().__init__(message, details=details)
 
 
 class ValidationError(ManusError):
     """Raised when input validation fails."""
     
+    error_code = "VALIDATION_ERROR"
+    
     def __init__(
         self,
         message: str,
@@ -129,12 +152,14 @@ class ValidationError(ManusError):
             "validation_rule": validation_rule,
         }
         details.update(kwargs.get("details", {}))
-        super().__init__(message, error_code="VALIDATION_ERROR", details=details)
+        super().__init__(message, details=details)
 
 
 class TimeoutError(ManusError):
     """Raised when operations exceed timeout limits."""
     
+    error_code = "TIMEOUT_ERROR"
+    
     def __init__(
         self,
         message: str,
@@ -147,12 +172,14 @@ class TimeoutError(ManusError):
             "timeout_seconds": timeout_seconds,
         }
         details.update(kwargs.get("details", {}))
-        super().__init__(message, error_code="TIMEOUT_ERROR", details=details)
+        super().__init__(message, details=details)
 
 
 class ResourceError(ManusError):
     """Raised when system resources are exhausted."""
     
+    error_code = "RESOURCE_EXHAUSTED"
+    
     def __init__(
         self,
         message: str,
@@ -167,4 +194,4 @@ class ResourceError(ManusError):
             "limit": limit,
         }
         details.update(kwargs.get("details", {}))
-        super().__init__(message, error_code="RESOURCE_EXHAUSTED", details=details)
\ No newline at end of file
+        super().__init__(message, details=details)
\ No newline at end of file
@@ -0,0 +1,120 @@
+"""
+Response caching for LLM calls.
+
+Model responses are cached under a content-addressed state key built from the
+session, the recent messages preceding the prompt, the prompt itself, the
+available tool set and the expected response type. Any change to an earlier
+message changes the key, so cached entries never outlive the state they came
+from. Timestamps and generated IDs are left out so that the same conversation
+maps to the same key.
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+# Messages preceding the prompt that are part of the key, the conversation
+# window sent to the model
+HISTORY_KEY_MESSAGES = 20
+
+
+def hash_history(session_id: str, messages: Iterable[Any]) -> str:
+    """Rolling hash over the session and the roles, contents and tool calls of messages."""
+    digest = hashlib.sha256(session_id.encode())
+    for msg in messages:
+        digest.update(b"\x00")
+        digest.update(msg.role.encode())
+        digest.update(b"\x00")
+        digest.update(msg.content.encode())
+        for call in msg.tool_calls:
+            digest.update(b"\x01")
+            digest.update(json.dumps(
+                [call.tool_name, call.arguments, call.result, call.error],
+                sort_keys=True,
+                default=str
+            ).encode())
+    return digest.hexdigest()
+
+
+def build_state_key(
+    history_hash: str,
+    prompt: str,
+    tool_names: Iterable[str],
+    response_schema: str
+) -> str:
+    """Build the cache key for a prompt issued against a given state."""
+    payload = json.dumps(
+        [history_hash, prompt, sorted(tool_names), response_schema],
+        separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    TTL cache for model responses.
+    
+    Entries live in Redis when a client is supplied, so all API workers share
+    them, and in a bounded in-process LRU otherwise.
+    """
+    
+    def __init__(self, ttl_seconds: int = 300, max_entries: int = 256, redis: Optional[Any] = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.redis = redis
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        
+        self.hits = 0
+        self.misses = 0
+    
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a cached response, or None on a miss."""
+        value = None
+        
+        if self.redis is not None:
+            cached = await self.redis.get(f"llm:{key}")
+            if cached is not None:
+                value = json.loads(cached)
+        else:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, cached = entry
+                if expires_at > time.time():
+                    self._entries.move_to_end(key)
+                    value = cached
+                else:
+                    del self._entries[key]
+        
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+    
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Cache a response for the configured TTL."""
+        if self.redis is not None:
+            await self.redis.setex(f"llm:{key}", self.ttl_seconds, json.dumps(value, default=str))
+            return
+        
+        self._entries[key] = (time.time() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop all in-process entries."""
+        self._entries.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups > 0 else 0.0,
+            "backend": "redis" if self.redis is not None else "memory",
+        }
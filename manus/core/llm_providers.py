@@ -6,41 +6,191 @@ with optimizations for Apple Silicon Macs and free local models.
 """
 
 import asyncio
-import json
+import concurrent.futures
+import functools
+import importlib.util
 import logging
+import os
+import platform
+import re
+import threading
 import time
+import weakref
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Union
-
-# Import torch and transformers conditionally for testing
-try:
-    import torch
-    from transformers import (
-        AutoModelForCausalLM, 
-        AutoTokenizer, 
-        BitsAndBytesConfig,
-        pipeline,
-        TextGenerationPipeline
-    )
-    TORCH_AVAILABLE = True
-except ImportError:
-    # Mock the imports for testing without PyTorch
-    torch = None
-    AutoModelForCausalLM = None
-    AutoTokenizer = None
-    BitsAndBytesConfig = None
-    pipeline = None
-    TextGenerationPipeline = None
-    TORCH_AVAILABLE = False
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
+
+# Check for torch and transformers without importing them, importing torch
+# is slow and memory hungry and only the Hugging Face provider needs it
+TORCH_AVAILABLE = (
+    importlib.util.find_spec("torch") is not None
+    and importlib.util.find_spec("transformers") is not None
+)
+
+# MLX runs models in Apple Silicon unified memory, preferred over torch on MPS
+MLX_AVAILABLE = importlib.util.find_spec("mlx_lm") is not None
+
+# llama.cpp runs quantized GGUF models
+LLAMA_CPP_AVAILABLE = importlib.util.find_spec("llama_cpp") is not None
+
+# FlashAttention-2 kernels for CUDA
+FLASH_ATTN_AVAILABLE = importlib.util.find_spec("flash_attn") is not None
 
+# Multi-connection downloads from the Hugging Face Hub, huggingface_hub reads
+# the setting when it is first imported
+if importlib.util.find_spec("hf_transfer") is not None:
+    os.environ.setdefault("HF_HUB_ENABLE_HF_TRANSFER", "1")
+
+import orjson
+
+from .batch_tokenizer import AsyncDynamicBatchTokenizer
+from .batching import AsyncMicroBatcher
 from .config import LLMConfig
 from .exceptions import LLMError
 from ..utils.logger import get_logger
 
 
+# Entries the reasoning provider keeps of past tasks and recent actions
+REASONING_TASK_HISTORY_SIZE = 512
+REASONING_PROCESS_HISTORY_SIZE = 5
+
+# Analyses of recent user messages kept by the reasoning provider
+REASONING_ANALYSIS_CACHE_SIZE = 128
+
+# Actions planned for past requests kept by the reasoning provider, the least
+# reused one is evicted when full
+REASONING_PLAN_CACHE_SIZE = 64
+
+# Connection pool of the session an Ollama provider creates for itself
+OLLAMA_POOL_SIZE = 32
+OLLAMA_KEEPALIVE_SECONDS = 60
+
+# Phrases marking a response as the end of the task, matched in any case
+# without building a lowercased copy of the response
+_COMPLETION_SIGNALS = ("task_complete", "task complete", "completed successfully")
+_COMPLETION_RE = re.compile("|".join(map(re.escape, _COMPLETION_SIGNALS)), re.IGNORECASE)
+
+# Prompt line prefix per message role, messages with other roles are left out
+_ROLE_PREFIX = {"user": "Human: ", "assistant": "Assistant: ", "system": "System: "}
+
+# Ollama prompts leave out system messages
+_OLLAMA_ROLE_PREFIX = {role: prefix for role, prefix in _ROLE_PREFIX.items() if role != "system"}
+
+# TOOL_CALL: name(arguments) lines in model output. The call runs from the
+# first marker on a line to the closing parenthesis that ends the line.
+_TOOL_CALL_RE = re.compile(r"TOOL_CALL:([^(\n]*)\((.*)\)[^\S\n]*$", re.MULTILINE)
+
+# key='value' arguments of a TOOL_CALL: line in model output
+_TOOL_ARG_RE = re.compile(r"(\w+)=['\"]([^'\"]*)['\"]")
+
+# Files fetched in parallel before loading a model from the Hugging Face Hub
+HF_DOWNLOAD_WORKERS = 8
+HF_DOWNLOAD_PATTERNS = ["*.json", "*.safetensors", "*.txt", "*.model", "tokenizer*"]
+
+# Token IDs of prompt segments kept per Hugging Face provider
+PROMPT_SEGMENT_CACHE_SIZE = 1024
+
+# Attention caches of recent generations kept per Hugging Face provider
+KV_CACHE_ENTRIES = 4
+
+
+@dataclass
+class _LoadedModel:
+    """Hugging Face model weights shared by the providers that use them."""
+    model: Any
+    assistant_model: Any = None
+    # Thread running every forward pass on these weights, whichever provider
+    # asks, so that a compiled model never runs two at once
+    executor: concurrent.futures.ThreadPoolExecutor = field(
+        default_factory=functools.partial(
+            concurrent.futures.ThreadPoolExecutor, max_workers=1, thread_name_prefix="hf-generate"
+        )
+    )
+    
+    def __post_init__(self) -> None:
+        # The thread exits once the last provider using the weights lets go
+        weakref.finalize(self, self.executor.shutdown, wait=False)
+
+
+# Loaded models by the settings that determine their weights, an entry goes
+# away once the last provider using it is cleaned up
+_MODEL_REGISTRY: "weakref.WeakValueDictionary[Tuple[Any, ...], _LoadedModel]" = weakref.WeakValueDictionary()
+
+# Per event loop lock held while looking up and loading a model, so that
+# providers initializing at the same time load it only once
+_MODEL_LOAD_LOCKS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+
+def _model_load_lock() -> asyncio.Lock:
+    """Get the model load lock of the running event loop."""
+    loop = asyncio.get_running_loop()
+    lock = _MODEL_LOAD_LOCKS.get(loop)
+    if lock is None:
+        lock = _MODEL_LOAD_LOCKS[loop] = asyncio.Lock()
+    return lock
+
+
+def _signals_completion(text: str) -> bool:
+    """Whether a response contains one of the completion signals."""
+    return _COMPLETION_RE.search(text) is not None
+
+
+def _crop_kv_cache(past_key_values: Any, length: int) -> None:
+    """Shorten an attention cache to its first length tokens."""
+    excess = past_key_values.get_seq_length() - length
+    if excess > 0:
+        # A negative argument removes that many tokens from the end
+        past_key_values.crop(-excess)
+
+
+def _common_prefix_length(a: List[int], b: List[int]) -> int:
+    """Number of leading items a and b have in common."""
+    length = min(len(a), len(b))
+    for i in range(length):
+        if a[i] != b[i]:
+            return i
+    return length
+
+
+@functools.lru_cache(maxsize=32)
+def _format_system_block(tools: Tuple[Tuple[str, str], ...]) -> str:
+    """Prompt preamble and tool descriptions, identical across turns."""
+    prompt_parts = [
+        "You are Manus, an autonomous AI agent that helps users complete tasks.",
+        "You can analyze problems, plan solutions, and execute actions to achieve goals.",
+    ]
+    
+    # Add tool information if available
+    if tools:
+        prompt_parts.append("\nAvailable tools:")
+        prompt_parts.extend(f"- {name}: {description}" for name, description in tools)
+        prompt_parts.append("\nTo use a tool, respond with: TOOL_CALL: tool_name(arg1='value1', arg2='value2')")
+    
+    prompt_parts.append("\nConversation:")
+    return "\n".join(prompt_parts)
+
+
+def _segment_texts(segments: List[str]) -> List[str]:
+    """Prompt segments as tokenized, each with the newline joining it to the next."""
+    return [segment + "\n" for segment in segments[:-1]] + segments[-1:]
+
+
+def _message_lines(messages: List[Dict[str, str]], role_prefix: Dict[str, str]) -> List[str]:
+    """Prompt line of each message whose role has a prefix."""
+    return [
+        prefix + message.get("content", "")
+        for message in messages
+        if (prefix := role_prefix.get(message.get("role", "user"))) is not None
+    ]
+
+
 class LLMProvider(ABC):
     """Abstract base class for LLM providers."""
     
+    # Whether generate_response accepts stream=True and yields text chunks
+    supports_streaming: bool = False
+    
     def __init__(self, config: LLMConfig):
         self.config = config
         self.logger = get_logger(__name__)
@@ -54,6 +204,18 @@ class LLMProvider(ABC):
         """Generate a response from the LLM."""
         pass
     
+    async def check_health(self, timeout: float = 1.0) -> bool:
+        """Check that the backing model service is reachable."""
+        return True
+    
+    def response_from_text(self, text: str) -> Dict[str, Any]:
+        """Build a response dict from the full text of a streamed generation."""
+        return {
+            "text_content": text,
+            "tool_calls": [],
+            "is_complete": "TASK_COMPLETE" in text.upper()
+        }
+    
     @abstractmethod
     async def cleanup(self) -> None:
         """Clean up resources."""
@@ -68,6 +230,15 @@ class HuggingFaceProvider(LLMProvider):
     and Apple Metal Performance Shaders acceleration.
     """
     
+    # Name prefix of the thread running blocking model work
+    _EXECUTOR_THREAD_NAME = "hf-generate"
+    
+    # Shared weights in use, backends that load their own models leave it unset
+    _loaded_model: Optional[_LoadedModel] = None
+    
+    # Whether the model was compiled by this provider and not yet run
+    _needs_warm_up = False
+    
     def __init__(self, config: LLMConfig):
         super().__init__(config)
         
@@ -79,10 +250,38 @@ class HuggingFaceProvider(LLMProvider):
             )
         
         self.model = None
+        self.assistant_model = None
         self.tokenizer = None
-        self.pipeline = None
+        self._device = "cpu"
+        # Keeps the registry entry of the model alive while this provider uses it
+        self._loaded_model: Optional[_LoadedModel] = None
         self._model_loaded = False
         
+        # Attention caches of recent generations with the token IDs they
+        # cover, reused when a new prompt starts with the same tokens
+        self._kv_cache: List[Tuple[List[int], Any]] = []
+        self._kv_lock = threading.Lock()
+        # Preallocated caches of a compiled model that no generation is using
+        self._static_caches: List[Any] = []
+        
+        # Concurrent generations compete for the same device and gain nothing
+        # from overlapping, so they queue on one dedicated thread instead of
+        # occupying the default pool used for file and network work
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        
+        # Batches prompt tokenization across concurrent requests, set once
+        # the tokenizer is loaded
+        self._batch_tokenizer: Optional[AsyncDynamicBatchTokenizer] = None
+        # Batches generation across concurrent requests, set once the model
+        # is loaded if batching applies to it
+        self._batch_generator: Optional[AsyncMicroBatcher] = None
+        self._segment_ids: "OrderedDict[str, List[int]]" = OrderedDict()
+        # Whether joining the IDs of separately tokenized segments gives the
+        # IDs of the whole prompt, checked when the tokenizer is loaded
+        self._segments_match_prompt = False
+        # Token IDs the tokenizer puts before and after a prompt
+        self._special_tokens: Tuple[List[int], List[int]] = ([], [])
+        
         # Recommended models for different use cases
         self.recommended_models = {
             "code": [
@@ -122,6 +321,13 @@ class HuggingFaceProvider(LLMProvider):
                     api_provider="huggingface",
                     details={"model": self.config.model, "timeout": "300s"}
                 )
+            
+            if self._needs_warm_up:
+                # Compilation runs on the first forward pass and can take
+                # minutes, so it runs outside the loading timeout, without one
+                self.logger.info("Warming up compiled model...")
+                self._needs_warm_up = False
+                await self._run_blocking(self._warm_up)
                 
         except Exception as e:
             self.logger.error(f"Failed to load model: {e}")
@@ -133,22 +339,40 @@ class HuggingFaceProvider(LLMProvider):
     
     async def _initialize_model(self) -> None:
         """Internal model initialization."""
-            
-            
-        # Configure device with fallback
-        if torch.backends.mps.is_available() and self.config.device == "mps":
-            device = "mps"
-            self.logger.info("Using Apple Metal Performance Shaders (MPS)")
-        elif torch.cuda.is_available() and self.config.device == "cuda":
-            device = "cuda"
-            self.logger.info("Using CUDA")
-        else:
-            device = "cpu"
-            self.logger.info("Using CPU")
+        # Resolving the device imports torch, keep that off the event loop
+        device = await asyncio.to_thread(self.config.resolve_device)
         
-        # Configure quantization for memory efficiency
+        import torch
+        from transformers import BitsAndBytesConfig
+        
+        self._device = device
+        self.logger.info(f"Using device: {device}")
+        
+        if self.config.quantization and device != "cuda":
+            raise LLMError(
+                f"{self.config.quantization.upper()} checkpoints need a CUDA device, use "
+                "the MLX backend or a GGUF model file for llama.cpp elsewhere",
+                api_provider="huggingface",
+                details={"model": self.config.model, "device": device}
+            )
+        
+        if device == "mps" and (self.config.load_in_4bit or self.config.load_in_8bit):
+            # bitsandbytes is CUDA only, loading float weights instead would
+            # silently use several times the memory that was asked for
+            raise LLMError(
+                "Quantized models on Apple Silicon need the MLX backend "
+                "(pip install mlx-lm) or a GGUF model file for llama.cpp",
+                api_provider="huggingface",
+                details={"model": self.config.model, "device": device}
+            )
+        
+        # Configure quantization for memory efficiency. Pre-quantized
+        # checkpoints carry their own quantization config, bitsandbytes
+        # quantizes float weights while loading but decodes more slowly.
         quantization_config = None
-        if self.config.load_in_4bit and device != "mps":  # MPS doesn't support quantization yet
+        if self.config.quantization:
+            self.logger.info(f"Loading {self.config.quantization.upper()} checkpoint")
+        elif self.config.load_in_4bit:
             quantization_config = BitsAndBytesConfig(
                 load_in_4bit=True,
                 bnb_4bit_compute_dtype=torch.float16,
@@ -156,42 +380,119 @@ class HuggingFaceProvider(LLMProvider):
                 bnb_4bit_quant_type="nf4"
             )
             self.logger.info("Using 4-bit quantization")
-        elif self.config.load_in_8bit and device != "mps":
+        elif self.config.load_in_8bit:
             quantization_config = BitsAndBytesConfig(load_in_8bit=True)
             self.logger.info("Using 8-bit quantization")
         
-        # Load components with individual timeouts
-        self.logger.info("Loading tokenizer...")
-        await asyncio.wait_for(
-            asyncio.to_thread(self._load_tokenizer),
-            timeout=60.0
-        )
-        
-        self.logger.info("Loading model...")
-        await asyncio.wait_for(
-            asyncio.to_thread(self._load_model, device, quantization_config),
-            timeout=180.0  # 3 minutes for model loading
-        )
-        
-        self.logger.info("Creating pipeline...")
-        self.pipeline = pipeline(
-            "text-generation",
-            model=self.model,
-            tokenizer=self.tokenizer,
-            device=device if device != "mps" else -1,  # -1 for MPS
-            torch_dtype=getattr(torch, self.config.torch_dtype),
-            return_full_text=False,
-            max_new_tokens=self.config.max_tokens,
-            temperature=self.config.temperature,
-            do_sample=self.config.temperature > 0,
-            pad_token_id=self.tokenizer.eos_token_id
-        )
+        # Weights are shared with other providers that loaded the same model,
+        # tokenizers are not thread safe and stay per provider
+        key = self._model_key(device)
+        async with _model_load_lock():
+            loaded = _MODEL_REGISTRY.get(key)
+            if loaded is None:
+                await asyncio.gather(*(
+                    asyncio.to_thread(self._prefetch, model)
+                    for model in (self.config.model, self.config.assistant_model) if model
+                ))
+            
+            # Load components with individual timeouts
+            self.logger.info("Loading tokenizer...")
+            await asyncio.wait_for(
+                asyncio.to_thread(self._load_tokenizer),
+                timeout=60.0
+            )
+            self._batch_tokenizer = AsyncDynamicBatchTokenizer(
+                self.tokenizer,
+                max_batch_size=self.config.tokenizer_batch_size,
+                batch_wait_timeout_s=self.config.tokenizer_batch_wait_ms / 1000,
+                add_special_tokens=False
+            )
+            
+            if loaded is None:
+                self.logger.info("Loading model...")
+                await asyncio.wait_for(
+                    asyncio.to_thread(self._load_model, device, quantization_config),
+                    timeout=180.0  # 3 minutes for model loading
+                )
+                # Warmed up by initialize() once loading is done
+                self._needs_warm_up = self.config.compile_model and device == "cuda"
+                loaded = _LoadedModel(self.model, self.assistant_model)
+                _MODEL_REGISTRY[key] = loaded
+            else:
+                self.logger.info("Reusing model loaded by another provider")
+                self.model = loaded.model
+                self.assistant_model = loaded.assistant_model
+            self._loaded_model = loaded
+        
+        if self._use_batching():
+            self._batch_generator = AsyncMicroBatcher(
+                self._generate_batch,
+                max_batch_size=self.config.batch_size,
+                batch_wait_timeout_s=self.config.batch_wait_ms / 1000,
+                executor=self._get_executor()
+            )
         
         self._model_loaded = True
         self.logger.info("Model loaded successfully")
     
+    def _prefetch(self, model: str) -> None:
+        """
+        Download a Hub model's files into the local cache in parallel.
+        
+        from_pretrained fetches files one at a time. Failures are only logged,
+        from_pretrained then downloads what is missing or reports the error.
+        """
+        if os.path.isdir(model):
+            return
+        
+        from huggingface_hub import snapshot_download
+        
+        try:
+            snapshot_download(
+                model,
+                max_workers=HF_DOWNLOAD_WORKERS,
+                allow_patterns=HF_DOWNLOAD_PATTERNS
+            )
+        except Exception as e:
+            self.logger.warning(f"Prefetching {model} failed: {e}")
+    
+    def _torch_dtype(self, device: str) -> str:
+        """
+        Data type to load the model in.
+        
+        GPTQ and AWQ kernels compute in half precision. On MPS float32 runs at
+        about half the speed of float16, so half precision is also used there
+        unless torch_dtype was set explicitly.
+        """
+        if self.config.quantization:
+            return "float16"
+        if device == "mps" and "torch_dtype" not in self.config.model_fields_set:
+            return "float16"
+        return self.config.torch_dtype
+    
+    def _model_key(self, device: str) -> Tuple[Any, ...]:
+        """Settings that determine the loaded weights and their placement."""
+        config = self.config
+        return (
+            config.model,
+            self._torch_dtype(device),
+            config.load_in_4bit,
+            config.load_in_8bit,
+            config.quantization,
+            config.trust_remote_code,
+            device,
+            tuple(sorted(config.max_memory.items())) if config.max_memory else None,
+            config.offload_folder,
+            config.enable_attention_slicing,
+            config.compile_model,
+            config.compile_mode,
+            config.assistant_model,
+        )
+    
     def _load_tokenizer(self) -> None:
         """Load the tokenizer."""
+        from transformers import AutoTokenizer
+        
         self.tokenizer = AutoTokenizer.from_pretrained(
             self.config.model,
             trust_remote_code=self.config.trust_remote_code,
@@ -201,12 +502,56 @@ class HuggingFaceProvider(LLMProvider):
         # Add pad token if not present
         if self.tokenizer.pad_token is None:
             self.tokenizer.pad_token = self.tokenizer.eos_token
+        
+        # Prompt segments are tokenized without special tokens, find the ones
+        # the tokenizer adds around a whole prompt
+        plain = self.tokenizer("a", add_special_tokens=False).input_ids
+        full = self.tokenizer("a").input_ids
+        start = next(
+            (i for i in range(len(full) - len(plain) + 1) if full[i:i + len(plain)] == plain),
+            len(full)
+        )
+        self._special_tokens = (full[:start], full[start + len(plain):])
+        
+        # Byte-level BPE tokenizers split at the newlines ending each segment
+        # anyway, SentencePiece tokenizers instead mark the start of every
+        # separately encoded text and need the whole prompt encoded at once
+        texts = _segment_texts(self._prompt_segments([
+            {"role": "user", "content": "Hello there"},
+            {"role": "assistant", "content": "Hi, how can I help?"},
+        ]))
+        whole = self.tokenizer("".join(texts), add_special_tokens=False).input_ids
+        joined = [
+            token_id for text in texts
+            for token_id in self.tokenizer(text, add_special_tokens=False).input_ids
+        ]
+        self._segments_match_prompt = joined == whole
+        if not self._segments_match_prompt:
+            self.logger.info("Tokenizer does not split prompts at newlines, tokenizing whole prompts")
+    
+    def _warm_up(self) -> None:
+        """Generate a few tokens so that compilation happens before the first request."""
+        import torch
+        
+        input_ids = torch.tensor([self.tokenizer("Hello").input_ids], device=self._device)
+        with torch.inference_mode():
+            self.model.generate(
+                input_ids,
+                attention_mask=torch.ones_like(input_ids),
+                max_new_tokens=2,
+                do_sample=False,
+                pad_token_id=self.tokenizer.eos_token_id
+            )
     
     def _load_model(self, device: str, quantization_config: Optional[Any]) -> None:
         """Load the model."""
+        import torch
+        from transformers import AutoModelForCausalLM
+        
+        dtype = self._torch_dtype(device)
         model_kwargs = {
             "trust_remote_code": self.config.trust_remote_code,
-            "torch_dtype": getattr(torch, self.config.torch_dtype),
+            "torch_dtype": getattr(torch, dtype),
         }
         
         if quantization_config and device != "mps":
@@ -215,19 +560,76 @@ class HuggingFaceProvider(LLMProvider):
             # MPS-specific optimizations
             model_kwargs["device_map"] = None  # Let us handle device placement
         
+        offload = device == "cuda" and bool(self.config.max_memory)
+        if offload:
+            # accelerate fills the GPUs up to their limits and keeps the
+            # remaining layers in CPU memory or on disk, moving each to the
+            # GPU when it runs. GPUs are keyed by index.
+            model_kwargs["device_map"] = "auto"
+            model_kwargs["max_memory"] = {
+                int(key) if key.isdigit() else key: limit
+                for key, limit in self.config.max_memory.items()
+            }
+            model_kwargs["offload_folder"] = self.config.offload_folder
+        elif self.config.quantization:
+            # Quantized layers are placed on the GPU while loading
+            model_kwargs["device_map"] = device
+        
+        # FlashAttention-2 only runs in half precision, otherwise transformers
+        # picks its fused SDPA kernel where the model supports it
+        if device == "cuda" and FLASH_ATTN_AVAILABLE and dtype in ("float16", "bfloat16"):
+            model_kwargs["attn_implementation"] = "flash_attention_2"
+        
         self.model = AutoModelForCausalLM.from_pretrained(
             self.config.model,
             **model_kwargs
         )
         
-        # Move to device if MPS
-        if device == "mps":
-            self.model = self.model.to("mps")
+        # Architectures without SDPA support fall back to unfused eager attention
+        attn_implementation = getattr(self.model.config, "_attn_implementation", None)
+        if attn_implementation == "eager":
+            self.logger.warning(f"{self.config.model} does not support fused attention, using eager attention")
+        elif attn_implementation:
+            self.logger.info(f"Using {attn_implementation} attention")
+        
+        if self.config.quantization and getattr(self.model.config, "quantization_config", None) is None:
+            self.logger.warning(
+                f"{self.config.model} is not a {self.config.quantization.upper()} checkpoint, "
+                "its weights were loaded unquantized"
+            )
+        
+        # Move to the GPU, quantized and offloaded models are placed while loading
+        prequantized = bool(self.config.quantization)
+        if device == "mps" or (device == "cuda" and not quantization_config and not prequantized and not offload):
+            self.model = self.model.to(device)
         
         # Enable memory optimizations
         if self.config.enable_attention_slicing:
             if hasattr(self.model, 'enable_attention_slicing'):
                 self.model.enable_attention_slicing()
+        
+        if self.config.compile_model and device == "cuda":
+            # generate() calls forward on the model itself, so compiling the
+            # module wrapper would leave generation uncompiled. Prompt and
+            # cache lengths change every call, hence dynamic shapes.
+            self.model.forward = torch.compile(
+                self.model.forward,
+                mode=self.config.compile_mode,
+                dynamic=True
+            )
+            self.logger.info(f"Compiled model forward pass ({self.config.compile_mode})")
+        
+        if self.config.assistant_model:
+            # The draft model proposes several tokens that the model checks
+            # in one forward pass, it is small enough to keep on the device
+            self.assistant_model = AutoModelForCausalLM.from_pretrained(
+                self.config.assistant_model,
+                trust_remote_code=self.config.trust_remote_code,
+                torch_dtype=model_kwargs["torch_dtype"]
+            )
+            if device in ("mps", "cuda"):
+                self.assistant_model = self.assistant_model.to(device)
+            self.logger.info(f"Using {self.config.assistant_model} for speculative decoding")
     
     async def generate_response(
         self, 
@@ -240,15 +642,20 @@ class HuggingFaceProvider(LLMProvider):
         
         try:
             # Convert messages to prompt format
-            prompt = self._format_messages_to_prompt(messages, tools)
+            segments = self._prompt_segments(messages, tools)
+            if self._batch_tokenizer is not None:
+                prompt = await self._prompt_ids(segments)
+            else:
+                # Backends that tokenize and truncate prompts themselves
+                prompt = "\n".join(segments)
             
             # Generate response
             start_time = time.time()
             
-            result = await asyncio.to_thread(
-                self._generate_text, 
-                prompt
-            )
+            if self._batch_generator is not None:
+                result = await self._batch_generator.submit(prompt)
+            else:
+                result = await self._run_blocking(self._generate_text, prompt)
             
             generation_time = time.time() - start_time
             
@@ -266,27 +673,255 @@ class HuggingFaceProvider(LLMProvider):
                 details={"model": self.config.model}
             )
     
-    def _generate_text(self, prompt: str) -> str:
-        """Generate text using the pipeline."""
-        # Truncate prompt if too long
-        max_input_length = self.config.max_context_window - self.config.max_tokens
-        input_ids = self.tokenizer.encode(prompt, return_tensors="pt")
-        
-        if input_ids.shape[1] > max_input_length:
-            input_ids = input_ids[:, -max_input_length:]
-            prompt = self.tokenizer.decode(input_ids[0], skip_special_tokens=True)
-        
-        # Generate
-        outputs = self.pipeline(
-            prompt,
-            max_new_tokens=self.config.max_tokens,
-            temperature=self.config.temperature,
-            do_sample=self.config.temperature > 0,
-            num_return_sequences=1,
-            clean_up_tokenization_spaces=True
+    async def _run_blocking(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run blocking model work off the event loop."""
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), func, *args)
+    
+    def _get_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        """Get the model thread, starting it on first use and again after cleanup()."""
+        if self._loaded_model is not None:
+            return self._loaded_model.executor
+        
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix=self._EXECUTOR_THREAD_NAME
+            )
+        return self._executor
+    
+    def _shutdown_executor(self) -> None:
+        """Let the model thread exit once cleanup() has no more work for it."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+    
+    async def _prompt_ids(self, segments: List[str]) -> List[int]:
+        """Token IDs of the prompt, keeping the end that fits the context window."""
+        if self._segments_match_prompt:
+            input_ids = await self._segment_token_ids(segments)
+        else:
+            input_ids = await self._batch_tokenizer.encode("".join(_segment_texts(segments)))
+        
+        prefix, suffix = self._special_tokens
+        max_input_length = (
+            self.config.max_context_window - self.config.max_tokens - len(prefix) - len(suffix)
+        )
+        if len(input_ids) > max_input_length:
+            input_ids = input_ids[-max_input_length:]
+        return prefix + input_ids + suffix
+    
+    async def _segment_token_ids(self, segments: List[str]) -> List[int]:
+        """
+        Token IDs of the prompt joined from the IDs of its segments.
+        
+        Token IDs are cached per segment, so only segments not seen in an
+        earlier turn, normally the newest messages, are tokenized. Only used
+        when the tokenizer was found to give the same IDs as for the whole
+        prompt.
+        """
+        texts = _segment_texts(segments)
+        
+        segment_ids = {text: self._segment_ids.get(text) for text in texts}
+        missing = [text for text, ids in segment_ids.items() if ids is None]
+        if missing:
+            encoded = await asyncio.gather(*(self._batch_tokenizer.encode(text) for text in missing))
+            segment_ids.update(zip(missing, encoded))
+        
+        input_ids = []
+        for text in texts:
+            input_ids.extend(segment_ids[text])
+        
+        self._segment_ids.update(segment_ids)
+        for text in segment_ids:
+            self._segment_ids.move_to_end(text)
+        while len(self._segment_ids) > PROMPT_SEGMENT_CACHE_SIZE:
+            self._segment_ids.popitem(last=False)
+        return input_ids
+    
+    def _generate_text(self, prompt_ids: List[int]) -> str:
+        """
+        Generate text with the model.
+        
+        The attention cache of an earlier generation sharing a prefix with
+        the prompt is reused, so only the tokens after that prefix, normally
+        the newest turns, are run through the model before generating.
+        """
+        import torch
+        
+        static_cache = self._take_static_cache() if self._use_static_cache() else None
+        past_key_values = static_cache if static_cache is not None else self._take_kv_cache(prompt_ids)
+        
+        generate_kwargs = {
+            "max_new_tokens": self.config.max_tokens,
+            "do_sample": self.config.temperature > 0,
+            "pad_token_id": self.tokenizer.eos_token_id,
+            "use_cache": True,
+            "return_dict_in_generate": True,
+        }
+        if self.config.temperature > 0:
+            generate_kwargs["temperature"] = self.config.temperature
+        if past_key_values is not None:
+            generate_kwargs["past_key_values"] = past_key_values
+        if self.assistant_model is not None:
+            generate_kwargs["assistant_model"] = self.assistant_model
+        
+        input_ids = torch.tensor([prompt_ids], device=self._device)
+        try:
+            with torch.inference_mode():
+                if static_cache is not None:
+                    # Cache tensors are inference tensors, clear them in inference mode
+                    static_cache.reset()
+                outputs = self.model.generate(
+                    input_ids,
+                    attention_mask=torch.ones_like(input_ids),
+                    **generate_kwargs
+                )
+        finally:
+            if static_cache is not None:
+                with self._kv_lock:
+                    self._static_caches.append(static_cache)
+        
+        sequence = outputs.sequences[0]
+        if static_cache is None:
+            self._store_kv_cache(sequence.tolist(), outputs.past_key_values)
+        
+        # Tokenizers that clean up spaces by default would run a regex pass
+        # that also rewrites code like "x .y", the text is kept as generated
+        text = self.tokenizer.decode(
+            sequence[input_ids.shape[1]:],
+            skip_special_tokens=True,
+            clean_up_tokenization_spaces=False
+        )
+        return text.strip()
+    
+    def _generate_batch(self, prompts: List[List[int]]) -> List[str]:
+        """
+        Generate text for several prompts with one model call.
+        
+        Prompts are padded on the left to a common length so that every
+        prompt ends where generation starts. A lone prompt goes through
+        _generate_text to keep reusing the attention cache of earlier turns,
+        which a padded batch cannot.
+        """
+        if len(prompts) == 1:
+            return [self._generate_text(prompts[0])]
+        
+        import torch
+        
+        pad_token_id = self.tokenizer.pad_token_id
+        length = max(len(prompt_ids) for prompt_ids in prompts)
+        input_ids = torch.tensor(
+            [[pad_token_id] * (length - len(prompt_ids)) + prompt_ids for prompt_ids in prompts],
+            device=self._device
+        )
+        attention_mask = torch.tensor(
+            [[0] * (length - len(prompt_ids)) + [1] * len(prompt_ids) for prompt_ids in prompts],
+            device=self._device
+        )
+        
+        generate_kwargs = {
+            "max_new_tokens": self.config.max_tokens,
+            "do_sample": self.config.temperature > 0,
+            "pad_token_id": pad_token_id,
+        }
+        if self.config.temperature > 0:
+            generate_kwargs["temperature"] = self.config.temperature
+        
+        with torch.inference_mode():
+            sequences = self.model.generate(
+                input_ids,
+                attention_mask=attention_mask,
+                **generate_kwargs
+            )
+        
+        texts = self.tokenizer.batch_decode(
+            sequences[:, length:],
+            skip_special_tokens=True,
+            clean_up_tokenization_spaces=False
+        )
+        return [text.strip() for text in texts]
+    
+    def _use_batching(self) -> bool:
+        """
+        Whether concurrent generations are batched.
+        
+        Assisted generation only supports one prompt at a time, and a
+        compiled model with preallocated caches would recompile for every
+        new batch shape.
+        """
+        return (
+            self.config.batch_size > 1
+            and self.assistant_model is None
+            and not self._use_static_cache()
         )
+    
+    def _use_static_cache(self) -> bool:
+        """
+        Whether generations use a preallocated cache.
         
-        return outputs[0]['generated_text'].strip()
+        A compiled model only avoids recompiling and replaying new CUDA graphs
+        when the cache shapes stay fixed. Fixed-size caches cannot be trimmed
+        to a shared prompt prefix, so they replace prefix reuse.
+        """
+        return (
+            self.config.compile_model
+            and self._device == "cuda"
+            and self.assistant_model is None
+            and not self.config.max_memory
+        )
+    
+    def _take_static_cache(self) -> Any:
+        """Get an unused preallocated cache, creating one if all are in use."""
+        with self._kv_lock:
+            if self._static_caches:
+                return self._static_caches.pop()
+        
+        from transformers import StaticCache
+        
+        # Prompts are truncated to leave room for max_tokens in the context window
+        return StaticCache(
+            config=self.model.config,
+            max_batch_size=1,
+            max_cache_len=self.config.max_context_window,
+            device=self._device,
+            dtype=self.model.dtype
+        )
+    
+    def _take_kv_cache(self, prompt_ids: List[int]) -> Optional[Any]:
+        """Remove and return the cache sharing the longest prefix with the prompt."""
+        with self._kv_lock:
+            best_index, best_length = None, 0
+            for index, (cached_ids, _) in enumerate(self._kv_cache):
+                length = _common_prefix_length(cached_ids, prompt_ids)
+                if length > best_length:
+                    best_index, best_length = index, length
+            
+            if best_index is None:
+                return None
+            _, past_key_values = self._kv_cache.pop(best_index)
+        
+        # Keep only the shared prefix, at least one prompt token must be left
+        # for the model to process
+        _crop_kv_cache(past_key_values, min(best_length, len(prompt_ids) - 1))
+        return past_key_values
+    
+    def _store_kv_cache(self, sequence_ids: List[int], past_key_values: Any) -> None:
+        """Keep the cache of a finished generation for later prompts."""
+        # Legacy tuple caches from older transformers releases cannot be cropped
+        if not hasattr(past_key_values, "crop"):
+            return
+        
+        # A prompt longer than this is truncated at the front and can never
+        # share more than this prefix
+        cached_length = min(
+            past_key_values.get_seq_length(),
+            self.config.max_context_window - self.config.max_tokens
+        )
+        _crop_kv_cache(past_key_values, cached_length)
+        
+        with self._kv_lock:
+            self._kv_cache.append((sequence_ids[:cached_length], past_key_values))
+            if len(self._kv_cache) > KV_CACHE_ENTRIES:
+                self._kv_cache.pop(0)
     
     def _format_messages_to_prompt(
         self, 
@@ -294,54 +929,27 @@ class HuggingFaceProvider(LLMProvider):
         tools: Optional[List[Dict[str, Any]]] = None
     ) -> str:
         """Format messages into a single prompt."""
-        prompt_parts = []
-        
-        # Add system context
-        prompt_parts.append("You are Manus, an autonomous AI agent that helps users complete tasks.")
-        prompt_parts.append("You can analyze problems, plan solutions, and execute actions to achieve goals.")
-        
-        # Add tool information if available
-        if tools:
-            tool_descriptions = []
-            for tool in tools:
-                tool_desc = f"- {tool['name']}: {tool.get('description', 'No description')}"
-                tool_descriptions.append(tool_desc)
-            
-            prompt_parts.append("\nAvailable tools:")
-            prompt_parts.extend(tool_descriptions)
-            prompt_parts.append("\nTo use a tool, respond with: TOOL_CALL: tool_name(arg1='value1', arg2='value2')")
-        
-        # Add conversation history
-        prompt_parts.append("\nConversation:")
-        
-        for message in messages:
-            role = message.get("role", "user")
-            content = message.get("content", "")
-            
-            if role == "user":
-                prompt_parts.append(f"Human: {content}")
-            elif role == "assistant":
-                prompt_parts.append(f"Assistant: {content}")
-            elif role == "system":
-                prompt_parts.append(f"System: {content}")
-        
-        prompt_parts.append("Assistant:")
-        
-        return "\n".join(prompt_parts)
+        return "\n".join(self._prompt_segments(messages, tools))
+    
+    def _prompt_segments(
+        self,
+        messages: List[Dict[str, str]],
+        tools: Optional[List[Dict[str, Any]]] = None
+    ) -> List[str]:
+        """Split the prompt into the static preamble, one part per message and the reply cue."""
+        tools_key = tuple(
+            (tool["name"], tool.get("description", "No description")) for tool in tools or ()
+        )
+        return [_format_system_block(tools_key), *_message_lines(messages, _ROLE_PREFIX), "Assistant:"]
     
     def _parse_response(self, text: str, tools: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
         """Parse response text for tool calls and content."""
         response = {
             "text_content": text,
             "tool_calls": [],
-            "is_complete": False
+            "is_complete": _signals_completion(text)
         }
         
-        # Check for completion signals
-        completion_signals = ["TASK_COMPLETE", "task complete", "completed successfully"]
-        if any(signal.lower() in text.lower() for signal in completion_signals):
-            response["is_complete"] = True
-        
         # Parse tool calls if tools are available
         if tools and "TOOL_CALL:" in text:
             tool_calls = self._extract_tool_calls(text, tools)
@@ -351,120 +959,409 @@ class HuggingFaceProvider(LLMProvider):
     
     def _extract_tool_calls(self, text: str, tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Extract tool calls from text."""
+        if "TOOL_CALL:" not in text:
+            return []
+        
         tool_calls = []
-        tool_names = {tool["name"] for tool in tools}
-        
-        lines = text.split("\n")
-        for line in lines:
-            if "TOOL_CALL:" in line:
-                try:
-                    # Extract tool call - simple parsing
-                    call_part = line.split("TOOL_CALL:", 1)[1].strip()
-                    
-                    # Parse tool_name(args) format
-                    if "(" in call_part and call_part.endswith(")"):
-                        tool_name = call_part.split("(")[0].strip()
-                        args_str = call_part[len(tool_name)+1:-1]
-                        
-                        if tool_name in tool_names:
-                            # Simple argument parsing - in production, use proper parser
-                            args = {}
-                            if args_str.strip():
-                                # Basic parsing for key='value' format
-                                import re
-                                arg_matches = re.findall(r"(\w+)=['\"]([^'\"]*)['\"]", args_str)
-                                args = {k: v for k, v in arg_matches}
-                            
-                            tool_calls.append({
-                                "id": f"call_{len(tool_calls)}",
-                                "name": tool_name,
-                                "input": args
-                            })
-                
-                except Exception as e:
-                    self.logger.warning(f"Failed to parse tool call: {e}")
+        tool_names = frozenset(tool["name"] for tool in tools)
+        
+        for match in _TOOL_CALL_RE.finditer(text):
+            tool_name = match.group(1).strip()
+            if tool_name in tool_names:
+                # Basic parsing for key='value' format
+                tool_calls.append({
+                    "id": f"call_{len(tool_calls)}",
+                    "name": tool_name,
+                    "input": dict(_TOOL_ARG_RE.findall(match.group(2)))
+                })
         
         return tool_calls
     
     async def cleanup(self) -> None:
         """Clean up model resources."""
+        if self._batch_generator is not None:
+            await self._batch_generator.close()
+            self._batch_generator = None
+        if self._batch_tokenizer is not None:
+            await self._batch_tokenizer.close()
+            self._batch_tokenizer = None
+        self._segment_ids.clear()
+        
         if self.model is not None:
             del self.model
             self.model = None
         
+        if self.assistant_model is not None:
+            del self.assistant_model
+            self.assistant_model = None
+        
+        # The weights are freed once no other provider uses them
+        self._loaded_model = None
+        
         if self.tokenizer is not None:
             del self.tokenizer
             self.tokenizer = None
         
-        if self.pipeline is not None:
-            del self.pipeline
-            self.pipeline = None
+        with self._kv_lock:
+            self._kv_cache.clear()
+            self._static_caches.clear()
+        
+        # Clear the cache of the GPU the model ran on, _device is only set
+        # to a GPU once torch has been imported
+        if self._device == "cuda":
+            import torch
+            torch.cuda.empty_cache()
+        elif self._device == "mps":
+            import torch
+            torch.mps.empty_cache()
+        
+        self._shutdown_executor()
+        self._model_loaded = False
+        self.logger.info("Cleaned up model resources")
+
+
+class MLXProvider(HuggingFaceProvider):
+    """
+    Hugging Face model provider running on Apple's MLX framework.
+    
+    MLX keeps weights in unified memory and runs generation on the GPU without
+    host to device copies, which is considerably faster than torch on MPS.
+    Prompt formatting and response parsing are shared with the transformers
+    based provider.
+    """
+    
+    _EXECUTOR_THREAD_NAME = "mlx"
+    
+    def __init__(self, config: LLMConfig):
+        LLMProvider.__init__(self, config)
+        
+        if not MLX_AVAILABLE:
+            raise LLMError(
+                "mlx-lm is required for the MLX backend",
+                api_provider="mlx",
+                details={"missing_dependencies": "mlx-lm"}
+            )
+        
+        self.model = None
+        self.tokenizer = None
+        self._generate_kwargs: Dict[str, Any] = {}
+        self._model_loaded = False
+        
+        # Prompts are tokenized, truncated and generated one at a time by
+        # _generate_text
+        self._batch_tokenizer = None
+        self._batch_generator = None
+        
+        # MLX streams belong to the thread that created them, so loading and
+        # generation all run on one dedicated thread
+        self._executor = None
+    
+    def _checkpoint(self) -> str:
+        """
+        Model to load, switched to a prequantized checkpoint when requested.
+        
+        bitsandbytes quantization does not run on Apple Silicon, so instead
+        of loading float weights the matching int4 or int8 conversion from
+        the mlx-community organization is used.
+        """
+        quant = self.config.mlx_quant
+        if quant is None and self.config.load_in_4bit:
+            quant = "int4"
+        elif quant is None and self.config.load_in_8bit:
+            quant = "int8"
+        
+        model = self.config.model
+        if quant is None or model.startswith("mlx-community/"):
+            return model
+        
+        basename = model.rstrip("/").rsplit("/", 1)[-1]
+        return f"mlx-community/{basename}-{quant[3:]}bit"
+    
+    def _load_model_and_tokenizer(self) -> None:
+        """Load the model and tokenizer with mlx_lm."""
+        from mlx_lm import load
+        
+        checkpoint = self._checkpoint()
+        self.logger.info(f"Loading MLX checkpoint: {checkpoint}")
+        self.model, self.tokenizer = load(checkpoint)
+        
+        # Newer mlx-lm releases take a sampler instead of a temperature
+        try:
+            from mlx_lm.sample_utils import make_sampler
+            self._generate_kwargs = {"sampler": make_sampler(temp=self.config.temperature)}
+        except ImportError:
+            self._generate_kwargs = {"temp": self.config.temperature}
+    
+    async def _initialize_model(self) -> None:
+        """Load the model and tokenizer into unified memory."""
+        self.logger.info("Using MLX on Apple Silicon")
+        await asyncio.wait_for(
+            self._run_blocking(self._load_model_and_tokenizer),
+            timeout=180.0  # 3 minutes for model loading
+        )
+        
+        self._model_loaded = True
+        self.logger.info("Model loaded successfully")
+    
+    def _generate_text(self, prompt: str) -> str:
+        """Generate text with mlx_lm."""
+        from mlx_lm import generate
+        
+        # Truncate prompt if too long
+        max_input_length = self.config.max_context_window - self.config.max_tokens
+        input_ids = self.tokenizer.encode(prompt)
+        
+        if len(input_ids) > max_input_length:
+            # Keep the beginning-of-sequence token encode() put in front
+            bos = self.tokenizer.bos_token_id
+            head = input_ids[:1] if bos is not None and input_ids[0] == bos else []
+            input_ids = head + input_ids[len(head) - max_input_length:]
+        
+        # Token IDs are used as they are, sparing a decode and re-encode
+        text = generate(
+            self.model,
+            self.tokenizer,
+            prompt=input_ids,
+            max_tokens=self.config.max_tokens,
+            **self._generate_kwargs
+        )
+        return text.strip()
+    
+    async def cleanup(self) -> None:
+        """Release the model and MLX's buffer cache."""
+        self.model = None
+        self.tokenizer = None
+        
+        if self._model_loaded:
+            import mlx.core as mx
+            clear_cache = getattr(mx, "clear_cache", None) or mx.metal.clear_cache
+            await self._run_blocking(clear_cache)
+        
+        self._shutdown_executor()
+        self._model_loaded = False
+        self.logger.info("Cleaned up model resources")
+
+
+class LlamaCppProvider(HuggingFaceProvider):
+    """
+    Provider for quantized GGUF models running on llama.cpp.
+    
+    Quantized weights take a fraction of the memory of float weights and are
+    read with int8/int4 kernels, which gives much higher throughput than the
+    transformers model on CPUs and Apple Silicon. Prompt formatting and
+    response parsing are shared with the transformers based provider.
+    """
+    
+    _EXECUTOR_THREAD_NAME = "llama-cpp"
+    
+    def __init__(self, config: LLMConfig):
+        LLMProvider.__init__(self, config)
         
-        # Clear GPU cache if available
-        if TORCH_AVAILABLE and torch:
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
-            elif torch.backends.mps.is_available():
-                torch.mps.empty_cache()
+        if not LLAMA_CPP_AVAILABLE:
+            raise LLMError(
+                "llama-cpp-python is required for GGUF models",
+                api_provider="llama_cpp",
+                details={"missing_dependencies": "llama-cpp-python"}
+            )
         
+        self.model = None
+        self.tokenizer = None
+        self._model_loaded = False
+        
+        # Prompts are tokenized, truncated and generated one at a time by
+        # _generate_text
+        self._batch_tokenizer = None
+        self._batch_generator = None
+        
+        # A llama.cpp context must not be used from several threads at once
+        self._executor = None
+    
+    def _load_gguf_model(self) -> None:
+        """Load the GGUF model, offloading all layers unless running on CPU."""
+        from llama_cpp import Llama
+        
+        self.model = Llama(
+            model_path=self.config.model,
+            n_ctx=self.config.max_context_window,
+            n_gpu_layers=0 if self.config.device == "cpu" else -1,
+            verbose=False
+        )
+    
+    async def _initialize_model(self) -> None:
+        """Load the model file."""
+        self.logger.info("Using llama.cpp")
+        await asyncio.wait_for(
+            self._run_blocking(self._load_gguf_model),
+            timeout=180.0  # 3 minutes for model loading
+        )
+        
+        self._model_loaded = True
+        self.logger.info("Model loaded successfully")
+    
+    def _generate_text(self, prompt: str) -> str:
+        """Generate a completion with llama.cpp."""
+        # Truncate prompt if too long
+        max_input_length = self.config.max_context_window - self.config.max_tokens
+        input_ids = self.model.tokenize(prompt.encode("utf-8"))
+        
+        if len(input_ids) > max_input_length:
+            # Keep the beginning-of-sequence token tokenize() put in front
+            head = input_ids[:1] if input_ids[0] == self.model.token_bos() else []
+            input_ids = head + input_ids[len(head) - max_input_length:]
+        
+        # Token IDs are used as they are, sparing a detokenize and re-tokenize
+        completion = self.model.create_completion(
+            input_ids,
+            max_tokens=self.config.max_tokens,
+            temperature=self.config.temperature
+        )
+        return completion["choices"][0]["text"].strip()
+    
+    async def cleanup(self) -> None:
+        """Free the llama.cpp model and context."""
+        if self.model is not None:
+            # close() only exists in newer llama-cpp-python releases, older
+            # ones free the context when the model is garbage collected
+            close = getattr(self.model, "close", None)
+            if close is not None:
+                await self._run_blocking(close)
+            self.model = None
+        
+        self._shutdown_executor()
         self._model_loaded = False
         self.logger.info("Cleaned up model resources")
 
 
+def _use_mlx(config: LLMConfig) -> bool:
+    """Whether a Hugging Face model should run on MLX rather than torch."""
+    return (
+        MLX_AVAILABLE
+        and config.device in ("mps", "auto")
+        and platform.system() == "Darwin"
+        and platform.machine() == "arm64"
+    )
+
+
 class OllamaProvider(LLMProvider):
     """Ollama provider for running local models."""
     
-    def __init__(self, config: LLMConfig):
+    supports_streaming = True
+    
+    def __init__(self, config: LLMConfig, http_session: Optional[Any] = None):
         super().__init__(config)
         self.base_url = config.api_base_url or "http://localhost:11434"
+        # Shared aiohttp session owned by the caller, e.g. the API server
+        self.http_session = http_session
+        # Session created on first use when no shared one was given
+        self._session: Optional[Any] = None
+    
+    def _get_session(self):
+        """Session for requests, reused across calls to keep connections alive."""
+        if self.http_session is not None:
+            return self.http_session
+        
+        if self._session is None or self._session.closed:
+            import aiohttp
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=OLLAMA_POOL_SIZE,
+                    keepalive_timeout=OLLAMA_KEEPALIVE_SECONDS
+                )
+            )
+        return self._session
     
     async def generate_response(
         self, 
         messages: List[Dict[str, str]], 
-        tools: Optional[List[Dict[str, Any]]] = None
-    ) -> Dict[str, Any]:
-        """Generate response using Ollama API."""
-        import aiohttp
+        tools: Optional[List[Dict[str, Any]]] = None,
+        stream: bool = False
+    ) -> Union[Dict[str, Any], AsyncIterator[str]]:
+        """
+        Generate response using Ollama API.
         
+        Ollama streams the generation as it is produced. With stream=True an
+        async iterator over the text chunks is returned so callers can show
+        the first tokens right away; otherwise the chunks are collected into
+        a complete response.
+        """
         # Format prompt
         prompt = self._format_messages_to_prompt(messages, tools)
         
         payload = {
             "model": self.config.model,
             "prompt": prompt,
-            "stream": False,
+            "stream": True,
             "options": {
                 "temperature": self.config.temperature,
                 "num_predict": self.config.max_tokens,
             }
         }
         
+        chunks = self._stream_generate(payload)
+        if stream:
+            return chunks
+        
+        return self.response_from_text("".join([chunk async for chunk in chunks]))
+    
+    async def _stream_generate(self, payload: Dict[str, Any]) -> AsyncIterator[str]:
+        """Yield the text chunks of a streamed generate request."""
+        try:
+            async for chunk in self._post_generate(self._get_session(), payload):
+                yield chunk
+        
+        except LLMError:
+            raise
+        except Exception as e:
+            raise LLMError(
+                f"Ollama request failed: {e}",
+                api_provider="ollama"
+            )
+    
+    async def _post_generate(self, session, payload: Dict[str, Any]) -> AsyncIterator[str]:
+        """Send a generate request over the given session and yield its chunks."""
+        import aiohttp
+        
+        # Long conversations make large payloads, orjson encodes them faster
+        async with session.post(
+            f"{self.base_url}/api/generate",
+            data=orjson.dumps(payload),
+            headers={"Content-Type": "application/json"},
+            timeout=aiohttp.ClientTimeout(total=self.config.request_timeout)
+        ) as response:
+            if response.status != 200:
+                raise LLMError(
+                    f"Ollama API error: {response.status}",
+                    api_provider="ollama",
+                    status_code=response.status
+                )
+            
+            # The body is newline-delimited JSON, one object per chunk
+            async for line in response.content:
+                if not line.strip():
+                    continue
+                
+                data = orjson.loads(line)
+                if "error" in data:
+                    raise LLMError(
+                        f"Ollama API error: {data['error']}",
+                        api_provider="ollama"
+                    )
+                
+                if data.get("response"):
+                    yield data["response"]
+                if data.get("done"):
+                    break
+    
+    async def check_health(self, timeout: float = 1.0) -> bool:
+        """Check that the Ollama server answers within timeout seconds."""
+        import aiohttp
+        
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.base_url}/api/generate",
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=self.config.request_timeout)
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return {
-                            "text_content": data.get("response", ""),
-                            "tool_calls": [],
-                            "is_complete": "TASK_COMPLETE" in data.get("response", "").upper()
-                        }
-                    else:
-                        raise LLMError(
-                            f"Ollama API error: {response.status}",
-                            api_provider="ollama",
-                            status_code=response.status
-                        )
-        
-        except Exception as e:
-            raise LLMError(
-                f"Ollama request failed: {e}",
-                api_provider="ollama"
-            )
+            client_timeout = aiohttp.ClientTimeout(total=timeout)
+            async with self._get_session().get(f"{self.base_url}/api/tags", timeout=client_timeout) as response:
+                return response.status == 200
+        except Exception:
+            return False
     
     def _format_messages_to_prompt(
         self, 
@@ -473,23 +1370,265 @@ class OllamaProvider(LLMProvider):
     ) -> str:
         """Format messages for Ollama."""
         # Simple prompt formatting
-        prompt_parts = []
-        
-        for message in messages:
-            role = message.get("role", "user")
-            content = message.get("content", "")
-            
-            if role == "user":
-                prompt_parts.append(f"Human: {content}")
-            elif role == "assistant":
-                prompt_parts.append(f"Assistant: {content}")
-        
-        prompt_parts.append("Assistant:")
-        return "\n".join(prompt_parts)
+        return "\n".join([*_message_lines(messages, _OLLAMA_ROLE_PREFIX), "Assistant:"])
     
     async def cleanup(self) -> None:
-        """No cleanup needed for Ollama."""
-        pass
+        """Close the session this provider created, a shared one is left open."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+def _keyword_re(*keywords: str) -> re.Pattern:
+    """Pattern matching text that contains any of the keywords."""
+    return re.compile("|".join(re.escape(keyword) for keyword in keywords))
+
+
+def _compile_keywords(table: Dict[str, List[str]]) -> Tuple[Tuple[str, re.Pattern], ...]:
+    """One substring pattern per label, kept in the table's priority order."""
+    return tuple((label, _keyword_re(*keywords)) for label, keywords in table.items())
+
+
+# Intent keywords in priority order, the first label with a match wins
+_INTENT_PATTERNS = _compile_keywords({
+    # Date/time requests (highest priority)
+    "datetime_query": ["date", "time", "today", "current date", "what day", "when is", "now"],
+
+    # System information requests
+    "system_query": ["system", "info", "computer", "uname", "os", "operating system", "machine"],
+
+    # File listing and exploration
+    "exploration": ["list", "show", "display", "see", "view", "find", "search", "ls", "dir", "files", "directories"],
+
+    # File creation and manipulation
+    "file_manipulation": ["create", "write", "make", "build", "generate", "save", "edit", "modify"],
+
+    # Information gathering
+    "information_gathering": ["what", "how", "why", "where", "tell me", "explain", "describe", "help"],
+
+    # System interaction
+    "system_interaction": ["run", "execute", "command", "shell", "terminal", "bash"],
+
+    # Development tasks
+    "development": ["script", "code", "program", "python", "project", "development", "coding"],
+
+    # Greetings and introductions
+    "greeting": ["hello", "hi", "hey", "greetings", "introduce"],
+
+    # Analysis tasks
+    "analysis": ["analyze", "examine", "investigate", "review", "assess", "check"]
+})
+
+_TASK_TYPE_PATTERNS = _compile_keywords({
+    "development": ["code", "script", "program", "function", "class", "api"],
+    "file_operations": ["file", "directory", "folder", "document", "text"],
+    "system_administration": ["system", "process", "service", "configuration", "setup"],
+    "data_processing": ["data", "csv", "json", "process", "transform", "parse"],
+    "web_automation": ["web", "browser", "scrape", "crawl", "website"],
+    "research": ["research", "information", "learn", "study", "investigate"]
+})
+
+# Keyword groups of the reasoning provider, each matched with one search
+_COMPLEX_RE = _keyword_re("complex", "multi-step", "several", "multiple")
+_ANALYTICAL_RE = _keyword_re("analyze", "research", "investigate", "examine")
+_MULTI_STEP_RE = _keyword_re(
+    "and then", "after that", "first", "second", "finally", "step by step",
+    "multiple", "several", "complex", "comprehensive", "complete",
+    "workflow", "process", "pipeline", "sequence"
+)
+_HIGH_COMPLEXITY_RE = _keyword_re("multiple", "several", "complex", "advanced")
+_MEDIUM_COMPLEXITY_RE = _keyword_re("analyze", "research", "investigate")
+_FILE_OPERATION_RE = _keyword_re("file", "create", "write", "save")
+_SYSTEM_INTERACTION_RE = _keyword_re("system", "command", "run", "execute")
+_RETRIEVAL_RE = _keyword_re("list", "show", "display", "find")
+_FILE_MANIPULATION_RE = _keyword_re("create", "write", "make", "generate")
+_INFORMATION_RE = _keyword_re("list", "show", "display", "find", "search")
+
+# Files and replies produced by the reasoning provider
+_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_SCRIPT_TEMPLATE = """#!/usr/bin/env python3
+
+def main():
+    print("Hello from Nexus Agent!")
+    print("This script was created autonomously.")
+    
+    # Add your code here
+    pass
+
+if __name__ == "__main__":
+    main()
+"""
+
+_README_TEMPLATE = """# Project Documentation
+
+## Overview
+This document was created by Nexus Agent.
+
+## Description
+Add your project description here.
+
+## Usage
+Add usage instructions here.
+
+## Notes
+- Created autonomously by AI agent
+- Modify as needed for your project
+"""
+
+_NOTE_TEMPLATE = """Note created by Nexus Agent
+
+Request: {request}
+Created: {created}
+
+This file demonstrates autonomous file creation capabilities.
+"""
+
+_DEFAULT_RESPONSE_TEMPLATE = """I'm analyzing your request: "{request}"
+
+As an autonomous AI agent, I can help with:
+• File operations and management
+• System administration tasks  
+• Code development and scripting
+• Information gathering and analysis
+• Workflow automation
+
+Let me start by understanding our current environment:"""
+
+
+@dataclass(slots=True, frozen=True)
+class TaskAnalysis:
+    """Initial analysis of a user request."""
+    problem_statement: str
+    complexity_assessment: str
+    required_capabilities: Tuple[str, ...]
+    context_understanding: Dict[str, Any]
+    available_tools: List[str]
+    approach: str
+
+
+@dataclass(slots=True, frozen=True)
+class TaskPlan:
+    """Approach chosen for a request and the steps it takes."""
+    approach: str
+    tasks: Tuple[str, ...]
+
+
+@dataclass(slots=True, frozen=True)
+class VerifiedPlan:
+    """Task plan checked against the user request."""
+    plan_valid: bool
+    verified_approach: str
+    verified_tasks: Tuple[str, ...]
+    verification_notes: Tuple[str, ...]
+
+
+@dataclass(slots=True, frozen=True)
+class Action:
+    """Action selected to carry out a request."""
+    type: str
+    explanation: str = ""
+    tool: Optional[str] = None
+    target: str = "."
+    details: Optional[Dict[str, Any]] = None
+
+
+# Steps of each approach, every task impacts minimal code and follows simple patterns
+_APPROACH_TASKS = {
+    "information_gathering": ("gather_environment_context", "analyze_user_request", "provide_structured_response"),
+    "file_manipulation": ("determine_file_parameters", "execute_file_operation", "verify_operation_success"),
+    "system_interaction": ("prepare_safe_command", "execute_system_command", "interpret_results"),
+}
+_DEFAULT_TASKS = ("understand_request", "execute_simple_action")
+
+# Plans are immutable, so every request with the same approach shares one
+_TASK_PLANS = {approach: TaskPlan(approach, tasks) for approach, tasks in _APPROACH_TASKS.items()}
+
+# Action taken for each verified approach, following the simplicity principle
+_SIMPLE_ACTIONS = {
+    "information_gathering": Action(
+        "direct_tool_execution", "Simple directory listing to understand context", tool="file_list"
+    ),
+    "file_manipulation": Action(
+        "direct_tool_execution", "Simple file creation with minimal complexity", tool="file_write"
+    ),
+    "system_interaction": Action(
+        "direct_tool_execution", "Simple system command execution", tool="shell_exec"
+    ),
+}
+_ADAPTIVE_ACTION = Action("adaptive_response", "Simple adaptive response for general queries")
+_FAILED_PLAN_ACTION = Action("default_response", "Plan verification failed")
+
+# Tools needed for each user intent
+_INTENT_TOOLS = {
+    "datetime_query": ("shell_exec",),
+    "system_query": ("shell_exec",),
+    "exploration": ("file_list", "shell_pwd"),
+    "file_manipulation": ("file_write", "file_read", "file_list"),
+    "development": ("file_write", "file_read", "shell_exec"),
+    "greeting": ("shell_pwd",),  # Check environment first
+    "information_gathering": ("file_list", "shell_exec"),
+    "system_interaction": ("shell_exec", "shell_pwd"),
+    "analysis": ("file_list", "file_read", "shell_exec"),
+}
+_DEFAULT_TOOLS = ("file_list", "shell_pwd")
+
+# Tools that change the environment, planned after checking the working directory
+_MODIFYING_TOOLS = frozenset({"file_write", "file_delete", "shell_exec"})
+
+# Contingency action for each identified risk
+_RISK_CONTINGENCIES = {
+    "data_loss_risk": "create_backup_before_operation",
+    "system_modification_risk": "validate_permissions_first",
+    "cascading_failure_risk": "implement_rollback_capability",
+}
+
+# Responses of the reasoning provider make a single tool call
+_CALL_ID = "call_1"
+
+# Tool calls of the fixed responses; the agent loop only reads tool calls and
+# tools receive their input unpacked, so responses can share these lists
+_PWD_TOOL_CALLS = [{"id": _CALL_ID, "name": "shell_pwd", "input": {}}]
+_LIST_CWD_TOOL_CALLS = [{"id": _CALL_ID, "name": "file_list", "input": {"directory": "."}}]
+
+# Shell commands in priority order with the keywords requesting them, the
+# first command whose keywords match wins
+_SHELL_COMMANDS = tuple(
+    (
+        _keyword_re(*keywords),
+        explanation,
+        [{"id": _CALL_ID, "name": "shell_exec", "input": {"command": command}}]
+    )
+    for keywords, command, explanation in (
+        (
+            ("date", "time", "today", "current date", "what day", "when is", "now"),
+            "date",
+            "I'll check the current date and time for you."
+        ),
+        (
+            ("system", "info", "computer", "uname", "os", "operating system", "machine"),
+            "uname -a && echo '---' && sw_vers 2>/dev/null || lsb_release -a 2>/dev/null || cat /etc/os-release 2>/dev/null",
+            "I'll get comprehensive system information for you."
+        ),
+        (
+            ("process", "running", "ps"),
+            "ps aux | head -10",
+            "I'll show you the running processes."
+        ),
+        (
+            ("memory", "ram", "usage"),
+            "free -h 2>/dev/null || vm_stat | head -10",
+            "I'll check memory usage for you."
+        ),
+        (
+            ("disk", "space", "storage"),
+            "df -h .",
+            "I'll check disk space for you."
+        ),
+    )
+)
+_DEFAULT_SHELL_EXPLANATION = "I'll show you the current directory and its contents."
+_DEFAULT_SHELL_TOOL_CALLS = [{"id": _CALL_ID, "name": "shell_exec", "input": {"command": "pwd && ls -la"}}]
 
 
 class ManusReasoningProvider(LLMProvider):
@@ -503,11 +1642,36 @@ class ManusReasoningProvider(LLMProvider):
     - Reflects on results and adapts strategy
     """
     
+    # Handler of each action type, called with the provider, the action and
+    # the user message; other types get the default response
+    _ACTION_HANDLERS = {
+        "environment_check": lambda self, action, message: self._execute_environment_check(),
+        "information_gathering": lambda self, action, message: self._execute_information_gathering(action),
+        "direct_tool_execution": lambda self, action, message: self._execute_direct_tool(action, message),
+        "adaptive_response": lambda self, action, message: self._execute_adaptive_response(action, message),
+    }
+    
+    # Method inferring the call of a directly executed tool from the user message
+    _TOOL_HANDLERS = {
+        "file_write": "_execute_file_creation",
+        "shell_exec": "_execute_shell_command",
+        "file_read": "_execute_file_reading",
+        "file_list": "_execute_file_listing",
+        "shell_pwd": "_execute_pwd_command",
+    }
+    
     def __init__(self, config: LLMConfig):
         super().__init__(config)
         self.conversation_count = 0
-        self.task_history = []
+        self.task_history: deque = deque(maxlen=REASONING_TASK_HISTORY_SIZE)
         self.working_memory = {}
+        
+        # Complexity, capabilities and approach by user message, repeated
+        # requests skip the keyword scans
+        self._analysis_cache: "OrderedDict[str, Tuple[str, Tuple[str, ...], str]]" = OrderedDict()
+        
+        # Planned action and reuse count by normalized request
+        self._plan_cache: Dict[str, List[Any]] = {}
     
     async def generate_response(
         self, 
@@ -526,19 +1690,27 @@ class ManusReasoningProvider(LLMProvider):
         
         # Extract current context
         user_message = self._extract_user_message(messages)
-        conversation_context = self._analyze_conversation_context(messages)
-        
-        # Step 1: Initial Analysis and Planning - Think through the problem
-        analysis = self._initial_analysis_and_planning(user_message, conversation_context, tools)
         
-        # Step 2: Task Structure Planning - Create todo items that can be checked off
-        task_plan = self._create_task_structure(analysis)
-        
-        # Step 3: Plan Verification - Check if plan makes sense (simplified internal verification)
-        verified_plan = self._verify_plan(task_plan, user_message)
+        # Steps 1 to 3 only depend on the request, a repeated request reuses
+        # the action planned for it before
+        action = self._cached_action(user_message)
+        if action is None:
+            conversation_context = self._analyze_conversation_context(messages)
+            
+            # Step 1: Initial Analysis and Planning - Think through the problem
+            analysis = self._initial_analysis_and_planning(user_message, conversation_context, tools)
+            
+            # Step 2: Task Structure Planning - Create todo items that can be checked off
+            task_plan = self._create_task_structure(analysis)
+            
+            # Step 3: Plan Verification - Check if plan makes sense (simplified internal verification)
+            verified_plan = self._verify_plan(task_plan, user_message)
+            
+            action = self._select_simple_action(verified_plan)
+            if verified_plan.plan_valid:
+                self._cache_action(user_message, action)
         
         # Step 4: Task Execution - Execute with simplicity principle
-        action = self._select_simple_action(verified_plan)
         result = await self._execute_action_simply(action, user_message)
         
         # Step 5: Process Documentation - Log actions (simplified)
@@ -549,6 +1721,37 @@ class ManusReasoningProvider(LLMProvider):
         
         return reviewed_result
     
+    @staticmethod
+    def _plan_key(user_message: str) -> str:
+        """
+        Cache key of a request.
+        
+        Approaches are chosen by single lowercase keywords, so requests that
+        differ only in case or whitespace get the same action.
+        """
+        return " ".join(user_message.lower().split())
+    
+    def _cached_action(self, user_message: str) -> Optional[Action]:
+        """Get the action planned for an equivalent earlier request."""
+        if not self.config.enable_plan_caching:
+            return None
+        
+        entry = self._plan_cache.get(self._plan_key(user_message))
+        if entry is None:
+            return None
+        entry[1] += 1
+        return entry[0]
+    
+    def _cache_action(self, user_message: str, action: Action) -> None:
+        """Remember the action planned for a request, evicting the least reused one when full."""
+        if not self.config.enable_plan_caching:
+            return
+        
+        if len(self._plan_cache) >= REASONING_PLAN_CACHE_SIZE:
+            least_used = min(self._plan_cache, key=lambda key: self._plan_cache[key][1])
+            del self._plan_cache[least_used]
+        self._plan_cache[self._plan_key(user_message)] = [action, 0]
+    
     def _extract_user_message(self, messages: List[Dict[str, str]]) -> str:
         """Extract the latest user message from conversation."""
         for msg in reversed(messages):
@@ -569,9 +1772,9 @@ class ManusReasoningProvider(LLMProvider):
         recent_messages = messages[-3:] if len(messages) > 3 else messages
         for msg in recent_messages:
             content = msg.get("content", "").lower()
-            if any(word in content for word in ["complex", "multi-step", "several", "multiple"]):
+            if _COMPLEX_RE.search(content):
                 context["task_complexity"] = "complex"
-            elif any(word in content for word in ["analyze", "research", "investigate", "examine"]):
+            elif _ANALYTICAL_RE.search(content):
                 context["task_complexity"] = "analytical"
         
         return context
@@ -579,6 +1782,7 @@ class ManusReasoningProvider(LLMProvider):
     def _observe_context(self, user_message: str, context: Dict[str, Any], tools: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
         """ReAct Observation: Analyze current situation and available resources."""
         observation = {
+            "user_message": user_message,
             "user_intent": self._classify_user_intent(user_message),
             "task_type": self._classify_task_type(user_message),
             "complexity_level": context.get("task_complexity", "simple"),
@@ -596,41 +1800,10 @@ class ManusReasoningProvider(LLMProvider):
         """Classify the user's intent from their message."""
         message_lower = message.lower()
         
-        # Enhanced intent classification with priority order and better patterns
-        intent_patterns = {
-            # Date/time requests (highest priority)
-            "datetime_query": ["date", "time", "today", "current date", "what day", "when is", "now"],
-            
-            # System information requests  
-            "system_query": ["system", "info", "computer", "uname", "os", "operating system", "machine"],
-            
-            # File listing and exploration
-            "exploration": ["list", "show", "display", "see", "view", "find", "search", "ls", "dir", "files", "directories"],
-            
-            # File creation and manipulation
-            "file_manipulation": ["create", "write", "make", "build", "generate", "save", "edit", "modify"],
-            
-            # Information gathering
-            "information_gathering": ["what", "how", "why", "where", "tell me", "explain", "describe", "help"],
-            
-            # System interaction  
-            "system_interaction": ["run", "execute", "command", "shell", "terminal", "bash"],
-            
-            # Development tasks
-            "development": ["script", "code", "program", "python", "project", "development", "coding"],
-            
-            # Greetings and introductions
-            "greeting": ["hello", "hi", "hey", "greetings", "introduce"],
-            
-            # Analysis tasks
-            "analysis": ["analyze", "examine", "investigate", "review", "assess", "check"]
-        }
-        
         # Check patterns in priority order
-        for intent, keywords in intent_patterns.items():
-            for keyword in keywords:
-                if keyword in message_lower:
-                    return intent
+        for intent, pattern in _INTENT_PATTERNS:
+            if pattern.search(message_lower):
+                return intent
         
         return "general_assistance"
     
@@ -638,31 +1811,15 @@ class ManusReasoningProvider(LLMProvider):
         """Classify the type of task being requested."""
         message_lower = message.lower()
         
-        task_patterns = {
-            "development": ["code", "script", "program", "function", "class", "api"],
-            "file_operations": ["file", "directory", "folder", "document", "text"],
-            "system_administration": ["system", "process", "service", "configuration", "setup"],
-            "data_processing": ["data", "csv", "json", "process", "transform", "parse"],
-            "web_automation": ["web", "browser", "scrape", "crawl", "website"],
-            "research": ["research", "information", "learn", "study", "investigate"]
-        }
-        
-        for task_type, keywords in task_patterns.items():
-            if any(keyword in message_lower for keyword in keywords):
+        for task_type, pattern in _TASK_TYPE_PATTERNS:
+            if pattern.search(message_lower):
                 return task_type
         
         return "general"
     
     def _requires_multi_step_execution(self, message: str) -> bool:
         """Determine if task requires multiple steps."""
-        multi_step_indicators = [
-            "and then", "after that", "first", "second", "finally", "step by step",
-            "multiple", "several", "complex", "comprehensive", "complete",
-            "workflow", "process", "pipeline", "sequence"
-        ]
-        
-        message_lower = message.lower()
-        return any(indicator in message_lower for indicator in multi_step_indicators)
+        return _MULTI_STEP_RE.search(message.lower()) is not None
     
     def _reason_about_task(self, observation: Dict[str, Any]) -> Dict[str, Any]:
         """ReAct Reasoning: Think through the task and approach."""
@@ -712,7 +1869,7 @@ class ManusReasoningProvider(LLMProvider):
             risks.append("system_modification_risk")
         if observation["requires_multi_step"]:
             risks.append("cascading_failure_risk")
-        if "delete" in str(observation).lower():
+        if "delete" in observation["user_message"].lower():
             risks.append("data_loss_risk")
         
         return risks
@@ -766,39 +1923,27 @@ class ManusReasoningProvider(LLMProvider):
         """Plan the sequence of tools to use."""
         tools_needed = requirements.get("tools_needed", [])
         
-        # Intelligent tool ordering
-        ordered_tools = []
+        # Intelligent tool ordering, a dict keeps the first position of each tool
+        ordered_tools = {}
         
         # Always start with environmental awareness if needed
-        if any(tool in tools_needed for tool in ["file_write", "file_delete", "shell_exec"]):
-            ordered_tools.append("shell_pwd")
+        if not _MODIFYING_TOOLS.isdisjoint(tools_needed):
+            ordered_tools["shell_pwd"] = None
         
         # Add primary tools in logical order
-        for tool in tools_needed:
-            if tool not in ordered_tools:
-                ordered_tools.append(tool)
+        ordered_tools.update(dict.fromkeys(tools_needed))
         
-        return ordered_tools
+        return list(ordered_tools)
     
     def _plan_contingencies(self, risks: List[str]) -> Dict[str, str]:
         """Plan contingency actions for identified risks."""
-        contingencies = {}
-        
-        for risk in risks:
-            if risk == "data_loss_risk":
-                contingencies[risk] = "create_backup_before_operation"
-            elif risk == "system_modification_risk":
-                contingencies[risk] = "validate_permissions_first"
-            elif risk == "cascading_failure_risk":
-                contingencies[risk] = "implement_rollback_capability"
-        
-        return contingencies
+        return {risk: _RISK_CONTINGENCIES[risk] for risk in risks if risk in _RISK_CONTINGENCIES}
     
-    def _select_action(self, plan: Dict[str, Any]) -> Dict[str, Any]:
+    def _select_action(self, plan: Dict[str, Any]) -> Action:
         """Select the immediate action to take based on plan."""
         steps = plan.get("steps", [])
         if not steps:
-            return {"type": "default_response", "details": {}}
+            return Action("default_response", details={})
         
         first_step = steps[0]
         step_type = first_step.get("step", "")
@@ -806,47 +1951,19 @@ class ManusReasoningProvider(LLMProvider):
         
         # Map step types to specific actions
         if step_type == "prepare_environment":
-            return {
-                "type": "environment_check",
-                "tool": "shell_pwd",
-                "follow_up": "file_list"
-            }
+            return Action("environment_check", tool="shell_pwd")
         elif step_type == "gather_information":
-            return {
-                "type": "information_gathering",
-                "tool": "file_list",
-                "target": "."
-            }
+            return Action("information_gathering", tool="file_list", target=".")
         elif step_type == "execute_primary_action":
             if tools:
-                return {
-                    "type": "direct_tool_execution",
-                    "tool": tools[0],
-                    "context": "primary_task"
-                }
+                return Action("direct_tool_execution", tool=tools[0])
         
-        return {"type": "adaptive_response", "details": plan}
+        return Action("adaptive_response", details=plan)
     
     def _identify_required_tools(self, observation: Dict[str, Any]) -> List[str]:
         """Identify which tools are needed for this task."""
-        intent = observation["user_intent"]
-        task_type = observation["task_type"]
-        
-        # Enhanced tool mapping with specific intent handling
-        tool_mapping = {
-            # Specific intent mappings
-            "datetime_query": ["shell_exec"],
-            "system_query": ["shell_exec"],
-            "exploration": ["file_list", "shell_pwd"],
-            "file_manipulation": ["file_write", "file_read", "file_list"],
-            "development": ["file_write", "file_read", "shell_exec"],
-            "greeting": ["shell_pwd"],  # Check environment first
-            "information_gathering": ["file_list", "shell_exec"],
-            "system_interaction": ["shell_exec", "shell_pwd"],
-            "analysis": ["file_list", "file_read", "shell_exec"]
-        }
-        
-        return tool_mapping.get(intent, ["file_list", "shell_pwd"])
+        # Callers may extend the list, so hand out a copy of the shared tuple
+        return list(_INTENT_TOOLS.get(observation["user_intent"], _DEFAULT_TOOLS))
     
     def _identify_dependencies(self, observation: Dict[str, Any]) -> List[str]:
         """Identify task dependencies."""
@@ -868,9 +1985,9 @@ class ManusReasoningProvider(LLMProvider):
         
         return constraints
     
-    async def _execute_action(self, action: Dict[str, Any], user_message: str) -> Dict[str, Any]:
+    async def _execute_action(self, action: Action, user_message: str) -> Dict[str, Any]:
         """Execute the planned action and return response."""
-        action_type = action.get("type", "default_response")
+        action_type = action.type
         
         # Store task context in working memory
         self.working_memory["last_task"] = {
@@ -879,64 +1996,42 @@ class ManusReasoningProvider(LLMProvider):
             "timestamp": time.time()
         }
         
-        if action_type == "environment_check":
-            return await self._execute_environment_check()
-        elif action_type == "information_gathering":
-            return await self._execute_information_gathering(action)
-        elif action_type == "direct_tool_execution":
-            return await self._execute_direct_tool(action, user_message)
-        elif action_type == "adaptive_response":
-            return await self._execute_adaptive_response(action, user_message)
-        else:
+        handler = self._ACTION_HANDLERS.get(action_type)
+        if handler is None:
             return await self._execute_default_response(user_message)
+        return await handler(self, action, user_message)
     
     async def _execute_environment_check(self) -> Dict[str, Any]:
         """Execute environment check action."""
         return {
             "text_content": "Let me check our current environment and working directory to understand the context better.",
-            "tool_calls": [
-                {
-                    "id": "call_1",
-                    "name": "shell_pwd",
-                    "input": {}
-                }
-            ],
+            "tool_calls": _PWD_TOOL_CALLS,
             "is_complete": False
         }
     
-    async def _execute_information_gathering(self, action: Dict[str, Any]) -> Dict[str, Any]:
+    async def _execute_information_gathering(self, action: Action) -> Dict[str, Any]:
         """Execute information gathering action."""
-        target = action.get("target", ".")
+        target = action.target
+        if target == ".":
+            tool_calls = _LIST_CWD_TOOL_CALLS
+        else:
+            tool_calls = [{"id": _CALL_ID, "name": "file_list", "input": {"directory": target}}]
         
         return {
             "text_content": "I'll gather information about the current environment to better understand your request.",
-            "tool_calls": [
-                {
-                    "id": "call_1",
-                    "name": "file_list",
-                    "input": {"directory": target}
-                }
-            ],
+            "tool_calls": tool_calls,
             "is_complete": False
         }
     
-    async def _execute_direct_tool(self, action: Dict[str, Any], user_message: str) -> Dict[str, Any]:
+    async def _execute_direct_tool(self, action: Action, user_message: str) -> Dict[str, Any]:
         """Execute direct tool action based on user intent."""
-        tool = action.get("tool", "file_list")
+        tool = action.tool or "file_list"
         
         # Intelligent tool parameter inference based on context
-        if tool == "file_write":
-            return await self._execute_file_creation(user_message)
-        elif tool == "shell_exec":
-            return await self._execute_shell_command(user_message)
-        elif tool == "file_read":
-            return await self._execute_file_reading(user_message)
-        elif tool == "file_list":
-            return await self._execute_file_listing(user_message)
-        elif tool == "shell_pwd":
-            return await self._execute_pwd_command(user_message)
-        else:
+        handler = self._TOOL_HANDLERS.get(tool)
+        if handler is None:
             return await self._execute_default_tool(tool)
+        return await getattr(self, handler)(user_message)
     
     async def _execute_file_creation(self, user_message: str) -> Dict[str, Any]:
         """Execute intelligent file creation based on user request."""
@@ -944,53 +2039,22 @@ class ManusReasoningProvider(LLMProvider):
         
         if "python" in message_lower or "script" in message_lower:
             filename = "script.py"
-            content = """#!/usr/bin/env python3
-
-def main():
-    print("Hello from Nexus Agent!")
-    print("This script was created autonomously.")
-    
-    # Add your code here
-    pass
-
-if __name__ == "__main__":
-    main()
-"""
+            content = _SCRIPT_TEMPLATE
             explanation = "I'll create a Python script template for you with a proper structure."
         elif "readme" in message_lower or "documentation" in message_lower:
             filename = "README.md"
-            content = """# Project Documentation
-
-## Overview
-This document was created by Nexus Agent.
-
-## Description
-Add your project description here.
-
-## Usage
-Add usage instructions here.
-
-## Notes
-- Created autonomously by AI agent
-- Modify as needed for your project
-"""
+            content = _README_TEMPLATE
             explanation = "I'll create a README.md file with a basic documentation template."
         else:
             filename = "note.txt"
-            content = f"""Note created by Nexus Agent
-
-Request: {user_message}
-Created: {time.strftime('%Y-%m-%d %H:%M:%S')}
-
-This file demonstrates autonomous file creation capabilities.
-"""
+            content = _NOTE_TEMPLATE.format(request=user_message, created=time.strftime(_TIMESTAMP_FORMAT))
             explanation = "I'll create a text file documenting your request."
         
         return {
             "text_content": explanation,
             "tool_calls": [
                 {
-                    "id": "call_1",
+                    "id": _CALL_ID,
                     "name": "file_write",
                     "input": {
                         "path": filename,
@@ -1006,34 +2070,16 @@ This file demonstrates autonomous file creation capabilities.
         message_lower = user_message.lower()
         
         # Enhanced command mapping with better pattern matching
-        if any(word in message_lower for word in ["date", "time", "today", "current date", "what day", "when is", "now"]):
-            command = "date"
-            explanation = "I'll check the current date and time for you."
-        elif any(word in message_lower for word in ["system", "info", "computer", "uname", "os", "operating system", "machine"]):
-            command = "uname -a && echo '---' && sw_vers 2>/dev/null || lsb_release -a 2>/dev/null || cat /etc/os-release 2>/dev/null"
-            explanation = "I'll get comprehensive system information for you."
-        elif any(word in message_lower for word in ["process", "running", "ps"]):
-            command = "ps aux | head -10"
-            explanation = "I'll show you the running processes."
-        elif any(word in message_lower for word in ["memory", "ram", "usage"]):
-            command = "free -h 2>/dev/null || vm_stat | head -10"
-            explanation = "I'll check memory usage for you."
-        elif any(word in message_lower for word in ["disk", "space", "storage"]):
-            command = "df -h ."
-            explanation = "I'll check disk space for you."
+        for pattern, explanation, tool_calls in _SHELL_COMMANDS:
+            if pattern.search(message_lower):
+                break
         else:
-            command = "pwd && ls -la"
-            explanation = "I'll show you the current directory and its contents."
+            explanation = _DEFAULT_SHELL_EXPLANATION
+            tool_calls = _DEFAULT_SHELL_TOOL_CALLS
         
         return {
             "text_content": explanation,
-            "tool_calls": [
-                {
-                    "id": "call_1",
-                    "name": "shell_exec",
-                    "input": {"command": command}
-                }
-            ],
+            "tool_calls": tool_calls,
             "is_complete": False
         }
     
@@ -1054,9 +2100,9 @@ This file demonstrates autonomous file creation capabilities.
         
         return {
             "text_content": explanation,
-            "tool_calls": [
+            "tool_calls": _LIST_CWD_TOOL_CALLS if target == "." else [
                 {
-                    "id": "call_1",
+                    "id": _CALL_ID,
                     "name": "file_list",
                     "input": {"directory": target}
                 }
@@ -1068,13 +2114,7 @@ This file demonstrates autonomous file creation capabilities.
         """Execute pwd command for directory context."""
         return {
             "text_content": "Let me check our current working directory.",
-            "tool_calls": [
-                {
-                    "id": "call_1",
-                    "name": "shell_pwd",
-                    "input": {}
-                }
-            ],
+            "tool_calls": _PWD_TOOL_CALLS,
             "is_complete": False
         }
     
@@ -1093,13 +2133,7 @@ This file demonstrates autonomous file creation capabilities.
             explanation = "I'll list the available files so you can choose which one to read."
             return {
                 "text_content": explanation,
-                "tool_calls": [
-                    {
-                        "id": "call_1",
-                        "name": "file_list",
-                        "input": {"directory": "."}
-                    }
-                ],
+                "tool_calls": _LIST_CWD_TOOL_CALLS,
                 "is_complete": False
             }
         
@@ -1107,7 +2141,7 @@ This file demonstrates autonomous file creation capabilities.
             "text_content": explanation,
             "tool_calls": [
                 {
-                    "id": "call_1",
+                    "id": _CALL_ID,
                     "name": "file_read",
                     "input": {"path": filepath}
                 }
@@ -1121,7 +2155,7 @@ This file demonstrates autonomous file creation capabilities.
             "text_content": f"I'll use the {tool} tool to help with your request.",
             "tool_calls": [
                 {
-                    "id": "call_1",
+                    "id": _CALL_ID,
                     "name": tool,
                     "input": {}
                 }
@@ -1129,9 +2163,9 @@ This file demonstrates autonomous file creation capabilities.
             "is_complete": False
         }
     
-    async def _execute_adaptive_response(self, action: Dict[str, Any], user_message: str) -> Dict[str, Any]:
+    async def _execute_adaptive_response(self, action: Action, user_message: str) -> Dict[str, Any]:
         """Execute adaptive response based on complex reasoning."""
-        plan_details = action.get("details", {})
+        plan_details = action.details or {}
         strategy = plan_details.get("strategy", "direct_execution")
         
         if strategy == "decompose_and_execute_incrementally":
@@ -1139,13 +2173,7 @@ This file demonstrates autonomous file creation capabilities.
                 "text_content": f"""I understand you have a complex request: "{user_message}"
 
 Let me break this down into manageable steps. I'll start by analyzing the current environment and then proceed systematically.""",
-                "tool_calls": [
-                    {
-                        "id": "call_1",
-                        "name": "shell_pwd",
-                        "input": {}
-                    }
-                ],
+                "tool_calls": _PWD_TOOL_CALLS,
                 "is_complete": False
             }
         else:
@@ -1154,142 +2182,83 @@ Let me break this down into manageable steps. I'll start by analyzing the curren
     async def _execute_default_response(self, user_message: str) -> Dict[str, Any]:
         """Execute default response when specific patterns don't match."""
         return {
-            "text_content": f"""I'm analyzing your request: "{user_message}"
-
-As an autonomous AI agent, I can help with:
-• File operations and management
-• System administration tasks  
-• Code development and scripting
-• Information gathering and analysis
-• Workflow automation
-
-Let me start by understanding our current environment:""",
-            "tool_calls": [
-                {
-                    "id": "call_1",
-                    "name": "file_list",
-                    "input": {"directory": "."}
-                }
-            ],
+            "text_content": _DEFAULT_RESPONSE_TEMPLATE.format(request=user_message),
+            "tool_calls": _LIST_CWD_TOOL_CALLS,
             "is_complete": False
         }
     
-    def _initial_analysis_and_planning(self, user_message: str, context: Dict[str, Any], tools: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    def _initial_analysis_and_planning(self, user_message: str, context: Dict[str, Any], tools: Optional[List[Dict[str, Any]]]) -> TaskAnalysis:
         """
         Step 1: Initial Analysis and Planning
         Think through the problem, read context for relevant information
         """
-        analysis = {
-            "problem_statement": user_message,
-            "complexity_assessment": self._assess_complexity(user_message),
-            "required_capabilities": self._identify_required_capabilities(user_message),
-            "context_understanding": context,
-            "available_tools": [tool.get("name", "") for tool in (tools or [])],
-            "approach": self._determine_approach(user_message)
-        }
-        return analysis
+        signature = self._analysis_cache.get(user_message)
+        if signature is None:
+            signature = self._analyze_message(user_message)
+            self._analysis_cache[user_message] = signature
+            if len(self._analysis_cache) > REASONING_ANALYSIS_CACHE_SIZE:
+                self._analysis_cache.popitem(last=False)
+        else:
+            self._analysis_cache.move_to_end(user_message)
+        
+        complexity, capabilities, approach = signature
+        return TaskAnalysis(
+            problem_statement=user_message,
+            complexity_assessment=complexity,
+            required_capabilities=capabilities,
+            context_understanding=context,
+            available_tools=[tool.get("name", "") for tool in (tools or [])],
+            approach=approach
+        )
     
-    def _create_task_structure(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
+    def _create_task_structure(self, analysis: TaskAnalysis) -> TaskPlan:
         """
         Step 2: Task Structure Planning
         Create todo items that can be checked off as completed
         """
-        approach = analysis.get("approach", "simple_execution")
-        
-        if approach == "information_gathering":
-            tasks = [
-                {"task": "gather_environment_context", "completed": False},
-                {"task": "analyze_user_request", "completed": False}, 
-                {"task": "provide_structured_response", "completed": False}
-            ]
-        elif approach == "file_manipulation":
-            tasks = [
-                {"task": "determine_file_parameters", "completed": False},
-                {"task": "execute_file_operation", "completed": False},
-                {"task": "verify_operation_success", "completed": False}
-            ]
-        elif approach == "system_interaction":
-            tasks = [
-                {"task": "prepare_safe_command", "completed": False},
-                {"task": "execute_system_command", "completed": False},
-                {"task": "interpret_results", "completed": False}
-            ]
-        else:
-            tasks = [
-                {"task": "understand_request", "completed": False},
-                {"task": "execute_simple_action", "completed": False}
-            ]
-        
-        return {
-            "approach": approach,
-            "tasks": tasks,
-            "simplicity_principle": "Each task impacts minimal code and follows simple patterns"
-        }
+        plan = _TASK_PLANS.get(analysis.approach)
+        if plan is None:
+            plan = TaskPlan(approach=analysis.approach, tasks=_DEFAULT_TASKS)
+        return plan
     
-    def _verify_plan(self, task_plan: Dict[str, Any], user_message: str) -> Dict[str, Any]:
+    def _verify_plan(self, task_plan: TaskPlan, user_message: str) -> VerifiedPlan:
         """
         Step 3: Plan Verification
         Check if plan makes sense before execution (simplified internal verification)
         """
-        approach = task_plan.get("approach", "simple_execution")
-        tasks = task_plan.get("tasks", [])
+        message_lower = user_message.lower()
         
         # Simple verification logic
         plan_valid = True
         verification_notes = []
         
-        if len(tasks) == 0:
+        if not task_plan.tasks:
             plan_valid = False
             verification_notes.append("No tasks defined")
         
-        if approach == "file_manipulation" and "create" not in user_message.lower() and "write" not in user_message.lower():
-            if not any("list" in user_message.lower() or "show" in user_message.lower()):
+        if task_plan.approach == "file_manipulation" and "create" not in message_lower and "write" not in message_lower:
+            if "list" not in message_lower and "show" not in message_lower:
                 verification_notes.append("File manipulation approach may not match user intent")
         
-        return {
-            "plan_valid": plan_valid,
-            "verified_approach": approach,
-            "verified_tasks": tasks,
-            "verification_notes": verification_notes,
-            "ready_for_execution": plan_valid
-        }
+        return VerifiedPlan(
+            plan_valid=plan_valid,
+            verified_approach=task_plan.approach,
+            verified_tasks=task_plan.tasks,
+            verification_notes=tuple(verification_notes)
+        )
     
-    def _select_simple_action(self, verified_plan: Dict[str, Any]) -> Dict[str, Any]:
+    def _select_simple_action(self, verified_plan: VerifiedPlan) -> Action:
         """
         Step 4: Task Execution - Select action following simplicity principle
         Make every change as simple as possible, impacting minimal code
         """
-        if not verified_plan.get("ready_for_execution", False):
-            return {"type": "default_response", "explanation": "Plan verification failed"}
-        
-        approach = verified_plan.get("verified_approach", "simple_execution")
+        if not verified_plan.plan_valid:
+            return _FAILED_PLAN_ACTION
         
         # Follow simplicity principle - minimal, focused actions
-        if approach == "information_gathering":
-            return {
-                "type": "direct_tool_execution",
-                "tool": "file_list",
-                "explanation": "Simple directory listing to understand context"
-            }
-        elif approach == "file_manipulation":
-            return {
-                "type": "direct_tool_execution", 
-                "tool": "file_write",
-                "explanation": "Simple file creation with minimal complexity"
-            }
-        elif approach == "system_interaction":
-            return {
-                "type": "direct_tool_execution",
-                "tool": "shell_exec", 
-                "explanation": "Simple system command execution"
-            }
-        else:
-            return {
-                "type": "adaptive_response",
-                "explanation": "Simple adaptive response for general queries"
-            }
+        return _SIMPLE_ACTIONS.get(verified_plan.verified_approach, _ADAPTIVE_ACTION)
     
-    async def _execute_action_simply(self, action: Dict[str, Any], user_message: str) -> Dict[str, Any]:
+    async def _execute_action_simply(self, action: Action, user_message: str) -> Dict[str, Any]:
         """
         Step 4 continued: Execute action with simplicity focus
         """
@@ -1302,7 +2271,7 @@ Let me start by understanding our current environment:""",
         
         return result
     
-    def _document_process(self, action: Dict[str, Any], result: Dict[str, Any]) -> None:
+    def _document_process(self, action: Action, result: Dict[str, Any]) -> None:
         """
         Step 5: Process Documentation 
         Write log of actions (simplified for autonomous operation)
@@ -1310,30 +2279,29 @@ Let me start by understanding our current environment:""",
         # Store in working memory for context
         process_log = {
             "timestamp": time.time(),
-            "action_type": action.get("type", "unknown"),
-            "tool_used": action.get("tool", "none"),
-            "explanation": action.get("explanation", ""),
+            "action_type": action.type,
+            "tool_used": action.tool or "none",
+            "explanation": action.explanation,
             "success": result.get("tool_calls") is not None or result.get("text_content") is not None
         }
         
-        # Keep last 5 actions for context
-        if "process_history" not in self.working_memory:
-            self.working_memory["process_history"] = []
-        
-        self.working_memory["process_history"].append(process_log)
-        if len(self.working_memory["process_history"]) > 5:
-            self.working_memory["process_history"].pop(0)
+        # Keep the last few actions for context, older ones drop off the deque
+        process_history = self.working_memory.get("process_history")
+        if process_history is None:
+            process_history = deque(maxlen=REASONING_PROCESS_HISTORY_SIZE)
+            self.working_memory["process_history"] = process_history
+        process_history.append(process_log)
     
-    def _add_review_summary(self, result: Dict[str, Any], action: Dict[str, Any]) -> Dict[str, Any]:
+    def _add_review_summary(self, result: Dict[str, Any], action: Action) -> Dict[str, Any]:
         """
         Step 6: Review Process
         Add review section with summary of changes and relevant information
         """
         review_summary = {
-            "action_taken": action.get("explanation", "Executed user request"),
-            "approach_used": action.get("type", "standard"),
+            "action_taken": action.explanation or "Executed user request",
+            "approach_used": action.type,
             "simplicity_applied": True,
-            "tools_utilized": [action.get("tool")] if action.get("tool") else [],
+            "tools_utilized": [action.tool] if action.tool else [],
             "complexity_level": "minimal",
             "ready_for_next_task": True
         }
@@ -1343,61 +2311,86 @@ Let me start by understanding our current environment:""",
         
         return result
     
-    def _assess_complexity(self, user_message: str) -> str:
-        """Assess task complexity for planning."""
+    def _analyze_message(self, user_message: str) -> Tuple[str, Tuple[str, ...], str]:
+        """Assess complexity, required capabilities and approach in one pass."""
         message_lower = user_message.lower()
+        system_interaction = _SYSTEM_INTERACTION_RE.search(message_lower) is not None
         
-        if any(word in message_lower for word in ["multiple", "several", "complex", "advanced"]):
-            return "high"
-        elif any(word in message_lower for word in ["analyze", "research", "investigate"]):
-            return "medium"
+        if _HIGH_COMPLEXITY_RE.search(message_lower):
+            complexity = "high"
+        elif _MEDIUM_COMPLEXITY_RE.search(message_lower):
+            complexity = "medium"
         else:
-            return "low"
-    
-    def _identify_required_capabilities(self, user_message: str) -> List[str]:
-        """Identify what capabilities are needed."""
-        capabilities = []
-        message_lower = user_message.lower()
+            complexity = "low"
         
-        if any(word in message_lower for word in ["file", "create", "write", "save"]):
+        capabilities = []
+        if _FILE_OPERATION_RE.search(message_lower):
             capabilities.append("file_operations")
-        if any(word in message_lower for word in ["system", "command", "run", "execute"]):
+        if system_interaction:
             capabilities.append("system_interaction")
-        if any(word in message_lower for word in ["list", "show", "display", "find"]):
+        if _RETRIEVAL_RE.search(message_lower):
             capabilities.append("information_retrieval")
         
-        return capabilities
+        if _FILE_MANIPULATION_RE.search(message_lower):
+            approach = "file_manipulation"
+        elif _INFORMATION_RE.search(message_lower):
+            approach = "information_gathering"
+        elif system_interaction:
+            approach = "system_interaction"
+        else:
+            approach = "simple_execution"
+        
+        return complexity, tuple(capabilities), approach
+    
+    def _assess_complexity(self, user_message: str) -> str:
+        """Assess task complexity for planning."""
+        return self._analyze_message(user_message)[0]
+    
+    def _identify_required_capabilities(self, user_message: str) -> List[str]:
+        """Identify what capabilities are needed."""
+        return list(self._analyze_message(user_message)[1])
     
     def _determine_approach(self, user_message: str) -> str:
         """Determine the best approach based on user message."""
-        message_lower = user_message.lower()
-        
-        if any(word in message_lower for word in ["create", "write", "make", "generate"]):
-            return "file_manipulation"
-        elif any(word in message_lower for word in ["list", "show", "display", "find", "search"]):
-            return "information_gathering"
-        elif any(word in message_lower for word in ["run", "execute", "command", "system"]):
-            return "system_interaction"
-        else:
-            return "simple_execution"
+        return self._analyze_message(user_message)[2]
     
     async def cleanup(self) -> None:
         """Clean up resources."""
         self.working_memory.clear()
         self.task_history.clear()
+        self._analysis_cache.clear()
+        self._plan_cache.clear()
 
 
 # Alias for backward compatibility
 MockProvider = ManusReasoningProvider
 
 
-def create_llm_provider(config) -> "LLMProvider":
-    """Factory function to create LLM provider based on config."""
-    if config.provider == "huggingface":
-        return HuggingFaceProvider(config)
-    elif config.provider == "ollama":
-        return OllamaProvider(config)
-    elif config.provider == "mock":
-        return MockProvider(config)
-    else:
+def _create_huggingface_provider(config: LLMConfig, http_session: Optional[Any]) -> "LLMProvider":
+    """Create the local backend suited to a Hugging Face model."""
+    if config.model.endswith(".gguf"):
+        return LlamaCppProvider(config)
+    if _use_mlx(config):
+        return MLXProvider(config)
+    return HuggingFaceProvider(config)
+
+
+# Factory for each provider name, called with the config and the shared HTTP session
+_PROVIDER_FACTORIES: Dict[str, Callable[[LLMConfig, Optional[Any]], "LLMProvider"]] = {
+    "huggingface": _create_huggingface_provider,
+    "ollama": lambda config, http_session: OllamaProvider(config, http_session=http_session),
+    "mock": lambda config, http_session: MockProvider(config),
+}
+
+
+def create_llm_provider(config, http_session: Optional[Any] = None) -> "LLMProvider":
+    """
+    Factory function to create LLM provider based on config.
+    
+    http_session is an optional shared aiohttp session for providers that
+    talk to a model server over HTTP.
+    """
+    factory = _PROVIDER_FACTORIES.get(config.provider)
+    if factory is None:
         raise ValueError(f"Unsupported LLM provider: {config.provider}")
+    return factory(config, http_session)
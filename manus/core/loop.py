@@ -9,7 +9,7 @@ flexibility and capability.
 import asyncio
 import json
 import time
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from pydantic import BaseModel
 
@@ -18,6 +18,7 @@ from ..tools.registry import ToolRegistry
 from ..utils.logger import get_logger
 from .config import Config
 from .exceptions import LLMError, ManusError, SecurityError, TimeoutError, ToolError
+from .llm_cache import HISTORY_KEY_MESSAGES, ResponseCache, build_state_key, hash_history
 from .llm_providers import create_llm_provider, LLMProvider
 from .state import AgentState, TaskStatus, ToolCall
 
@@ -38,15 +39,18 @@ class AgentLoop:
         self, 
         config: Config, 
         tool_registry: ToolRegistry,
-        security_validator: SecurityValidator
+        security_validator: SecurityValidator,
+        http_session: Optional[Any] = None,
+        response_cache: Optional[ResponseCache] = None
     ):
         self.config = config
         self.tool_registry = tool_registry
         self.security_validator = security_validator
+        self.response_cache = response_cache
         self.logger = get_logger(__name__)
         
         # Initialize LLM provider
-        self.llm_provider = create_llm_provider(config.llm)
+        self.llm_provider = create_llm_provider(config.llm, http_session=http_session)
         
         # Performance tracking
         self.iteration_times: List[float] = []
@@ -56,7 +60,8 @@ class AgentLoop:
         self, 
         task_prompt: str, 
         state: AgentState,
-        max_iterations: Optional[int] = None
+        max_iterations: Optional[int] = None,
+        event_queue: Optional[asyncio.Queue] = None
     ) -> Tuple[bool, str]:
         """
         Execute a task using the agent loop.
@@ -65,11 +70,12 @@ class AgentLoop:
             task_prompt: The initial task description
             state: Agent state to maintain context
             max_iterations: Override default max iterations
+            event_queue: Optional queue receiving per-iteration progress events
             
         Returns:
             Tuple of (success, final_result)
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         max_iterations = max_iterations or self.config.agent.max_iterations
         
         try:
@@ -95,7 +101,7 @@ class AgentLoop:
                         break
                     
                     # Check timeout
-                    if time.time() - start_time > self.config.agent.timeout_seconds:
+                    if time.perf_counter() - start_time > self.config.agent.timeout_seconds:
                         raise TimeoutError(
                             f"Task exceeded timeout of {self.config.agent.timeout_seconds}s",
                             operation="task_execution",
@@ -103,17 +109,17 @@ class AgentLoop:
                         )
                     
                     # Execute one iteration with timeout protection
-                    iteration_start = time.time()
+                    iteration_start = time.perf_counter()
                     try:
                         should_continue = await asyncio.wait_for(
-                            self._execute_iteration(state, iteration),
+                            self._execute_iteration(state, iteration, event_queue),
                             timeout=60.0  # 60 second per-iteration timeout
                         )
                     except asyncio.TimeoutError:
                         self.logger.warning(f"Iteration {iteration + 1} timed out")
                         should_continue = False
                     
-                    iteration_time = time.time() - iteration_start
+                    iteration_time = time.perf_counter() - iteration_start
                     
                     self.iteration_times.append(iteration_time)
                     
@@ -122,7 +128,7 @@ class AgentLoop:
                         final_result = self._extract_final_result(state)
                         state.complete_task(final_result)
                         
-                        total_time = time.time() - start_time
+                        total_time = time.perf_counter() - start_time
                         self.logger.info(
                             f"Task completed successfully in {iteration + 1} iterations "
                             f"({total_time:.2f}s total)"
@@ -158,7 +164,12 @@ class AgentLoop:
             state.fail_task(error_msg)
             return False, error_msg
     
-    async def _execute_iteration(self, state: AgentState, iteration: int) -> bool:
+    async def _execute_iteration(
+        self,
+        state: AgentState,
+        iteration: int,
+        event_queue: Optional[asyncio.Queue] = None
+    ) -> bool:
         """
         Execute one iteration of the agent loop.
         
@@ -168,12 +179,20 @@ class AgentLoop:
         # 1. Perceive: Get current context
         context = self._build_context(state)
         
-        # 2. Think: Get LLM response with reasoning
-        llm_response = await self._get_llm_response(context, state)
+        # 2. Think: Get LLM response with reasoning, streaming the text to
+        # listeners as it is generated when the provider supports it
+        def on_text(text: str) -> None:
+            event_queue.put_nowait({"type": "token", "iteration": iteration + 1, "text": text})
+        
+        streaming = event_queue is not None and self.llm_provider.supports_streaming
+        llm_response = await self._get_llm_response(context, state, on_text if streaming else None)
         
         # 3. Act: Execute any tool calls or code
         tool_results = await self._execute_actions(llm_response, state)
         
+        if event_queue is not None:
+            self._emit_iteration_events(event_queue, iteration, llm_response, tool_results)
+        
         # 4. Observe: Process results and update state
         observations = self._process_observations(tool_results, state)
         
@@ -230,17 +249,32 @@ When you need to take action:
 
 Signal task completion by including "TASK_COMPLETE" in your response along with a summary of what was accomplished."""
     
-    async def _get_llm_response(self, context: Dict[str, Any], state: AgentState) -> Dict[str, Any]:
+    async def _get_llm_response(
+        self,
+        context: Dict[str, Any],
+        state: AgentState,
+        on_text: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
         """Get response from LLM with tool calling support."""
         try:
             # Build messages for LLM
             messages = self._format_messages_for_llm(context, state)
             
-            # Get response from LLM provider
-            response = await self.llm_provider.generate_response(
-                messages=messages,
-                tools=context["available_tools"]
-            )
+            # A response cached for the same conversation and tools skips only
+            # the model call, its tool calls still run and are recorded
+            cache_key = None
+            response = None
+            if self.response_cache is not None:
+                cache_key = self._response_cache_key(state, context["available_tools"])
+                response = await self._get_cached_response(cache_key)
+            
+            if response is None:
+                response = await self._generate_response(messages, context["available_tools"], on_text)
+                if cache_key is not None:
+                    await self._cache_response(cache_key, response)
+            elif on_text is not None:
+                # Listeners still receive the text, in one piece
+                on_text(response["text_content"])
             
             # Process response
             return self._process_llm_response(response, state)
@@ -252,6 +286,57 @@ Signal task completion by including "TASK_COMPLETE" in your response along with
                 details={"model": self.config.llm.model}
             )
     
+    async def _generate_response(
+        self,
+        messages: List[Dict[str, str]],
+        tools: List[Dict[str, Any]],
+        on_text: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
+        """Get a response from the LLM provider, streaming its text to on_text if given."""
+        if on_text is None:
+            return await self.llm_provider.generate_response(messages=messages, tools=tools)
+        
+        chunks = []
+        async for chunk in await self.llm_provider.generate_response(
+            messages=messages,
+            tools=tools,
+            stream=True
+        ):
+            chunks.append(chunk)
+            on_text(chunk)
+        return self.llm_provider.response_from_text("".join(chunks))
+    
+    def _response_cache_key(self, state: AgentState, tools: List[Dict[str, Any]]) -> str:
+        """
+        Build the response cache key for the state's latest message.
+        
+        Only the session and the recent conversation are keyed, not the system
+        context, whose timestamps and task IDs differ on every call.
+        """
+        recent = state.messages[-(HISTORY_KEY_MESSAGES + 1):]
+        prompt = recent[-1].content if recent else ""
+        return build_state_key(
+            hash_history(state.session_id, recent[:-1]),
+            prompt,
+            [tool["name"] for tool in tools],
+            "llm_response"
+        )
+    
+    async def _get_cached_response(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Look up a cached LLM response, treating cache failures as misses."""
+        try:
+            return await self.response_cache.get(cache_key)
+        except Exception as e:
+            self.logger.error(f"Failed to read response cache: {e}")
+            return None
+    
+    async def _cache_response(self, cache_key: str, response: Dict[str, Any]) -> None:
+        """Cache an LLM response."""
+        try:
+            await self.response_cache.set(cache_key, response)
+        except Exception as e:
+            self.logger.error(f"Failed to write response cache: {e}")
+    
     def _format_messages_for_llm(self, context: Dict[str, Any], state: AgentState) -> List[Dict[str, str]]:
         """Format conversation history for LLM."""
         messages = []
@@ -296,76 +381,103 @@ Available tools:
         return processed
     
     async def _execute_actions(self, llm_response: Dict[str, Any], state: AgentState) -> List[Dict[str, Any]]:
-        """Execute tool calls from LLM response."""
+        """
+        Execute tool calls from LLM response.
+        
+        Consecutive read-only tool calls run concurrently, any other call runs
+        on its own once the calls before it have finished. Results are
+        recorded in the order the calls were made.
+        """
         results = []
+        batch = []
         
         for tool_call in llm_response["tool_calls"]:
-            try:
-                # Validate tool call security
-                self.security_validator.validate_tool_call(
-                    tool_call["name"], 
-                    tool_call["input"]
-                )
-                
-                # Execute tool
-                start_time = time.time()
-                result = await self.tool_registry.execute_tool(
-                    tool_call["name"],
-                    tool_call["input"]
-                )
-                duration_ms = int((time.time() - start_time) * 1000)
-                
-                # Record successful tool call
-                tool_call_id = state.add_tool_call(
-                    tool_name=tool_call["name"],
-                    arguments=tool_call["input"],
-                    result=str(result),
-                    duration_ms=duration_ms
-                )
-                
-                results.append({
-                    "tool_call_id": tool_call["id"],
-                    "success": True,
-                    "result": result,
-                    "duration_ms": duration_ms
-                })
-                
-                self.logger.debug(f"Tool {tool_call['name']} executed successfully")
-                
-            except SecurityError as e:
-                error_msg = f"Security violation in tool {tool_call['name']}: {e}"
-                self.logger.error(error_msg)
-                
-                state.add_tool_call(
-                    tool_name=tool_call["name"],
-                    arguments=tool_call["input"],
-                    error=error_msg
-                )
-                
-                results.append({
-                    "tool_call_id": tool_call["id"],
-                    "success": False,
-                    "error": error_msg
-                })
-                
-            except Exception as e:
-                error_msg = f"Tool execution failed: {e}"
-                self.logger.error(error_msg)
-                
-                state.add_tool_call(
-                    tool_name=tool_call["name"],
-                    arguments=tool_call["input"],
-                    error=error_msg
-                )
-                
-                results.append({
-                    "tool_call_id": tool_call["id"],
-                    "success": False,
-                    "error": error_msg
-                })
+            if self.tool_registry.is_read_only(tool_call["name"]):
+                batch.append(tool_call)
+                continue
+            
+            results.extend(await self._execute_batch(batch, state))
+            batch = []
+            results.extend(await self._execute_batch([tool_call], state))
         
+        results.extend(await self._execute_batch(batch, state))
         return results
     
+    async def _execute_batch(self, tool_calls: List[Dict[str, Any]], state: AgentState) -> List[Dict[str, Any]]:
+        """Execute tool calls concurrently and record them in order."""
+        if not tool_calls:
+            return []
+        
+        outcomes = await asyncio.gather(*(self._execute_tool_call(tool_call) for tool_call in tool_calls))
+        
+        results = []
+        for tool_call, (result, record) in zip(tool_calls, outcomes):
+            state.add_tool_call(tool_name=tool_call["name"], arguments=tool_call["input"], **record)
+            results.append(result)
+        return results
+    
+    async def _execute_tool_call(self, tool_call: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Execute one tool call, returning its result and the fields to record it with."""
+        try:
+            # Validate tool call security
+            self.security_validator.validate_tool_call(
+                tool_call["name"], 
+                tool_call["input"]
+            )
+            
+            # Execute tool
+            start_time = time.perf_counter()
+            result = await self.tool_registry.execute_tool(
+                tool_call["name"],
+                tool_call["input"]
+            )
+            duration_ms = int((time.perf_counter() - start_time) * 1000)
+            
+            self.logger.debug(f"Tool {tool_call['name']} executed successfully")
+            
+            return {
+                "tool_call_id": tool_call["id"],
+                "success": True,
+                "result": result,
+                "duration_ms": duration_ms
+            }, {"result": str(result), "duration_ms": duration_ms}
+            
+        except SecurityError as e:
+            error_msg = f"Security violation in tool {tool_call['name']}: {e}"
+            
+        except Exception as e:
+            error_msg = f"Tool execution failed: {e}"
+        
+        self.logger.error(error_msg)
+        return {
+            "tool_call_id": tool_call["id"],
+            "success": False,
+            "error": error_msg
+        }, {"error": error_msg}
+    
+    def _emit_iteration_events(
+        self,
+        event_queue: asyncio.Queue,
+        iteration: int,
+        llm_response: Dict[str, Any],
+        tool_results: List[Dict[str, Any]]
+    ) -> None:
+        """Publish the reasoning and tool outputs of one iteration."""
+        event_queue.put_nowait({
+            "type": "iteration",
+            "iteration": iteration + 1,
+            "output": llm_response["text_content"],
+        })
+        
+        for tool_call, result in zip(llm_response["tool_calls"], tool_results):
+            event_queue.put_nowait({
+                "type": "tool",
+                "iteration": iteration + 1,
+                "tool": tool_call["name"],
+                "success": result["success"],
+                "output": str(result["result"]) if result["success"] else result["error"],
+            })
+    
     def _process_observations(self, tool_results: List[Dict[str, Any]], state: AgentState) -> str:
         """Process tool execution results into observations."""
         observations = []
@@ -7,6 +7,9 @@ across container restarts and session management.
 """
 
 import json
+import os
+import sys
+import tempfile
 import time
 from datetime import datetime
 from enum import Enum
@@ -14,11 +17,60 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional, Union
 from uuid import uuid4
 
-from pydantic import BaseModel, Field
+import orjson
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
 
 from .exceptions import ValidationError
 
 
+# Write buffer for state files, large enough to hold most states in one write
+STATE_WRITE_BUFFER_SIZE = 1 << 20
+
+
+def atomic_write(file_path: Union[str, Path], data: bytes) -> None:
+    """
+    Write data to file_path atomically.
+    
+    The data is written and fsynced to a uniquely named temporary file next
+    to the target which then replaces it, so readers and crashes never see a
+    partial or empty file and concurrent writers never share a temporary file.
+    """
+    file_path = Path(file_path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    with tempfile.NamedTemporaryFile(
+        mode="wb",
+        buffering=STATE_WRITE_BUFFER_SIZE,
+        dir=file_path.parent,
+        delete=False,
+        prefix=f".{file_path.name}.",
+        suffix=".tmp"
+    ) as tmp_file:
+        tmp_path = tmp_file.name
+        try:
+            tmp_file.write(data)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        except BaseException:
+            tmp_file.close()
+            os.unlink(tmp_path)
+            raise
+    
+    try:
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    
+    # Persist the rename itself, not just the file contents
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(file_path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
 class TaskStatus(str, Enum):
     """Task execution status enumeration."""
     PENDING = "pending"
@@ -44,6 +96,12 @@ class ToolCall(BaseModel):
             datetime: lambda v: v.isoformat()
         }
     }
+    
+    @field_validator("tool_name")
+    @classmethod
+    def intern_tool_name(cls, v: str) -> str:
+        # Tool names come from a small fixed set, share one string per name
+        return sys.intern(v)
 
 
 class Message(BaseModel):
@@ -56,11 +114,40 @@ class Message(BaseModel):
     tool_calls: List[ToolCall] = Field(default_factory=list)
     metadata: Dict[str, Any] = Field(default_factory=dict)
     
+    # Cached result of to_history_entry, not serialized
+    _history_entry: Optional[Dict[str, Any]] = PrivateAttr(default=None)
+    
     model_config = {
         "json_encoders": {
             datetime: lambda v: v.isoformat()
         }
     }
+    
+    @field_validator("role")
+    @classmethod
+    def intern_role(cls, v: str) -> str:
+        # Roles come from a small fixed set, share one string per role instead
+        # of one per message loaded from disk
+        return sys.intern(v)
+    
+    def to_history_entry(self) -> Dict[str, Any]:
+        """
+        Summary of the message for conversation history listings.
+        
+        The entry is built once and reused until tool calls are added to the
+        message; callers must not modify it.
+        """
+        entry = self._history_entry
+        if entry is None or entry["tool_calls"] != len(self.tool_calls):
+            entry = {
+                "id": self.id,
+                "role": self.role,
+                "content": self.content,
+                "timestamp": self.timestamp.isoformat(),
+                "tool_calls": len(self.tool_calls),
+            }
+            self._history_entry = entry
+        return entry
 
 
 class TaskContext(BaseModel):
@@ -153,17 +240,93 @@ class AgentState(BaseModel):
     total_errors: int = 0
     average_response_time_ms: float = 0.0
     
+    # Retention limits, configured at runtime rather than persisted
+    _max_messages: int = PrivateAttr(default=0)
+    _max_task_history: int = PrivateAttr(default=0)
+    
+    # Tasks archived over the session, including ones trimmed from task_history
+    _task_count: int = PrivateAttr(default=0)
+    
     model_config = {
         "json_encoders": {
             datetime: lambda v: v.isoformat()
         }
     }
     
+    def model_post_init(self, __context: Any) -> None:
+        self._task_count = len(self.task_history)
+    
+    @property
+    def task_count(self) -> int:
+        """Number of archived tasks, maintained on append rather than counted."""
+        return self._task_count
+    
+    def set_retention(self, max_messages: int = 0, max_task_history: int = 0) -> None:
+        """
+        Bound the conversation and task history, 0 meaning unbounded.
+        
+        The oldest entries are dropped once a limit is exceeded so that memory
+        use and the cost of saving the state stay constant over long sessions.
+        """
+        self._max_messages = max_messages
+        self._max_task_history = max_task_history
+        self._trim(self.messages, max_messages)
+        self._trim(self.task_history, max_task_history)
+    
+    @staticmethod
+    def _trim(items: List[Any], limit: int) -> None:
+        if limit and len(items) > limit:
+            del items[:len(items) - limit]
+    
+    def reinit(self, agent_name: str, agent_version: str, working_directory: str) -> None:
+        """
+        Start a new session in place.
+        
+        All fields are reset to their defaults under a new session ID, the
+        existing lists and dicts are emptied and reused. Retention limits are
+        kept.
+        """
+        now = datetime.utcnow()
+        self.session_id = str(uuid4())
+        self.agent_name = agent_name
+        self.agent_version = agent_version
+        self.created_at = now
+        self.last_activity = now
+        
+        self.messages.clear()
+        self.current_task = None
+        self.task_history.clear()
+        self._task_count = 0
+        
+        self.working_directory = working_directory
+        self.environment_variables.clear()
+        self.global_context.clear()
+        
+        self.total_iterations = 0
+        self.total_tool_calls = 0
+        self.total_errors = 0
+        self.average_response_time_ms = 0.0
+    
+    def messages_after(self, message_id: Optional[str]) -> List[Message]:
+        """
+        Get the messages added after the message with the given ID.
+        
+        All messages are returned if message_id is None or no longer present,
+        which is robust to older messages being trimmed in between.
+        """
+        if message_id is not None:
+            for index in range(len(self.messages) - 1, -1, -1):
+                if self.messages[index].id == message_id:
+                    return self.messages[index + 1:]
+        return list(self.messages)
+    
     def start_new_task(self, description: str, initial_prompt: str) -> str:
         """Start a new task and return the task ID."""
         # Archive current task if it exists
         if self.current_task:
             self.task_history.append(self.current_task)
+            self._task_count += 1
+            self._trim(self.task_history, self._max_task_history)
         
         # Create new task
         self.current_task = TaskContext(
@@ -190,6 +353,7 @@ class AgentState(BaseModel):
         )
         
         self.messages.append(message)
+        self._trim(self.messages, self._max_messages)
         self.update_activity()
         return message.id
     
@@ -319,15 +483,16 @@ class AgentState(BaseModel):
         """Update the last activity timestamp."""
         self.last_activity = datetime.utcnow()
     
-    def to_json(self) -> str:
-        """Serialize state to JSON string."""
-        return self.json(indent=2)
+    def to_bytes(self) -> bytes:
+        """Serialize state to compact JSON bytes."""
+        return orjson.dumps(self.model_dump(), default=str)
     
     @classmethod
-    def from_json(cls, json_str: str) -> "AgentState":
-        """Deserialize state from JSON string."""
+    def from_bytes(cls, data: Union[bytes, str]) -> "AgentState":
+        """Deserialize state from JSON bytes or string."""
         try:
-            return cls.parse_raw(json_str)
+            # Parsed and validated in one pass without intermediate dicts
+            return cls.model_validate_json(data)
         except Exception as e:
             raise ValidationError(
                 f"Failed to parse agent state from JSON: {e}",
@@ -335,14 +500,19 @@ class AgentState(BaseModel):
                 validation_rule="valid_json_format"
             )
     
+    def to_json(self) -> str:
+        """Serialize state to an indented JSON string."""
+        return orjson.dumps(self.model_dump(), default=str, option=orjson.OPT_INDENT_2).decode()
+    
+    @classmethod
+    def from_json(cls, json_str: str) -> "AgentState":
+        """Deserialize state from JSON string."""
+        return cls.from_bytes(json_str)
+    
     def save_to_file(self, file_path: Union[str, Path]) -> None:
         """Save state to a file."""
-        file_path = Path(file_path)
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        
         try:
-            with open(file_path, "w") as f:
-                f.write(self.to_json())
+            atomic_write(file_path, self.to_bytes())
         except Exception as e:
             raise ValidationError(
                 f"Failed to save state to file: {e}",
@@ -362,9 +532,7 @@ class AgentState(BaseModel):
             )
         
         try:
-            with open(file_path, "r") as f:
-                json_data = f.read()
-            return cls.from_json(json_data)
+            return cls.from_bytes(file_path.read_bytes())
         except Exception as e:
             raise ValidationError(
                 f"Failed to load state from file: {e}",
@@ -0,0 +1,175 @@
+"""
+Write-ahead journal for agent state persistence.
+
+Rewriting the full state file after every task costs time proportional to the
+whole session. Instead, the changes since the previous write are appended to a
+journal next to the state file, and a full snapshot is only written every few
+saves or when the changes cannot be expressed as appends (new session, cleared
+conversation). Loading reads the snapshot and replays the journal on top.
+"""
+
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import orjson
+
+from ..utils.logger import get_logger
+from .state import AgentState, atomic_write
+
+
+logger = get_logger(__name__)
+
+# Fields stored in journal entries as lists rather than replaced wholesale
+_LIST_FIELDS = {"messages", "task_history", "current_task"}
+
+
+class StateJournal:
+    """
+    Append-only log of AgentState changes between full snapshots.
+    
+    Each journal line is a JSON object holding the messages and archived tasks
+    added since the previous write, the current task and all scalar fields.
+    The last previously written message is repeated because tool calls may
+    have been appended to it since.
+    """
+    
+    def __init__(self, state_file: Union[str, Path], snapshot_every: int = 50):
+        self.state_file = Path(state_file)
+        self.path = self.state_file.with_name(self.state_file.name + ".journal")
+        self.snapshot_every = snapshot_every
+        
+        # Position of the last write: session ID, last message ID, last archived task ID
+        self._position: Optional[Tuple[str, Optional[str], Optional[str]]] = None
+        self._entries_since_snapshot = 0
+    
+    @staticmethod
+    def _position_of(state: AgentState) -> Tuple[str, Optional[str], Optional[str]]:
+        last_message_id = state.messages[-1].id if state.messages else None
+        last_task_id = state.task_history[-1].task_id if state.task_history else None
+        return state.session_id, last_message_id, last_task_id
+    
+    def prepare(
+        self,
+        state: AgentState,
+        snapshot: bool = False
+    ) -> Tuple[bool, bytes, Tuple[str, Optional[str], Optional[str]]]:
+        """
+        Serialize the state for the next write.
+        
+        Returns whether the payload is a full snapshot, the payload itself and
+        the position to pass to commit() once the payload has been written.
+        """
+        position = self._position_of(state)
+        
+        entry = None
+        if not snapshot and self._position is not None and self._entries_since_snapshot < self.snapshot_every:
+            entry = self._build_entry(state)
+        
+        if entry is None:
+            return True, state.to_bytes(), position
+        return False, orjson.dumps(entry, default=str) + b"\n", position
+    
+    def _build_entry(self, state: AgentState) -> Optional[Dict[str, Any]]:
+        """Changes since the last write, or None if only a snapshot can capture them."""
+        session_id, last_message_id, last_task_id = self._position
+        if state.session_id != session_id:
+            return None
+        
+        message_start = self._index_after(state.messages, "id", last_message_id)
+        task_start = self._index_after(state.task_history, "task_id", last_task_id)
+        if message_start is None or task_start is None:
+            # The history was cleared since the last write
+            return None
+        
+        # Repeat the last written message, tool calls may have been added to it
+        message_start = max(message_start - 1, 0)
+        
+        return {
+            "messages": [msg.model_dump() for msg in state.messages[message_start:]],
+            "task_history": [task.model_dump() for task in state.task_history[task_start:]],
+            "current_task": state.current_task.model_dump() if state.current_task else None,
+            "fields": state.model_dump(exclude=_LIST_FIELDS),
+        }
+    
+    @staticmethod
+    def _index_after(items: List[Any], id_field: str, last_id: Optional[str]) -> Optional[int]:
+        """Index following the item with last_id, or None if it is gone."""
+        if last_id is None:
+            return 0
+        for index in range(len(items) - 1, -1, -1):
+            if getattr(items[index], id_field) == last_id:
+                return index + 1
+        return None
+    
+    def write(self, is_snapshot: bool, payload: bytes) -> None:
+        """Write a prepared payload, blocking until it is durable."""
+        if is_snapshot:
+            atomic_write(self.state_file, payload)
+            # Entries older than the snapshot are skipped on replay, so a crash
+            # before this point is harmless
+            self.path.unlink(missing_ok=True)
+            return
+        
+        with open(self.path, "ab") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def commit(self, is_snapshot: bool, position: Tuple[str, Optional[str], Optional[str]]) -> None:
+        """Record that a prepared payload was written."""
+        self._position = position
+        self._entries_since_snapshot = 0 if is_snapshot else self._entries_since_snapshot + 1
+    
+    def load(self) -> AgentState:
+        """Load the snapshot and replay any journal entries written after it."""
+        # The loaded state has not been written in this process yet, so the
+        # next save is a snapshot that also compacts the journal
+        snapshot = self.state_file.read_bytes()
+        if not self.path.exists():
+            return AgentState.from_bytes(snapshot)
+        
+        return AgentState.model_validate(self._replay(orjson.loads(snapshot)))
+    
+    def _replay(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply journal entries to raw snapshot data."""
+        last_activity = datetime.fromisoformat(str(data["last_activity"]))
+        message_index = {msg["id"]: i for i, msg in enumerate(data["messages"])}
+        task_ids = {task["task_id"] for task in data["task_history"]}
+        applied = 0
+        
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    entry = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    # A torn final line from a crash mid-append
+                    logger.warning(f"Ignoring incomplete entry at end of {self.path}")
+                    break
+                
+                fields = entry["fields"]
+                entry_activity = datetime.fromisoformat(str(fields["last_activity"]))
+                if fields["session_id"] != data["session_id"] or entry_activity <= last_activity:
+                    continue
+                
+                for msg in entry["messages"]:
+                    if msg["id"] in message_index:
+                        data["messages"][message_index[msg["id"]]] = msg
+                    else:
+                        message_index[msg["id"]] = len(data["messages"])
+                        data["messages"].append(msg)
+                
+                for task in entry["task_history"]:
+                    if task["task_id"] not in task_ids:
+                        task_ids.add(task["task_id"])
+                        data["task_history"].append(task)
+                
+                data["current_task"] = entry["current_task"]
+                data.update(fields)
+                last_activity = entry_activity
+                applied += 1
+        
+        if applied:
+            logger.info(f"Replayed {applied} journal entries from {self.path}")
+        return data
@@ -0,0 +1,95 @@
+"""
+Shared state backends for conversation history.
+
+By default the agent keeps its conversation in the in-process AgentState. The
+Redis backend additionally stores every message outside the process so that
+several API workers share one history and restarts do not lose it.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from .config import ServerConfig
+from .exceptions import ConfigurationError
+from .state import Message
+
+
+class RedisAgentStateStore:
+    """
+    Conversation store backed by Redis.
+    
+    Each message is kept as a hash under ``conv:{session_id}:{msg_id}`` and
+    ordered through the sorted set ``conv:{session_id}:index`` scored by the
+    message timestamp.
+    """
+    
+    def __init__(self, redis_url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise ConfigurationError(
+                f"Required dependency for the redis state backend not found: {e}",
+                config_key="server.state_backend"
+            )
+        
+        self.redis = redis.from_url(redis_url, decode_responses=True)
+    
+    @staticmethod
+    def _index_key(session_id: str) -> str:
+        return f"conv:{session_id}:index"
+    
+    @staticmethod
+    def _message_key(session_id: str, message_id: str) -> str:
+        return f"conv:{session_id}:{message_id}"
+    
+    async def append_messages(self, session_id: str, messages: List[Message]) -> None:
+        """Store conversation messages for a session."""
+        if not messages:
+            return
+        
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for msg in messages:
+                pipe.hset(self._message_key(session_id, msg.id), mapping=msg.to_history_entry())
+                pipe.zadd(self._index_key(session_id), {msg.id: msg.timestamp.timestamp()})
+            await pipe.execute()
+    
+    async def get_history(self, session_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Get the most recent conversation entries for a session, oldest first."""
+        start = -limit if limit else 0
+        message_ids = await self.redis.zrange(self._index_key(session_id), start, -1)
+        if not message_ids:
+            return []
+        
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for message_id in message_ids:
+                pipe.hgetall(self._message_key(session_id, message_id))
+            records = await pipe.execute()
+        
+        history = []
+        for record in records:
+            if record:
+                record["tool_calls"] = int(record["tool_calls"])
+                history.append(record)
+        return history
+    
+    async def clear_history(self, session_id: str) -> None:
+        """Remove all conversation entries for a session."""
+        index_key = self._index_key(session_id)
+        message_ids = await self.redis.zrange(index_key, 0, -1)
+        keys = [self._message_key(session_id, message_id) for message_id in message_ids]
+        await self.redis.delete(index_key, *keys)
+    
+    async def close(self) -> None:
+        """Close the Redis connection."""
+        await self.redis.aclose()
+
+
+def create_state_store(config: ServerConfig) -> Optional[RedisAgentStateStore]:
+    """
+    Factory function to create the state store selected in config.
+    
+    Returns None for the memory backend, where the agent's in-process
+    state is the only copy of the conversation.
+    """
+    if config.state_backend == "redis":
+        return RedisAgentStateStore(config.redis_url)
+    return None
@@ -8,7 +8,7 @@ with schema validation, security checks, and execution orchestration.
 import asyncio
 import inspect
 import time
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from ..core.exceptions import ToolError, ValidationError
 from ..security.validator import SecurityValidator
@@ -17,6 +17,14 @@ from .file_tools import FileTools
 from .shell_tools import ShellTools
 
 
+# Built-in tools without side effects, the agent loop may run these concurrently
+READ_ONLY_TOOLS = frozenset({
+    "file_read", "file_list", "file_info",
+    "shell_which", "shell_pwd", "shell_ls", "shell_cat",
+    "shell_grep", "shell_find", "shell_env", "shell_ps",
+})
+
+
 class ToolRegistry:
     """
     Central registry for all agent tools with validation and execution.
@@ -33,6 +41,8 @@ class ToolRegistry:
         self.tools: Dict[str, Callable] = {}
         self.schemas: Dict[str, Dict[str, Any]] = {}
         self.metadata: Dict[str, Dict[str, Any]] = {}
+        self._frozen = False
+        self._tool_names: Optional[Tuple[str, ...]] = None
         
         # Tool instances
         self.file_tools = FileTools(security_validator)
@@ -62,7 +72,8 @@ class ToolRegistry:
                 if callable(method):
                     # Get schema from method docstring or annotations
                     schema = self._extract_tool_schema(method, method_name)
-                    self.register_tool(method_name, method, schema)
+                    metadata = {"read_only": True} if method_name in READ_ONLY_TOOLS else None
+                    self.register_tool(method_name, method, schema, metadata)
     
     def _register_placeholder_tools(self) -> None:
         """Register placeholder tools for future implementation."""
@@ -133,6 +144,8 @@ class ToolRegistry:
             schema: JSON schema for tool arguments
             metadata: Optional metadata about the tool
         """
+        self._check_not_frozen(name)
+        
         if name in self.tools:
             self.logger.warning(f"Overriding existing tool: {name}")
         
@@ -143,6 +156,7 @@ class ToolRegistry:
         self.tools[name] = function
         self.schemas[name] = schema
         self.metadata[name] = metadata or {}
+        self._tool_names = None
         
         self.logger.debug(f"Registered tool: {name}")
     
@@ -156,17 +170,48 @@ class ToolRegistry:
         Returns:
             True if tool was removed, False if not found
         """
+        self._check_not_frozen(name)
+        
         if name in self.tools:
             del self.tools[name]
             del self.schemas[name]
             del self.metadata[name]
+            self._tool_names = None
             self.logger.debug(f"Unregistered tool: {name}")
             return True
         return False
     
+    def freeze(self) -> None:
+        """
+        Disallow further registration changes.
+        
+        Callers that cache the tool list or tool info, such as the API
+        server, freeze the registry so those caches cannot go stale.
+        """
+        self._frozen = True
+    
+    @property
+    def frozen(self) -> bool:
+        """Whether the registry rejects registration changes."""
+        return self._frozen
+    
+    def _check_not_frozen(self, name: str) -> None:
+        if self._frozen:
+            raise ToolError(f"Tool registry is frozen, cannot change tool: {name}", tool_name=name)
+    
     def list_tools(self) -> List[str]:
         """Get list of all registered tool names."""
-        return list(self.tools.keys())
+        return list(self.tool_names())
+    
+    def tool_names(self) -> Tuple[str, ...]:
+        """Get all registered tool names, cached until the registry changes."""
+        if self._tool_names is None:
+            self._tool_names = tuple(self.tools)
+        return self._tool_names
+    
+    def is_read_only(self, name: str) -> bool:
+        """Whether a tool only reads state and may run alongside other read-only tools."""
+        return self.metadata.get(name, {}).get("read_only", False)
     
     def get_tool_schema(self, name: str) -> Optional[Dict[str, Any]]:
         """Get schema for a specific tool."""
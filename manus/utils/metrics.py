@@ -6,6 +6,7 @@ performance, success rates, and resource usage.
 """
 
 import time
+from bisect import bisect_left
 from collections import defaultdict, deque
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
@@ -39,6 +40,95 @@ class PerformanceSnapshot:
     network_io: Optional[Dict[str, int]] = None
 
 
+# Upper bounds (ms) of the latency histogram kept per rollup bin
+LATENCY_BOUNDS_MS = (
+    10, 25, 50, 100, 250, 500, 1000, 2500, 5000,
+    10000, 30000, 60000, 120000, 300000, float("inf"),
+)
+
+
+@dataclass
+class MetricBin:
+    """Aggregated task events for one fixed time window."""
+    start: float
+    count: int = 0
+    latency_sum_ms: float = 0.0
+    errors: int = 0
+    histogram: List[int] = field(default_factory=lambda: [0] * len(LATENCY_BOUNDS_MS))
+
+
+class BucketedSummer:
+    """
+    Rolling time-bucketed rollup of task latencies and errors.
+    
+    Events are folded into fixed-width bins as they are recorded, so reading
+    a window merges at most one bin per interval instead of scanning raw
+    events. Each bin keeps a latency histogram for mergeable percentiles.
+    """
+    
+    def __init__(self, bin_seconds: int = 5, max_bins: int = 720):
+        self.bin_seconds = bin_seconds
+        self.bins: deque = deque(maxlen=max_bins)
+    
+    def add(self, latency_ms: float, error: bool = False) -> None:
+        """Fold one event into the current bin."""
+        now = time.time()
+        start = now - now % self.bin_seconds
+        
+        if not self.bins or self.bins[-1].start != start:
+            self.bins.append(MetricBin(start=start))
+        
+        current = self.bins[-1]
+        current.count += 1
+        current.latency_sum_ms += latency_ms
+        current.errors += int(error)
+        current.histogram[bisect_left(LATENCY_BOUNDS_MS, latency_ms)] += 1
+    
+    def summarize(self, window_seconds: float) -> Dict[str, Any]:
+        """Merge the bins overlapping the window into one summary."""
+        cutoff = time.time() - window_seconds
+        count = 0
+        errors = 0
+        latency_sum_ms = 0.0
+        histogram = [0] * len(LATENCY_BOUNDS_MS)
+        
+        for metric_bin in reversed(self.bins):
+            if metric_bin.start + self.bin_seconds <= cutoff:
+                break
+            count += metric_bin.count
+            errors += metric_bin.errors
+            latency_sum_ms += metric_bin.latency_sum_ms
+            for i, bucket_count in enumerate(metric_bin.histogram):
+                histogram[i] += bucket_count
+        
+        return {
+            "count": count,
+            "errors": errors,
+            "average_latency_ms": latency_sum_ms / count if count > 0 else 0.0,
+            "p50_ms": self._percentile(histogram, count, 0.50),
+            "p95_ms": self._percentile(histogram, count, 0.95),
+            "p99_ms": self._percentile(histogram, count, 0.99),
+        }
+    
+    @staticmethod
+    def _percentile(histogram: List[int], count: int, quantile: float) -> Optional[float]:
+        """Upper bound of the histogram bucket holding the given quantile."""
+        if count == 0:
+            return None
+        
+        rank = quantile * count
+        seen = 0
+        for bound, bucket_count in zip(LATENCY_BOUNDS_MS, histogram):
+            seen += bucket_count
+            if seen >= rank:
+                return bound
+        return LATENCY_BOUNDS_MS[-1]
+    
+    def clear(self) -> None:
+        """Drop all bins."""
+        self.bins.clear()
+
+
 class MetricsCollector:
     """
     Collects and aggregates performance metrics for the agent system.
@@ -66,14 +156,20 @@ class MetricsCollector:
         
         # Response time tracking
         self.response_times: deque = deque(maxlen=100)  # Last 100 response times
+        self._response_time_sum = 0.0
+        self.task_rollup = BucketedSummer()
         
         # Error tracking
         self.error_counts: Dict[str, int] = defaultdict(int)
         self.error_history: deque = deque(maxlen=100)
         
-        # Tool usage tracking
+        # Tool usage tracking, success flags of the last 100 calls per tool
         self.tool_usage: Dict[str, int] = defaultdict(int)
-        self.tool_success_rate: Dict[str, List[bool]] = defaultdict(list)
+        self.tool_success_rate: Dict[str, deque] = defaultdict(lambda: deque(maxlen=100))
+        self._tool_success_counts: Dict[str, int] = defaultdict(int)
+        
+        # Summary without uptime, rebuilt only after metrics change
+        self._summary: Optional[Dict[str, Any]] = None
         
         # System monitoring
         self.start_time = time.time()
@@ -103,6 +199,7 @@ class MetricsCollector:
         
         self.current_tasks[task_id] = metrics
         self.total_tasks += 1
+        self._summary = None
         
         return task_id
     
@@ -138,7 +235,11 @@ class MetricsCollector:
         metrics.success = success
         
         if execution_time:
+            if len(self.response_times) == self.response_times.maxlen:
+                self._response_time_sum -= self.response_times[0]
             self.response_times.append(execution_time)
+            self._response_time_sum += execution_time
+            self.task_rollup.add(execution_time * 1000, error=not success)
         
         # Update aggregated metrics
         if success:
@@ -148,6 +249,7 @@ class MetricsCollector:
         
         # Store completed task
         self.completed_tasks.append(metrics)
+        self._summary = None
         
         # Take performance snapshot periodically
         if time.time() - self._last_snapshot_time > self._snapshot_interval:
@@ -156,13 +258,16 @@ class MetricsCollector:
     def record_tool_usage(self, tool_name: str, success: bool) -> None:
         """Record tool usage statistics."""
         self.tool_usage[tool_name] += 1
-        self.tool_success_rate[tool_name].append(success)
         
-        # Keep only last 100 results per tool
-        if len(self.tool_success_rate[tool_name]) > 100:
-            self.tool_success_rate[tool_name].pop(0)
+        # Keep running success counts over the last 100 results per tool
+        results = self.tool_success_rate[tool_name]
+        if len(results) == results.maxlen:
+            self._tool_success_counts[tool_name] -= results[0]
+        results.append(success)
+        self._tool_success_counts[tool_name] += success
         
         self.total_tool_calls += 1
+        self._summary = None
     
     def record_error(self, error_type: str, error_message: str) -> None:
         """Record an error occurrence."""
@@ -172,10 +277,12 @@ class MetricsCollector:
             "type": error_type,
             "message": error_message[:200]  # Truncate long messages
         })
+        self._summary = None
     
     def record_iteration(self, task_id: Optional[str] = None) -> None:
         """Record an agent loop iteration."""
         self.total_iterations += 1
+        self._summary = None
         
         if task_id and task_id in self.current_tasks:
             self.current_tasks[task_id].iterations += 1
@@ -212,15 +319,27 @@ class MetricsCollector:
             
             self.performance_history.append(snapshot)
             self._last_snapshot_time = time.time()
+            self._summary = None
             
         except Exception:
             # Don't let performance monitoring crash the agent
             pass
     
     def get_summary(self) -> Dict[str, Any]:
-        """Get a summary of all collected metrics."""
-        uptime = time.time() - self.start_time
+        """
+        Get a summary of all collected metrics.
+        
+        Aggregates are kept up to date incrementally and the summary is only
+        rebuilt after new metrics were recorded; nested values are shared
+        between calls and must not be modified.
+        """
+        if self._summary is None:
+            self._summary = self._build_summary()
         
+        return {"uptime_seconds": time.time() - self.start_time, **self._summary}
+    
+    def _build_summary(self) -> Dict[str, Any]:
+        """Build the summary from the running aggregates."""
         # Calculate success rate
         success_rate = (
             self.successful_tasks / self.total_tasks 
@@ -229,7 +348,7 @@ class MetricsCollector:
         
         # Calculate average response time
         avg_response_time = (
-            sum(self.response_times) / len(self.response_times)
+            self._response_time_sum / len(self.response_times)
             if self.response_times else 0.0
         )
         
@@ -247,16 +366,14 @@ class MetricsCollector:
         # Tool success rates
         tool_stats = {}
         for tool_name, results in self.tool_success_rate.items():
-            success_count = sum(results)
             total_count = len(results)
             tool_stats[tool_name] = {
                 "usage_count": self.tool_usage[tool_name],
-                "success_rate": success_count / total_count if total_count > 0 else 0.0,
+                "success_rate": self._tool_success_counts[tool_name] / total_count if total_count > 0 else 0.0,
                 "recent_calls": total_count
             }
         
         return {
-            "uptime_seconds": uptime,
             "total_tasks": self.total_tasks,
             "successful_tasks": self.successful_tasks,
             "success_rate": success_rate,
@@ -283,29 +400,43 @@ class MetricsCollector:
         """
         cutoff_time = datetime.utcnow() - timedelta(minutes=minutes)
         
+        # Snapshots are appended in time order, so walk back from the newest
+        # and stop at the cutoff instead of scanning the whole history
         trend_data = []
-        for snapshot in self.performance_history:
-            if snapshot.timestamp >= cutoff_time:
-                trend_data.append({
-                    "timestamp": snapshot.timestamp.isoformat(),
-                    "cpu_percent": snapshot.cpu_percent,
-                    "memory_percent": snapshot.memory_percent,
-                    "memory_mb": snapshot.memory_mb,
-                    "disk_usage_percent": snapshot.disk_usage_percent,
-                })
-        
+        for snapshot in reversed(self.performance_history):
+            if snapshot.timestamp < cutoff_time:
+                break
+            trend_data.append({
+                "timestamp": snapshot.timestamp.isoformat(),
+                "cpu_percent": snapshot.cpu_percent,
+                "memory_percent": snapshot.memory_percent,
+                "memory_mb": snapshot.memory_mb,
+                "disk_usage_percent": snapshot.disk_usage_percent,
+            })
+        
+        trend_data.reverse()
         return trend_data
     
+    def get_task_rollup(self, minutes: int = 60) -> Dict[str, Any]:
+        """
+        Get pre-aggregated task latency and error statistics.
+        
+        Args:
+            minutes: Number of minutes to look back
+            
+        Returns:
+            Task count, errors, average and percentile latencies for the window
+        """
+        return self.task_rollup.summarize(minutes * 60)
+    
     def get_tool_performance(self) -> Dict[str, Any]:
         """Get detailed tool performance statistics."""
         tool_perf = {}
         
         for tool_name in self.tool_usage:
             usage_count = self.tool_usage[tool_name]
-            success_results = self.tool_success_rate.get(tool_name, [])
-            
-            success_count = sum(success_results)
-            total_calls = len(success_results)
+            success_count = self._tool_success_counts.get(tool_name, 0)
+            total_calls = len(self.tool_success_rate.get(tool_name, ()))
             success_rate = success_count / total_calls if total_calls > 0 else 0.0
             
             tool_perf[tool_name] = {
@@ -323,13 +454,16 @@ class MetricsCollector:
         recent_errors = []
         cutoff_time = datetime.utcnow() - timedelta(hours=1)
         
-        for error in self.error_history:
-            if error["timestamp"] >= cutoff_time:
-                recent_errors.append({
-                    "timestamp": error["timestamp"].isoformat(),
-                    "type": error["type"],
-                    "message": error["message"],
-                })
+        for error in reversed(self.error_history):
+            if error["timestamp"] < cutoff_time:
+                break
+            recent_errors.append({
+                "timestamp": error["timestamp"].isoformat(),
+                "type": error["type"],
+                "message": error["message"],
+            })
+        
+        recent_errors.reverse()
         
         return {
             "total_errors": self.total_errors,
@@ -344,6 +478,8 @@ class MetricsCollector:
         self.completed_tasks.clear()
         self.performance_history.clear()
         self.response_times.clear()
+        self._response_time_sum = 0.0
+        self.task_rollup.clear()
         self.error_history.clear()
         
         self.total_tasks = 0
@@ -355,6 +491,8 @@ class MetricsCollector:
         self.error_counts.clear()
         self.tool_usage.clear()
         self.tool_success_rate.clear()
+        self._tool_success_counts.clear()
+        self._summary = None
         
         self.start_time = time.time()
         self._take_performance_snapshot()
\ No newline at end of file
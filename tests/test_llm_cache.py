@@ -0,0 +1,95 @@
+"""Tests for caching LLM responses in the agent loop."""
+
+import pytest
+import pytest_asyncio
+
+from manus.core.config import Config
+from manus.core.llm_cache import ResponseCache
+from manus.core.loop import AgentLoop
+from manus.core.state import AgentState
+from manus.security.validator import SecurityValidator
+from manus.tools.registry import ToolRegistry
+
+
+pytestmark = pytest.mark.unit
+
+
+@pytest_asyncio.fixture
+async def agent_loop():
+    config = Config()
+    validator = SecurityValidator(config.security)
+    agent_loop = AgentLoop(config, ToolRegistry(validator), validator, response_cache=ResponseCache())
+    
+    # Count the calls that reach the provider
+    agent_loop.generate_calls = 0
+    generate_response = agent_loop.llm_provider.generate_response
+    
+    async def counting_generate_response(*args, **kwargs):
+        agent_loop.generate_calls += 1
+        return await generate_response(*args, **kwargs)
+    
+    agent_loop.llm_provider.generate_response = counting_generate_response
+    yield agent_loop
+    await agent_loop.cleanup()
+
+
+def new_state(prompt, session_id=None, earlier=()):
+    """A state with a freshly started task, as execute_task leaves it before the first iteration."""
+    state = AgentState() if session_id is None else AgentState(session_id=session_id)
+    for role, content in earlier:
+        state.add_message(role, content)
+    state.start_new_task(prompt, prompt)
+    state.add_message("user", prompt)
+    return state
+
+
+async def respond(agent_loop, state):
+    return await agent_loop._get_llm_response(agent_loop._build_context(state), state)
+
+
+@pytest.mark.asyncio
+async def test_repeated_prompt_hits_cache(agent_loop):
+    first = new_state("List the files")
+    # Same conversation, but new message IDs, timestamps and task ID
+    second = new_state("List the files", session_id=first.session_id)
+    
+    first_response = await respond(agent_loop, first)
+    second_response = await respond(agent_loop, second)
+    
+    assert agent_loop.generate_calls == 1
+    assert agent_loop.response_cache.get_stats()["hits"] == 1
+    assert second_response["text_content"] == first_response["text_content"]
+    # A cached response is recorded like a generated one
+    assert second.messages[-1].role == "assistant"
+    assert second.messages[-1].content == first_response["text_content"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("other", [
+    lambda session_id: new_state("List the directories", session_id=session_id),
+    lambda session_id: new_state("List the files", session_id=session_id, earlier=[("user", "Hello")]),
+    lambda session_id: new_state("List the files"),
+])
+async def test_different_conversation_misses_cache(agent_loop, other):
+    first = new_state("List the files")
+    
+    await respond(agent_loop, first)
+    await respond(agent_loop, other(first.session_id))
+    
+    assert agent_loop.generate_calls == 2
+    assert agent_loop.response_cache.get_stats()["hits"] == 0
+
+
+@pytest.mark.asyncio
+async def test_tool_results_are_part_of_key(agent_loop):
+    states = []
+    for result in ("a.txt", "b.txt"):
+        state = new_state("List the files", session_id="session")
+        state.add_tool_call("file_list", {"path": "."}, result=result)
+        state.add_message("user", "Now read them")
+        states.append(state)
+    
+    for state in states:
+        await respond(agent_loop, state)
+    
+    assert agent_loop.generate_calls == 2
@@ -0,0 +1,88 @@
+"""Tests for sharing loaded Hugging Face models between providers."""
+
+import asyncio
+import gc
+import logging
+import threading
+
+import pytest
+
+from manus.core.config import LLMConfig
+from manus.core.llm_providers import HuggingFaceProvider, _LoadedModel, _model_load_lock
+
+
+pytestmark = pytest.mark.unit
+
+
+def provider_using(loaded):
+    """A provider holding loaded weights, without loading a model."""
+    provider = HuggingFaceProvider.__new__(HuggingFaceProvider)
+    provider._executor = None
+    provider._loaded_model = loaded
+    return provider
+
+
+def test_providers_sharing_weights_share_model_thread():
+    loaded = _LoadedModel(model=object())
+    first, second = provider_using(loaded), provider_using(loaded)
+    
+    assert first._get_executor() is second._get_executor() is loaded.executor
+    assert loaded.executor.submit(lambda: None).result() is None
+
+
+def test_model_thread_exits_with_last_provider():
+    loaded = _LoadedModel(model=object())
+    executor = loaded.executor
+    provider = provider_using(loaded)
+    del loaded
+    gc.collect()
+    
+    executor.submit(lambda: None).result()
+    
+    provider._loaded_model = None
+    gc.collect()
+    with pytest.raises(RuntimeError):
+        executor.submit(lambda: None)
+
+
+@pytest.mark.asyncio
+async def test_model_load_lock_is_per_event_loop():
+    lock = _model_load_lock()
+    
+    assert _model_load_lock() is lock
+    
+    async def other_loop_lock():
+        return _model_load_lock()
+    
+    assert await asyncio.to_thread(asyncio.run, other_loop_lock()) is not lock
+
+
+@pytest.mark.asyncio
+async def test_compiled_model_warms_up_after_loading_timeout(monkeypatch):
+    provider = provider_using(_LoadedModel(model=object()))
+    provider.config = LLMConfig(provider="huggingface")
+    provider.logger = logging.getLogger(__name__)
+    provider._model_loaded = False
+    events = []
+    
+    async def initialize_model():
+        events.append("load")
+        provider._needs_warm_up = True
+        provider._model_loaded = True
+    
+    wait_for = asyncio.wait_for
+    
+    async def recording_wait_for(awaitable, timeout):
+        result = await wait_for(awaitable, timeout)
+        events.append("timeout over")
+        return result
+    
+    provider._initialize_model = initialize_model
+    provider._warm_up = lambda: events.append(threading.current_thread().name)
+    monkeypatch.setattr(asyncio, "wait_for", recording_wait_for)
+    
+    await provider.initialize()
+    
+    assert events[:2] == ["load", "timeout over"]
+    assert events[2].startswith("hf-generate")
+    assert not provider._needs_warm_up
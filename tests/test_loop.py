@@ -0,0 +1,97 @@
+"""Tests for tool call execution in the agent loop."""
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from manus.core.config import Config
+from manus.core.loop import AgentLoop
+from manus.core.state import AgentState
+from manus.security.validator import SecurityValidator
+from manus.tools.registry import ToolRegistry
+
+
+pytestmark = pytest.mark.unit
+
+SCHEMA = {"type": "object", "properties": {"tag": {"type": "string"}}, "required": ["tag"]}
+
+# Seconds each tool call takes, by tag
+DELAYS = {"slow": 0.05, "fast": 0.0, "write": 0.0, "after": 0.0}
+
+
+@pytest_asyncio.fixture
+async def loop_and_log():
+    config = Config()
+    validator = SecurityValidator(config.security)
+    registry = ToolRegistry(validator)
+    log = []
+    
+    async def tool(tag):
+        log.append(("start", tag))
+        await asyncio.sleep(DELAYS[tag])
+        log.append(("end", tag))
+        return tag
+    
+    registry.register_tool("debug_read", tool, SCHEMA, {"read_only": True})
+    registry.register_tool("debug_write", tool, SCHEMA)
+    
+    agent_loop = AgentLoop(config, registry, validator)
+    yield agent_loop, log
+    await agent_loop.cleanup()
+
+
+def tool_calls(*calls):
+    return [
+        {"id": f"call_{index}", "name": name, "input": {"tag": tag}}
+        for index, (name, tag) in enumerate(calls)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_read_only_calls_run_concurrently_and_record_in_order(loop_and_log):
+    agent_loop, log = loop_and_log
+    state = AgentState()
+    state.start_new_task("task", "task")
+    calls = tool_calls(
+        ("debug_read", "slow"),
+        ("debug_read", "fast"),
+        ("debug_write", "write"),
+        ("debug_read", "after"),
+    )
+    
+    results = await agent_loop._execute_actions({"tool_calls": calls}, state)
+    
+    # The fast read finishes while the slow one is still running
+    assert log.index(("end", "fast")) < log.index(("end", "slow"))
+    # The write waits for both reads, the read after it waits for the write
+    assert log.index(("start", "write")) > log.index(("end", "slow"))
+    assert log.index(("start", "after")) > log.index(("end", "write"))
+    
+    assert [result["tool_call_id"] for result in results] == ["call_0", "call_1", "call_2", "call_3"]
+    assert all(result["success"] for result in results)
+    
+    recorded = state.messages[-1].tool_calls
+    assert [(call.tool_name, call.result) for call in recorded] == [
+        ("debug_read", "slow"),
+        ("debug_read", "fast"),
+        ("debug_write", "write"),
+        ("debug_read", "after"),
+    ]
+    assert state.total_tool_calls == 4
+
+
+@pytest.mark.asyncio
+async def test_failed_call_is_recorded_in_place(loop_and_log):
+    agent_loop, _ = loop_and_log
+    state = AgentState()
+    state.start_new_task("task", "task")
+    calls = tool_calls(("debug_read", "slow"), ("not_allowed", "fast"), ("debug_read", "fast"))
+    
+    results = await agent_loop._execute_actions({"tool_calls": calls}, state)
+    
+    assert [result["success"] for result in results] == [True, False, True]
+    recorded = state.messages[-1].tool_calls
+    assert [call.tool_name for call in recorded] == ["debug_read", "not_allowed", "debug_read"]
+    assert recorded[1].error is not None
+    assert state.total_errors == 1
@@ -0,0 +1,75 @@
+"""Tests for the API endpoints served on the agent."""
+
+import asyncio
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from manus.api import server
+from manus.api.tasks import LocalTaskQueue
+from manus.core.agent import ManusAgent
+from manus.core.config import Config
+
+
+pytestmark = pytest.mark.unit
+
+
+@pytest_asyncio.fixture
+async def client(tmp_path, monkeypatch):
+    """A client of an app serving a mock-model agent, without running the lifespan."""
+    if not server.FASTAPI_CACHE_AVAILABLE:
+        pytest.skip("fastapi-cache2 is not installed")
+    
+    config = Config()
+    agent = ManusAgent(
+        config, state_file=str(tmp_path / "agent_state.json"), install_signal_handlers=False
+    )
+    monkeypatch.setattr(server, "_agent", agent)
+    task_queue = LocalTaskQueue(agent, max_pending=0)
+    monkeypatch.setattr(server, "_task_queue", task_queue)
+    monkeypatch.setattr(server, "_chat_queue", task_queue)
+    
+    app = server.create_app(config)
+    server._init_endpoint_cache(config)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        client.agent = agent
+        yield client
+    
+    await server._invalidate_endpoint_cache()
+    await agent.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_chat_invalidates_cached_status(client):
+    before = await client.get("/status")
+    assert before.json()["current_task"]["id"] is None
+    
+    chat = await client.post("/chat", json={"message": "Hello"})
+    assert chat.status_code == 200
+    
+    after = await client.get("/status")
+    assert after.json()["current_task"]["id"] == chat.json()["task_id"]
+
+
+@pytest.mark.asyncio
+async def test_chat_returns_503_while_task_queue_is_full(client):
+    started = asyncio.Event()
+    release = asyncio.Event()
+    
+    async def blocking_execute_task(prompt, event_queue=None):
+        started.set()
+        await release.wait()
+        return {"success": True, "result": prompt, "task_id": None}
+    
+    client.agent.execute_task = blocking_execute_task
+    task = await client.post("/task", json={"prompt": "background"})
+    assert task.status_code == 202
+    await started.wait()
+    
+    chat = await client.post("/chat", json={"message": "Hello"})
+    
+    assert chat.status_code == 503
+    assert chat.headers["Retry-After"] == "5"
+    release.set()
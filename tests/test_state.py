@@ -0,0 +1,58 @@
+"""Tests for agent state persistence helpers."""
+
+import os
+
+import pytest
+
+from manus.core.state import atomic_write
+
+
+pytestmark = pytest.mark.unit
+
+
+def test_atomic_write_creates_file_and_parents(tmp_path):
+    target = tmp_path / "nested" / "state.json"
+    
+    atomic_write(target, b'{"a": 1}')
+    
+    assert target.read_bytes() == b'{"a": 1}'
+
+
+def test_atomic_write_replaces_existing_file(tmp_path):
+    target = tmp_path / "state.json"
+    target.write_bytes(b"old contents that are longer than the new ones")
+    
+    atomic_write(str(target), b"new")
+    
+    assert target.read_bytes() == b"new"
+    assert os.listdir(tmp_path) == ["state.json"]
+
+
+def test_atomic_write_failure_keeps_original(tmp_path, monkeypatch):
+    target = tmp_path / "state.json"
+    target.write_bytes(b"original")
+    
+    def failing_fsync(fd):
+        raise OSError("disk full")
+    
+    monkeypatch.setattr(os, "fsync", failing_fsync)
+    
+    with pytest.raises(OSError, match="disk full"):
+        atomic_write(target, b"replacement")
+    
+    assert target.read_bytes() == b"original"
+    assert os.listdir(tmp_path) == ["state.json"]
+
+
+def test_atomic_write_failed_replace_removes_temporary_file(tmp_path, monkeypatch):
+    target = tmp_path / "state.json"
+    
+    def failing_replace(src, dst):
+        raise OSError("rename failed")
+    
+    monkeypatch.setattr(os, "replace", failing_replace)
+    
+    with pytest.raises(OSError, match="rename failed"):
+        atomic_write(target, b"data")
+    
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,131 @@
+"""Tests for the state write-ahead journal."""
+
+import pytest
+
+from manus.core.state import AgentState, atomic_write
+from manus.core.state_journal import StateJournal
+
+
+pytestmark = pytest.mark.unit
+
+
+def save(journal: StateJournal, state: AgentState, snapshot: bool = False) -> bool:
+    """Write state the way ManusAgent._save_state does, returning whether it was a snapshot."""
+    is_snapshot, payload, position = journal.prepare(state, snapshot=snapshot)
+    journal.write(is_snapshot, payload)
+    journal.commit(is_snapshot, position)
+    return is_snapshot
+
+
+def run_task(state: AgentState, prompt: str) -> None:
+    """Record a task with a user message and a tool call on the reply."""
+    state.start_new_task(prompt, prompt)
+    state.add_message("user", prompt)
+    state.add_message("assistant", f"Working on {prompt}")
+    state.add_tool_call("file_read", {"path": f"{prompt}.txt"}, result="contents")
+    state.complete_task(f"Finished {prompt}")
+
+
+@pytest.fixture
+def state_file(tmp_path):
+    return tmp_path / "agent_state.json"
+
+
+def test_first_write_is_snapshot(state_file):
+    journal = StateJournal(state_file)
+    
+    assert save(journal, AgentState())
+    assert state_file.exists()
+    assert not journal.path.exists()
+
+
+def test_replay_restores_journaled_changes(state_file):
+    journal = StateJournal(state_file)
+    state = AgentState()
+    save(journal, state)
+    
+    for prompt in ("first", "second", "third"):
+        run_task(state, prompt)
+        assert not save(journal, state)
+    
+    # A tool call added to the last written message is picked up by the next entry
+    state.add_tool_call("file_list", {"path": "."}, result="[]")
+    save(journal, state)
+    
+    loaded = StateJournal(state_file).load()
+    assert loaded.model_dump() == state.model_dump()
+    assert len(loaded.messages[-1].tool_calls) == 2
+
+
+def test_snapshot_every_compacts_journal(state_file):
+    journal = StateJournal(state_file, snapshot_every=2)
+    state = AgentState()
+    save(journal, state)
+    
+    written = []
+    for prompt in ("a", "b", "c", "d"):
+        run_task(state, prompt)
+        written.append(save(journal, state))
+    
+    assert written == [False, False, True, False]
+    assert StateJournal(state_file).load().model_dump() == state.model_dump()
+
+
+def test_torn_last_line_is_ignored(state_file):
+    journal = StateJournal(state_file)
+    state = AgentState()
+    save(journal, state)
+    
+    run_task(state, "complete")
+    save(journal, state)
+    expected = state.model_dump()
+    
+    # A crash in the middle of appending the next entry
+    run_task(state, "torn")
+    _, payload, _ = journal.prepare(state)
+    with open(journal.path, "ab") as f:
+        f.write(payload[:len(payload) // 2])
+    
+    assert StateJournal(state_file).load().model_dump() == expected
+
+
+def test_session_change_writes_snapshot(state_file):
+    journal = StateJournal(state_file)
+    state = AgentState()
+    save(journal, state)
+    run_task(state, "old session")
+    save(journal, state)
+    
+    new_state = AgentState()
+    assert save(journal, new_state)
+    assert not journal.path.exists()
+    assert StateJournal(state_file).load().session_id == new_state.session_id
+
+
+def test_entries_of_other_session_are_skipped(state_file):
+    journal = StateJournal(state_file)
+    state = AgentState()
+    save(journal, state)
+    run_task(state, "old session")
+    save(journal, state)
+    
+    # A crash after the new session's snapshot replaced the state file but
+    # before the old session's journal was removed
+    new_state = AgentState()
+    atomic_write(state_file, new_state.to_bytes())
+    
+    assert journal.path.exists()
+    assert StateJournal(state_file).load().model_dump() == new_state.model_dump()
+
+
+def test_cleared_history_writes_snapshot(state_file):
+    journal = StateJournal(state_file)
+    state = AgentState()
+    save(journal, state)
+    run_task(state, "task")
+    save(journal, state)
+    
+    state.messages.clear()
+    state.add_message("user", "after clearing")
+    assert save(journal, state)
+    assert StateJournal(state_file).load().model_dump() == state.model_dump()
@@ -0,0 +1,140 @@
+"""Tests for the in-process task queue and its API back-pressure."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from manus.api import server
+from manus.api.tasks import LocalTaskQueue
+from manus.core.config import Config
+from manus.core.exceptions import ResourceError
+
+
+pytestmark = pytest.mark.unit
+
+
+class BlockingAgent:
+    """Stands in for ManusAgent, finishing tasks once release is set."""
+    
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.prompts = []
+    
+    async def execute_task(self, prompt, event_queue=None):
+        self.prompts.append(prompt)
+        await self.release.wait()
+        return {"success": True, "result": prompt}
+
+
+async def wait_finished(queue: LocalTaskQueue) -> None:
+    """Wait until the queue has no running or pending tasks."""
+    while queue._tasks:
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_submit_rejects_when_full():
+    agent = BlockingAgent()
+    queue = LocalTaskQueue(agent, max_concurrent=1, max_pending=1)
+    
+    running = await queue.submit("running")
+    pending = await queue.submit("pending")
+    
+    with pytest.raises(ResourceError) as exc_info:
+        await queue.submit("rejected")
+    assert exc_info.value.details["limit"] == 2
+    
+    await asyncio.sleep(0)
+    assert agent.prompts == ["running"]
+    assert (await queue.get(pending))["status"] == "queued"
+    
+    agent.release.set()
+    await wait_finished(queue)
+    
+    assert (await queue.get(running))["status"] == "completed"
+    assert (await queue.get(pending))["status"] == "completed"
+    
+    # Capacity is available again once tasks finish
+    await queue.submit("accepted")
+    await wait_finished(queue)
+
+
+@pytest.mark.asyncio
+async def test_finished_records_are_evicted_oldest_first():
+    agent = BlockingAgent()
+    agent.release.set()
+    queue = LocalTaskQueue(agent, max_records=2)
+    
+    finished = []
+    for prompt in ("one", "two"):
+        finished.append(await queue.submit(prompt))
+        await wait_finished(queue)
+    
+    newest = await queue.submit("three")
+    await wait_finished(queue)
+    
+    assert list(queue.records) == [finished[1], newest]
+    assert await queue.get(finished[0]) is None
+    assert finished[0] not in queue.events
+
+
+@pytest.mark.asyncio
+async def test_unfinished_records_are_not_evicted():
+    agent = BlockingAgent()
+    queue = LocalTaskQueue(agent, max_concurrent=1, max_pending=4, max_records=1)
+    
+    task_ids = [await queue.submit(prompt) for prompt in ("one", "two", "three")]
+    
+    assert list(queue.records) == task_ids
+    
+    agent.release.set()
+    await wait_finished(queue)
+    await queue.submit("four")
+    
+    await wait_finished(queue)
+    assert len(queue.records) == 1
+
+
+@pytest.mark.asyncio
+async def test_full_queue_returns_503(monkeypatch):
+    agent = BlockingAgent()
+    queue = LocalTaskQueue(agent, max_concurrent=1, max_pending=0)
+    await queue.submit("running")
+    monkeypatch.setattr(server, "_task_queue", queue)
+    
+    # The lifespan is not run, so no agent is created
+    app = server.create_app(Config())
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/task", json={"prompt": "rejected"})
+    
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+    assert "full" in response.json()["detail"]
+    
+    agent.release.set()
+    await wait_finished(queue)
+
+
+@pytest.mark.asyncio
+async def test_run_waits_for_a_slot_and_counts_toward_limit():
+    agent = BlockingAgent()
+    queue = LocalTaskQueue(agent, max_concurrent=1, max_pending=1)
+    
+    await queue.submit("background")
+    inline = asyncio.create_task(queue.run("inline"))
+    await asyncio.sleep(0)
+    
+    # The inline prompt waits behind the background task and fills the queue
+    assert agent.prompts == ["background"]
+    assert (await queue.get_stats())["queue_depth"] == 1
+    with pytest.raises(ResourceError):
+        await queue.run("rejected")
+    with pytest.raises(ResourceError):
+        await queue.submit("rejected")
+    
+    agent.release.set()
+    assert (await inline)["result"] == "inline"
+    assert agent.prompts == ["background", "inline"]
+    await wait_finished(queue)
@@ -0,0 +1,71 @@
+"""Tests for extracting TOOL_CALL lines from model output."""
+
+import random
+
+import pytest
+
+from manus.core.llm_providers import _TOOL_ARG_RE, HuggingFaceProvider
+
+
+pytestmark = pytest.mark.unit
+
+TOOLS = [{"name": "file_read"}, {"name": "shell_ls"}, {"name": "file write"}]
+
+
+def extract(text):
+    """Run the provider's parser without loading a model."""
+    provider = HuggingFaceProvider.__new__(HuggingFaceProvider)
+    return provider._extract_tool_calls(text, TOOLS)
+
+
+def extract_by_lines(text):
+    """The line-splitting parser the regular expression replaced."""
+    tool_calls = []
+    tool_names = frozenset(tool["name"] for tool in TOOLS)
+    
+    for line in text.split("\n"):
+        if "TOOL_CALL:" in line:
+            call_part = line.split("TOOL_CALL:", 1)[1].strip()
+            if "(" in call_part and call_part.endswith(")"):
+                name_part, _, args_part = call_part.partition("(")
+                tool_name = name_part.strip()
+                if tool_name in tool_names:
+                    tool_calls.append({
+                        "id": f"call_{len(tool_calls)}",
+                        "name": tool_name,
+                        "input": dict(_TOOL_ARG_RE.findall(args_part[:-1]))
+                    })
+    
+    return tool_calls
+
+
+@pytest.mark.parametrize("text", [
+    "TOOL_CALL: file_read(path='a.txt')",
+    "Let me look.\nTOOL_CALL: file_read(path='a.txt')\nTOOL_CALL: shell_ls(path=\".\")\nDone",
+    "TOOL_CALL:shell_ls()",
+    "TOOL_CALL: file_read(path='a.txt')   \t",
+    "TOOL_CALL: file_read(path='a.txt') trailing text",
+    "TOOL_CALL: file_read(path='(nested)')",
+    "TOOL_CALL: file_read(path='a') TOOL_CALL: shell_ls(path='b')",
+    "TOOL_CALL: unknown_tool(x='1')",
+    "TOOL_CALL: file write(path='spaces in name')",
+    "TOOL_CALL: file_read path='no parentheses'",
+    "TOOL_CALL: file_read(path='unterminated'\nTOOL_CALL: shell_ls()",
+    "prefix TOOL_CALL:  file_read (path='a', mode=\"r\")",
+    "TOOL_CALL: file_read(path='a')\r\nTOOL_CALL: shell_ls()\r",
+    "no tool calls here",
+])
+def test_matches_line_parser(text):
+    assert extract(text) == extract_by_lines(text)
+
+
+def test_matches_line_parser_on_random_text():
+    rng = random.Random(0)
+    pieces = [
+        "TOOL_CALL:", "TOOL_CALL: ", "file_read", "shell_ls", "file write", "other",
+        "(", ")", "path='a'", "x=\"b\"", ", ", " ", "\t", "\n", "\r", "text",
+    ]
+    
+    for _ in range(5000):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(1, 16)))
+        assert extract(text) == extract_by_lines(text), text